@@ -0,0 +1,27 @@
+"""Lazily created fonts shared by both games.
+
+The font module is only initialized, and each size only loaded, the first
+time a font is actually needed, so imports and headless runs that never
+draw text skip it entirely.
+"""
+import pygame
+
+font_cache = {}
+
+
+def get_font(size):
+    font = font_cache.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = font_cache[size] = pygame.font.Font(None, size)
+    return font
+
+
+class LazyFont:
+    """Class attribute that returns the default font at this size on first access"""
+    def __init__(self, size):
+        self.size = size
+
+    def __get__(self, obj, objtype=None):
+        return get_font(self.size)
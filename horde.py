@@ -0,0 +1,375 @@
+"""Horde mode: thousands of small enemies kept in NumPy arrays.
+
+Horde enemies are not Enemy objects. Positions, velocities, speeds and
+health are columns of preallocated arrays, and one frame of the whole horde
+is a few dozen array operations:
+
+  flow field      The arena (the screen plus MARGIN cells of spawn ground
+                  around it) is a grid of CELL-pixel cells, some blocked by
+                  obstacles. When a player moves into another cell, the
+                  distance to the players' cells is relaxed over the grid
+                  (8 neighbours, diagonals cost sqrt 2 and may not cut
+                  corners), and each cell gets the step towards its nearest
+                  neighbour. Cells within one step of a player just point
+                  at the player. Fields are cached per set of player cells,
+                  so a player walking back over old ground costs nothing.
+  neighbour grid  Every frame the horde is bucketed into NEIGHBOUR_CELL
+                  cells with one argsort. The enemies in the 3x3 cells
+                  around a point are then a slice of that order per cell,
+                  gathered for all points at once. Separation pushes apart
+                  enemies closer than SPACING, and player bullets find the
+                  enemies they hit, the same way.
+  movement        Each enemy steers a share of the way from its velocity
+                  to the field's direction at its speed, plus separation.
+                  The leading edge is checked against the blocked cells one
+                  axis at a time, so enemies slide along walls.
+
+Everything random (spawn points and speeds) comes from the horde's own
+generator, seeded from the run's seed, so the game's random sequence is
+left alone.
+"""
+import math
+
+import numpy as np
+import pygame
+
+CELL = 20                  # flow field cell, pixels
+MARGIN = 2                 # cells of spawn ground outside each edge of the screen
+NEIGHBOUR_CELL = 16        # at least SPACING and the reach of a bullet hit
+RADIUS = 7
+SPACING = 2 * RADIUS
+HEALTH = 20
+DAMAGE = 10
+SCORE = 5
+SPEED = (1.4, 2.2)
+SEPARATION = 1.5           # push per frame, pixels, when two enemies sit on top of each other
+STEER = 0.2
+SPAWN_PER_FRAME = 25
+FLOW_CACHE = 512           # flow fields kept; each is one byte per cell
+COLOR = (255, 90, 60)
+WALL_COLOR = (40, 50, 90)
+WALL_EDGE = (0, 255, 255)
+HEADINGS = 16
+
+# Arena obstacles (x, y, width, height) in pixels, on CELL boundaries
+OBSTACLES = [
+    (180, 140, 40, 220),
+    (780, 140, 40, 220),
+    (360, 100, 280, 40),
+    (440, 300, 120, 40),
+    (300, 420, 40, 120),
+    (660, 420, 40, 120),
+]
+
+# (row step, column step, cost) to each of the 8 neighbours; STAY points at the player
+STEPS = [(-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+         (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))]
+STAY = len(STEPS)
+ONE_STEP = math.sqrt(2)
+DIRECTIONS = np.array([(dx / math.hypot(dx, dy), dy / math.hypot(dx, dy)) for dy, dx, _ in STEPS] + [(0.0, 0.0)])
+
+
+class Horde:
+    def __init__(self, size, seed, width, height, obstacles=OBSTACLES):
+        self.size = size           # population the spawner keeps up
+        self.speed_scale = 1.0
+        self.rng = np.random.default_rng(seed)
+        self.left = self.top = -MARGIN * CELL
+        self.cols = width // CELL + 2 * MARGIN
+        self.rows = height // CELL + 2 * MARGIN
+        self.obstacles = [pygame.Rect(o) for o in obstacles]
+
+        self.blocked = np.zeros((self.rows, self.cols), bool)
+        for x, y, w, h in obstacles:
+            self.blocked[MARGIN + y // CELL:MARGIN + (y + h) // CELL, MARGIN + x // CELL:MARGIN + (x + w) // CELL] = True
+        self.step_costs = self.make_step_costs()
+        outside = np.ones((self.rows, self.cols), bool)
+        outside[MARGIN:-MARGIN, MARGIN:-MARGIN] = False
+        rows, cols = np.nonzero(outside & ~self.blocked)
+        self.spawn_points = np.column_stack(((cols + 0.5) * CELL + self.left, (rows + 0.5) * CELL + self.top))
+        self.flow_fields = {}
+        self.flow = None
+        self.targets = None
+
+        # Neighbour grid with a ring of empty cells, so the 3x3 around any cell stays inside
+        self.grid_cols = self.cols * CELL // NEIGHBOUR_CELL + 3
+        self.grid_rows = self.rows * CELL // NEIGHBOUR_CELL + 3
+        self.grid_offsets = np.array([dy * self.grid_cols + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+        # The cells after a cell in that 3x3; with the rest of its own cell they cover each pair once
+        self.grid_forward = np.array([1, self.grid_cols - 1, self.grid_cols, self.grid_cols + 1])
+        self.grid_keys = self.grid_order = self.grid_counts = self.grid_starts = None
+
+        capacity = size + SPAWN_PER_FRAME
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.health = np.zeros(capacity, np.int32)
+        self.count = 0
+        self.stamps = None
+
+    def make_step_costs(self):
+        """Cost of the step to each neighbour from every cell; inf where the step is not allowed"""
+        rows, cols = self.rows, self.cols
+        solid = np.pad(self.blocked, 1, constant_values=True)
+
+        def shifted(dy, dx):
+            return solid[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+
+        costs = []
+        for dy, dx, cost in STEPS:
+            allowed = ~shifted(dy, dx) & ~self.blocked
+            if dy and dx:
+                allowed &= ~shifted(dy, 0) & ~shifted(0, dx)
+            costs.append(np.where(allowed, cost, np.inf))
+        return costs
+
+    def cell_of(self, x, y):
+        col = min(max(int((x - self.left) // CELL), 0), self.cols - 1)
+        row = min(max(int((y - self.top) // CELL), 0), self.rows - 1)
+        return row, col
+
+    def flow_field(self, targets):
+        """Step index towards the nearest target cell for every cell"""
+        rows, cols = self.rows, self.cols
+        distance = np.full((rows + 2, cols + 2), np.inf)
+        inner = distance[1:-1, 1:-1]
+        for row, col in targets:
+            inner[row, col] = 0.0
+        through = np.empty((rows, cols))
+        while True:
+            before = inner.copy()
+            for (dy, dx, _), cost in zip(STEPS, self.step_costs):
+                np.add(distance[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols], cost, out=through)
+                np.minimum(inner, through, out=inner)
+            if np.array_equal(before, inner):
+                break
+        through = np.stack([distance[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols] + cost
+                            for (dy, dx, _), cost in zip(STEPS, self.step_costs)])
+        flow = through.argmin(axis=0).astype(np.uint8)
+        flow[(inner <= ONE_STEP) | ~np.isfinite(inner)] = STAY
+        return flow
+
+    def set_targets(self, players):
+        targets = tuple(sorted(self.cell_of(p.x, p.y) for p in players))
+        if targets != self.targets:
+            self.targets = targets
+            flow = self.flow_fields.pop(targets, None)
+            if flow is None:
+                flow = self.flow_field(targets)
+                if len(self.flow_fields) >= FLOW_CACHE:
+                    del self.flow_fields[next(iter(self.flow_fields))]
+            self.flow_fields[targets] = flow   # most recently used last
+            self.flow = flow
+
+    def build_grid(self):
+        n = self.count
+        gx = ((self.x[:n] - self.left) // NEIGHBOUR_CELL).astype(np.intp) + 1
+        gy = ((self.y[:n] - self.top) // NEIGHBOUR_CELL).astype(np.intp) + 1
+        keys = gy * self.grid_cols + gx
+        self.grid_order = np.argsort(keys, kind="stable")
+        self.grid_keys = keys[self.grid_order]
+        self.grid_counts = np.bincount(keys, minlength=self.grid_rows * self.grid_cols)
+        self.grid_starts = np.cumsum(self.grid_counts) - self.grid_counts
+
+    def expand(self, firsts, counts):
+        """(row, position) for every position in ranges of the sorted order, one row of
+        (first, count) ranges per point"""
+        points = np.repeat(np.arange(len(counts)), counts.sum(axis=1))
+        counts = counts.ravel()
+        positions = np.repeat(firsts.ravel() - (np.cumsum(counts) - counts), counts)
+        return points, positions + np.arange(len(positions))
+
+    def near(self, x, y):
+        """(point index, enemy index) for every enemy in the 3x3 grid cells around each point"""
+        gx = np.clip((x - self.left) // NEIGHBOUR_CELL, 0, self.grid_cols - 3).astype(np.intp) + 1
+        gy = np.clip((y - self.top) // NEIGHBOUR_CELL, 0, self.grid_rows - 3).astype(np.intp) + 1
+        cells = (gy * self.grid_cols + gx)[:, None] + self.grid_offsets
+        points, positions = self.expand(self.grid_starts[cells], self.grid_counts[cells])
+        return points, self.grid_order[positions]
+
+    def pairs(self):
+        """(i, j) for every pair of enemies in the same or adjacent grid cells, each pair once"""
+        n = len(self.grid_keys)
+        position = np.arange(n)
+        cells = self.grid_keys[:, None] + self.grid_forward
+        # The rest of its own cell, then the forward cells
+        firsts = np.column_stack((position + 1, self.grid_starts[cells]))
+        counts = np.column_stack((self.grid_starts[self.grid_keys] + self.grid_counts[self.grid_keys] - position - 1,
+                                  self.grid_counts[cells]))
+        points, positions = self.expand(firsts, counts)
+        order = self.grid_order
+        return order[points], order[positions]
+
+    def update(self, players):
+        """One frame: flow field, separation, steering and movement, then spawning"""
+        if players:
+            self.set_targets(players)
+        n = self.count
+        if n:
+            x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+            self.build_grid()
+
+            i, j = self.pairs()
+            dx = x[i] - x[j]
+            dy = y[i] - y[j]
+            d2 = dx * dx + dy * dy
+            close = (d2 < SPACING * SPACING) & (d2 > 0)
+            i, j, dx, dy, d2 = i[close], j[close], dx[close], dy[close], d2[close]
+            d = np.sqrt(d2)
+            push = SEPARATION * (SPACING - d) / (SPACING * d)
+            dx *= push
+            dy *= push
+            push_x = np.bincount(i, dx, n) - np.bincount(j, dx, n)
+            push_y = np.bincount(i, dy, n) - np.bincount(j, dy, n)
+
+            cells = self.cells(x, y)
+            step = self.flow.ravel()[cells] if self.flow is not None else np.full(n, STAY, np.uint8)
+            want_x = DIRECTIONS[step, 0]
+            want_y = DIRECTIONS[step, 1]
+            # Next to a player, head straight for the nearest one
+            direct = np.nonzero(step == STAY)[0]
+            if len(direct) and players:
+                to_x = np.array([p.x for p in players])[None, :] - x[direct, None]
+                to_y = np.array([p.y for p in players])[None, :] - y[direct, None]
+                nearest = (to_x * to_x + to_y * to_y).argmin(axis=1)
+                to_x = to_x[np.arange(len(direct)), nearest]
+                to_y = to_y[np.arange(len(direct)), nearest]
+                length = np.maximum(np.hypot(to_x, to_y), 1e-9)
+                want_x[direct] = to_x / length
+                want_y[direct] = to_y / length
+            speed = self.speed[:n] * self.speed_scale
+            vx += (want_x * speed - vx) * STEER
+            vy += (want_y * speed - vy) * STEER
+            vx += push_x
+            vy += push_y
+            # A crush against a wall mustn't launch anyone through it
+            fast = np.hypot(vx, vy) / (2 * speed)
+            fast = np.maximum(fast, 1.0)
+            vx /= fast
+            vy /= fast
+
+            # One axis at a time, checking the leading edge against the walls
+            lead_x = x + vx + np.copysign(RADIUS, vx)
+            vx[self.blocked.ravel()[self.cells(lead_x, y)]] = 0
+            x += vx
+            lead_y = y + vy + np.copysign(RADIUS, vy)
+            vy[self.blocked.ravel()[self.cells(x, lead_y)]] = 0
+            y += vy
+            np.clip(x, self.left + RADIUS, self.left + self.cols * CELL - RADIUS, out=x)
+            np.clip(y, self.top + RADIUS, self.top + self.rows * CELL - RADIUS, out=y)
+        self.spawn()
+
+    def cells(self, x, y):
+        """Flat flow grid index of each point, clamped to the grid"""
+        col = np.clip((x - self.left) // CELL, 0, self.cols - 1).astype(np.intp)
+        row = np.clip((y - self.top) // CELL, 0, self.rows - 1).astype(np.intp)
+        return row * self.cols + col
+
+    def spawn(self):
+        count = min(SPAWN_PER_FRAME, self.size - self.count)
+        if count <= 0:
+            return
+        n = self.count
+        new = slice(n, n + count)
+        points = self.spawn_points[self.rng.integers(len(self.spawn_points), size=count)]
+        jitter = self.rng.uniform(-CELL / 2 + RADIUS, CELL / 2 - RADIUS, (count, 2))
+        self.x[new] = points[:, 0] + jitter[:, 0]
+        self.y[new] = points[:, 1] + jitter[:, 1]
+        self.vx[new] = 0
+        self.vy[new] = 0
+        self.speed[new] = self.rng.uniform(*SPEED, count)
+        self.health[new] = HEALTH
+        self.count = n + count
+
+    def remove(self, gone):
+        """Drop the enemies where the boolean array gone is set"""
+        n = self.count
+        keep = ~gone
+        m = int(keep.sum())
+        for column in (self.x, self.y, self.vx, self.vy, self.speed, self.health):
+            column[:m] = column[:n][keep]
+        self.count = m
+
+    def shoot(self, bullets):
+        """Player bullets against the horde, using the neighbour grid update() built.
+
+        Returns (indices of the bullets that hit, x and y arrays of the enemies
+        killed, number of distance tests).
+        """
+        if not bullets or not self.count or self.grid_order is None:
+            return [], np.empty(0), np.empty(0), 0
+        bx = np.array([b.x for b in bullets])
+        by = np.array([b.y for b in bullets])
+        reach = np.array([b.radius for b in bullets], float) + RADIUS
+        b, e = self.near(bx, by)
+        tests = len(b)
+        dx = bx[b] - self.x[e]
+        dy = by[b] - self.y[e]
+        hit = dx * dx + dy * dy < reach[b] ** 2
+        b, e = b[hit], e[hit]
+        # Each bullet stops at the first enemy it touches
+        b, first = np.unique(b, return_index=True)
+        e = e[first]
+        damage = np.array([bullets[k].damage for k in b.tolist()], np.int32)
+        n = self.count
+        self.health[:n] -= np.bincount(e, damage, n).astype(np.int32)
+        dead = self.health[:n] <= 0
+        killed_x, killed_y = self.x[:n][dead], self.y[:n][dead]
+        if len(killed_x):
+            self.remove(dead)
+        return b.tolist(), killed_x, killed_y, tests
+
+    def touching(self, x, y, radius):
+        """Remove the enemies touching a circle; returns their x and y arrays"""
+        n = self.count
+        dx = self.x[:n] - x
+        dy = self.y[:n] - y
+        touch = dx * dx + dy * dy < (radius + RADIUS) ** 2
+        touched_x, touched_y = self.x[:n][touch], self.y[:n][touch]
+        if len(touched_x):
+            self.remove(touch)
+        return touched_x, touched_y
+
+    def solid(self, x, y, radius):
+        """Whether a circle's bounding box overlaps a blocked cell"""
+        row0, col0 = self.cell_of(x - radius, y - radius)
+        row1, col1 = self.cell_of(x + radius, y + radius)
+        return bool(self.blocked[row0:row1 + 1, col0:col1 + 1].any())
+
+    def make_stamps(self):
+        stamps = []
+        size = 2 * RADIUS + 3
+        center = size / 2
+        for h in range(HEADINGS):
+            angle = 2 * math.pi * h / HEADINGS
+            surface = pygame.Surface((size, size))
+            points = [(center + math.cos(angle + a) * RADIUS, center + math.sin(angle + a) * RADIUS)
+                      for a in (0, 2.5, -2.5)]
+            pygame.draw.polygon(surface, COLOR, points)
+            pygame.draw.polygon(surface, (255, 255, 255), points, 1)
+            surface.set_colorkey((0, 0, 0))
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            stamps.append(surface)
+        return stamps
+
+    def draw(self, screen):
+        """Obstacles and the whole horde; returns the number of draw calls"""
+        for rect in self.obstacles:
+            pygame.draw.rect(screen, WALL_COLOR, rect)
+            pygame.draw.rect(screen, WALL_EDGE, rect, 2)
+        n = self.count
+        if not n:
+            return len(self.obstacles)
+        if self.stamps is None:
+            self.stamps = self.make_stamps()
+        heading = np.arctan2(self.vy[:n], self.vx[:n]) * (HEADINGS / (2 * math.pi))
+        heading = np.rint(heading).astype(np.intp) % HEADINGS
+        offset = RADIUS + 1
+        xs = (self.x[:n] - offset).astype(np.intp).tolist()
+        ys = (self.y[:n] - offset).astype(np.intp).tolist()
+        stamps = self.stamps
+        screen.blits([(stamps[h], (px, py)) for h, px, py in zip(heading.tolist(), xs, ys)], doreturn=False)
+        return len(self.obstacles) + n
@@ -0,0 +1,81 @@
+"""Input-to-display latency of the shooter's aim.
+
+Game tracks the mouse from MOUSEMOTION events. Every motion event it takes
+off the queue is handed to an InputLatency with a timestamp. When the frame
+that shows the aim is drawn (Game.draw, just before the player), the
+events taken so far are "latched" into it. When that frame is flipped,
+each of them gets one sample: flip time minus event time. Events that
+arrive while the game is paused or in a menu are dropped, since no aim is
+shown then.
+
+pygame 2 doesn't expose SDL's event timestamps, so a real event is stamped
+when the game takes it off the queue. That leaves out the time it waited
+in the queue, which is most of the lag in the normal mode: an event that
+arrives while clock.tick sleeps is only read at the start of the next
+frame. An event that carries its own `probe_time` (time.perf_counter, as
+posted by tools/bench_latency.py from another thread) is measured from
+then, which gives the true figure.
+
+The two modes differ in when the aim is read:
+
+  normal      once per frame in handle_events, before Game.update. The
+              player shows a position from before the whole update and
+              most of the draw; the system cursor marks the aim.
+  late latch  (Game(late_latch=True), --late-latch) the motion events are
+              pulled again right before the player's shots are spawned and
+              right before the player and an aim reticle (drawn in place
+              of the system cursor) are drawn, so only the rest of the
+              draw and the flip remain. The fresh aim only turns the
+              drawn ship; the simulation keeps the angle from update.
+
+Samples go in a bounded deque, so a kiosk can leave it on for days;
+summary() gives the count and percentiles.
+"""
+import time
+from collections import deque
+
+SAMPLES_KEPT = 100_000
+PERCENTILES = (50, 90, 99)
+
+
+class InputLatency:
+    def __init__(self):
+        self.pending = []       # event times taken off the queue, not yet shown
+        self.latched = []       # event times the frame being drawn shows
+        self.samples = deque(maxlen=SAMPLES_KEPT)   # ms
+
+    def event(self, event, now=None):
+        """Note a motion event the game has just taken off the queue"""
+        probe = getattr(event, "probe_time", None)
+        self.pending.append(probe if probe is not None else now or time.perf_counter())
+
+    def latch(self):
+        """The frame being drawn shows every event taken so far"""
+        self.latched += self.pending
+        self.pending.clear()
+
+    def discard(self):
+        """Nothing aims this frame (menu, pause, game over)"""
+        self.pending.clear()
+
+    def flipped(self, now=None):
+        if self.latched:
+            now = now or time.perf_counter()
+            self.samples.extend((now - t) * 1000 for t in self.latched)
+            self.latched.clear()
+
+    def summary(self):
+        """(count, {percentile: ms}, max ms), or None without samples"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return (len(ordered), {p: ordered[round(last * p / 100)] for p in PERCENTILES}, ordered[-1])
+
+    def report(self, label="Input latency"):
+        summary = self.summary()
+        if summary is None:
+            return f"{label}: no samples"
+        count, percentiles, worst = summary
+        spread = "  ".join(f"p{p} {ms:5.1f}" for p, ms in percentiles.items())
+        return f"{label}: {spread}  max {worst:5.1f} ms over {count} events"
@@ -0,0 +1,176 @@
+"""Procedural background music, streamed to a mixer channel.
+
+A background thread runs a small step sequencer (bass, arpeggio and hi-hat
+over a four-chord minor progression) and renders its output into short PCM
+chunks. Finished chunks wait as Sound objects in a bounded queue, so the
+generator never gets more than BUFFER_CHUNKS ahead of playback. Each frame
+the game calls update(), which only hands the next chunk to Channel.queue
+once the channel's queue slot is free.
+
+Musical parameters are read once per bar from the state set with
+set_state(): tempo rises with the wave, and a boss adds a denser arpeggio,
+a busier hi-hat and a key shift for each boss phase.
+
+Each rendered step is cached by its notes and length, so once a pattern
+has played the generator mostly just copies samples.
+"""
+import math
+import queue
+import random
+import threading
+from array import array
+
+import pygame
+
+CHUNK_SECONDS = 0.25
+BUFFER_CHUNKS = 4
+VOLUME = 0.25
+
+STEPS_PER_BAR = 16
+ROOT_FREQUENCY = 110.0  # A2
+# i - VI - III - VII in A minor, as (root semitones, chord intervals)
+PROGRESSION = [(0, (0, 3, 7, 12)), (8, (0, 4, 7, 12)), (3, (0, 4, 7, 12)), (10, (0, 4, 7, 12))]
+
+
+def note_frequency(semitones):
+    return ROOT_FREQUENCY * 2 ** (semitones / 12)
+
+
+class MusicStream:
+    def __init__(self, channel, seed=None):
+        self.channel = channel
+        self.rate, size, self.channels = pygame.mixer.get_init()
+        if size != -16:
+            raise pygame.error("music needs a signed 16-bit mixer")
+        self.chunk_frames = int(self.rate * CHUNK_SECONDS)
+        self.buffer = queue.Queue(maxsize=BUFFER_CHUNKS)
+        self.rng = random.Random(seed)
+
+        # Set from the game thread; the generator reads it at each bar
+        self.state = (1, 0)  # wave, boss phase (0 = no boss)
+
+        self.step = 0
+        self.pending = array("h")
+        self.steps = {}
+        self.step_frames = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Counters
+        self.chunks = 0      # chunks handed to the channel
+        self.underruns = 0   # channel ran dry before the next chunk arrived
+        self.starved = 0     # a chunk was due but none was ready
+
+    def set_state(self, wave, boss_phase=0):
+        self.state = (wave, boss_phase)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.generate, name="MusicStream", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.channel.stop()
+
+    def update(self):
+        """Queue the next chunk if the channel has room for it; call once per frame"""
+        if self.channel.get_queue() is not None:
+            return
+        try:
+            sound = self.buffer.get_nowait()
+        except queue.Empty:
+            if self.chunks:
+                self.starved += 1
+            return
+        if self.chunks and not self.channel.get_busy():
+            self.underruns += 1
+        self.channel.queue(sound)
+        self.chunks += 1
+
+    def counters(self):
+        return {"chunks": self.chunks, "underruns": self.underruns, "starved": self.starved,
+                "buffered": self.buffer.qsize()}
+
+    # Generator thread
+
+    def generate(self):
+        while not self.stop_event.is_set():
+            sound = pygame.mixer.Sound(buffer=self.render_chunk())
+            while not self.stop_event.is_set():
+                try:
+                    self.buffer.put(sound, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def render_chunk(self):
+        samples = self.chunk_frames * self.channels
+        while len(self.pending) < samples:
+            if self.step % STEPS_PER_BAR == 0:
+                self.bar_settings()
+            self.pending.extend(self.render_step(*self.next_notes()))
+            self.step += 1
+        chunk = self.pending[:samples]
+        del self.pending[:samples]
+        return chunk
+
+    def bar_settings(self):
+        wave, boss_phase = self.state
+        tempo = 96 + 6 * min(wave, 10)
+        if boss_phase:
+            tempo += 12 + 6 * boss_phase
+        step_frames = int(self.rate * 60 / tempo / 4)
+        if step_frames != self.step_frames:
+            # Steps cached at the old tempo won't be used again
+            self.steps.clear()
+            self.step_frames = step_frames
+        self.transpose = boss_phase - 1 if boss_phase else 0
+        # Arpeggio and hi-hat every n steps
+        self.lead_every = 1 if boss_phase else (2 if wave >= 3 else 4)
+        self.hat_every = 2 if boss_phase or wave >= 5 else (4 if wave >= 2 else 0)
+        self.bass_every = 4 if boss_phase or wave >= 4 else 8
+
+    def next_notes(self):
+        bar, step = divmod(self.step, STEPS_PER_BAR)
+        root, chord = PROGRESSION[bar % len(PROGRESSION)]
+        root += self.transpose
+        bass = root if step % self.bass_every == 0 else None
+        lead = None
+        if step % self.lead_every == 0:
+            lead = root + 24 + chord[(step // self.lead_every) % len(chord)]
+        hat = bool(self.hat_every) and step % self.hat_every == self.hat_every // 2
+        return bass, lead, hat, self.step_frames
+
+    def render_step(self, bass, lead, hat, frames):
+        key = (bass, lead, hat, frames)
+        cached = self.steps.get(key)
+        if cached is not None:
+            return cached
+
+        amplitude = 32767 * VOLUME
+        bass_step = note_frequency(bass) / self.rate if bass is not None else 0
+        lead_step = 2 * math.pi * note_frequency(lead) / self.rate if lead is not None else 0
+        hat_frames = frames // 4
+        attack = min(64, frames)
+        out = array("h")
+        for i in range(frames):
+            decay = 1 - i / frames
+            value = 0.0
+            if bass is not None:
+                # Square wave, held for the whole step
+                value += 0.45 * (1 if (i * bass_step) % 1 < 0.5 else -1) * min(decay * 4, 1)
+            if lead is not None:
+                value += 0.35 * math.sin(i * lead_step) * decay
+            if hat and i < hat_frames:
+                value += 0.15 * self.rng.uniform(-1, 1) * (1 - i / hat_frames)
+            if i < attack:
+                value *= i / attack
+            sample = int(value * amplitude)
+            for _ in range(self.channels):
+                out.append(sample)
+        self.steps[key] = out
+        return out
@@ -0,0 +1,595 @@
+"""Two-player co-op for the space shooter over UDP.
+
+The host runs the real game and owns all state; the client only sends its
+input and draws what the host tells it.
+
+Every entity the host sends gets a numeric ID the first time it is seen.
+Each tick the host sends the client a STATE packet holding a delta against
+the newest state the client has acknowledged: entities created since then
+(with everything needed to build them), entities destroyed, and entities
+whose quantized position, angle, health or flags changed. Positions are
+sent in quarter pixels. Straight-flying bullets are only sent when created:
+their motion is linear, so the client extrapolates them from the creation
+position and velocity, which keeps boss bullet patterns cheap.
+
+The tick counts simulated frames: while the host is paused or the game
+is over it keeps sending the same tick, so the client holds still.
+
+Lost packets need no resending. Until the client acknowledges a newer
+state, every delta is still taken against the old baseline, so it repeats
+whatever the lost packets carried. If the baseline is too old, the host
+sends a full state. The client sends an INPUT packet every frame with its
+keys, aim point, firing flag and the newest tick it has decoded; the host
+only uses the newest input it has received.
+
+The client renders INTERP_TICKS behind the newest state it has,
+interpolating between the two received states around the render time.
+
+Link wraps the UDP socket and can delay, jitter and drop outgoing packets,
+so a session can be tested over loopback under bad network conditions
+(see tools/bench_netplay.py).
+"""
+import heapq
+import math
+import random
+import socket
+import struct
+import time
+
+import pygame
+
+DEFAULT_PORT = 47800
+INTERP_TICKS = 6
+HISTORY = 64        # ticks of states kept as possible delta baselines
+TIMEOUT = 5.0       # seconds without packets before the partner is dropped
+MAX_PACKET = 65507
+
+# Packet types
+HELLO, INPUT, STATE = 1, 2, 3
+NO_BASELINE = 0xFFFFFFFF
+
+# type, tick, baseline tick, score, wave, combo, flags (1 = game over, 2 = paused)
+STATE_HEADER = struct.Struct("<BIIIHHB")
+# type, sequence, acked tick, key bits, aim x, aim y, firing
+INPUT_PACKET = struct.Struct("<BIIBhhB")
+COUNT = struct.Struct("<H")
+# id, kind, x, y, angle, value, flags, then per-kind extras (see capture)
+CREATED = struct.Struct("<IBhhBBBhhIBB")
+# id, x, y, angle, value, flags
+MOVED = struct.Struct("<IhhBBB")
+DESTROYED = struct.Struct("<I")
+
+# Entity kinds
+PLAYER, ENEMY, BULLET, BOSS, POWERUP = range(5)
+
+POSITION_SCALE = 4
+VELOCITY_SCALE = 256
+
+KEY_BITS = [(pygame.K_w, 1), (pygame.K_a, 2), (pygame.K_s, 4), (pygame.K_d, 8)]
+ENEMY_TYPES = ["normal", "shooter"]
+POWERUP_TYPES = (1, 2, 3)   # PowerUpType values
+# What the client may find in a created row's first extra, per kind: it
+# indexes the players, ENEMY_TYPES or PowerUpType with it (None: anything)
+FIRST_EXTRAS = {PLAYER: range(2), ENEMY: range(len(ENEMY_TYPES)), BULLET: None, BOSS: None,
+                POWERUP: POWERUP_TYPES}
+
+
+def quantize(value, scale=POSITION_SCALE):
+    # Entities are removed long before they get 8000 px off screen, so
+    # this always fits in an int16
+    return round(value * scale)
+
+
+def angle_byte(angle):
+    return round(angle * 256 / (2 * math.pi)) & 255
+
+
+def fraction_byte(value, maximum):
+    return max(0, min(255, round(255 * value / maximum))) if maximum else 0
+
+
+def pack_color(color):
+    return color[0] << 16 | color[1] << 8 | color[2]
+
+
+def unpack_color(value):
+    return (value >> 16 & 255, value >> 8 & 255, value & 255)
+
+
+class Link:
+    """Non-blocking UDP socket that can delay, jitter and drop outgoing packets"""
+    def __init__(self, bind=("0.0.0.0", 0), latency=0.0, jitter=0.0, loss=0.0, seed=None,
+                 clock=time.monotonic):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind)
+        self.sock.setblocking(False)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.delayed = []  # heap of (due time, order, data, address)
+        self.order = 0
+
+        # Counters
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def send(self, data, address):
+        self.packets_sent += 1
+        self.bytes_sent += len(data)
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        if self.latency or self.jitter:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            self.order += 1
+            heapq.heappush(self.delayed, (self.clock() + delay, self.order, data, address))
+        else:
+            self.sock.sendto(data, address)
+
+    def flush(self):
+        now = self.clock()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.delayed)
+            self.sock.sendto(data, address)
+
+    def receive(self):
+        """Packets that have arrived, as (data, address) pairs"""
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recvfrom(MAX_PACKET))
+            except (BlockingIOError, InterruptedError):
+                return packets
+            except ConnectionResetError:
+                # Windows reports an earlier send to a closed port here
+                continue
+
+    def close(self):
+        self.sock.close()
+
+
+def encode_state(tick, baseline_tick, baseline, state, header):
+    """STATE packet carrying state as a delta against baseline"""
+    created = []
+    moved = []
+    for net_id, row in state.items():
+        old = baseline.get(net_id)
+        if old is None:
+            created.append(CREATED.pack(net_id, *row[:6], *row[6]))
+        elif row[1:6] != old[1:6] and (row[0] != BULLET or row[6][4] & 2):
+            moved.append(MOVED.pack(net_id, *row[1:6]))
+    destroyed = [DESTROYED.pack(net_id) for net_id in baseline if net_id not in state]
+    return b"".join([
+        STATE_HEADER.pack(STATE, tick, baseline_tick, *header),
+        COUNT.pack(len(destroyed)), *destroyed,
+        COUNT.pack(len(created)), *created,
+        COUNT.pack(len(moved)), *moved,
+    ])
+
+
+def decode_state(data, baselines):
+    """(tick, header, state) from a STATE packet, or None if its baseline is
+    unknown or it is truncated or malformed (including a kind or a per-kind
+    index out of range).
+
+    Decoded rows are (kind, x, y, angle, value, flags, extras, reference
+    tick), the reference tick being when x and y were valid; straight
+    bullets keep the tick they were created at.
+    """
+    try:
+        return unpack_state(data, baselines)
+    except struct.error:
+        return None
+
+
+def unpack_state(data, baselines):
+    _, tick, baseline_tick, *header = STATE_HEADER.unpack_from(data, 0)
+    if baseline_tick == NO_BASELINE:
+        state = {}
+    else:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            return None
+        state = dict(baseline)
+    offset = STATE_HEADER.size
+
+    count = COUNT.unpack_from(data, offset)[0]
+    offset += COUNT.size
+    for (net_id,) in DESTROYED.iter_unpack(data[offset:offset + count * DESTROYED.size]):
+        state.pop(net_id, None)
+    offset += count * DESTROYED.size
+
+    count = COUNT.unpack_from(data, offset)[0]
+    offset += COUNT.size
+    for row in CREATED.iter_unpack(data[offset:offset + count * CREATED.size]):
+        allowed = FIRST_EXTRAS.get(row[1], ())
+        if allowed is not None and row[7] not in allowed:
+            return None
+        state[row[0]] = row[1:7] + (row[7:], tick)
+    offset += count * CREATED.size
+
+    count = COUNT.unpack_from(data, offset)[0]
+    offset += COUNT.size
+    for net_id, x, y, angle, value, flags in MOVED.iter_unpack(data[offset:offset + count * MOVED.size]):
+        old = state.get(net_id)
+        if old is not None:
+            state[net_id] = (old[0], x, y, angle, value, flags, old[6], tick)
+    if offset + count * MOVED.size != len(data):
+        return None   # the counts don't match the length
+    return tick, header, state
+
+
+class CoopHost:
+    def __init__(self, game, port=DEFAULT_PORT, link=None):
+        self.game = game
+        self.link = link or Link(bind=("0.0.0.0", port))
+        self.client = None
+        self.last_heard = 0.0
+        self.input_seq = -1
+        self.acked = None
+        self.sent = {}
+        self.tick = 0
+        self.frames = None      # Game.frames at the last send
+        self.next_id = 1
+
+        # Counters
+        self.states_sent = 0
+        self.full_states = 0
+        self.encode_time = 0.0
+
+    def poll(self):
+        """Read client packets; call before Game.update"""
+        now = self.link.clock()
+        for data, address in self.link.receive():
+            if not data or (self.client is not None and address != self.client):
+                continue
+            kind = data[0]
+            if kind == HELLO or kind == INPUT:
+                if self.client is None:
+                    self.client = address
+                    self.game.add_partner()
+                self.last_heard = now
+            if kind == INPUT and len(data) == INPUT_PACKET.size:
+                _, seq, acked, key_bits, aim_x, aim_y, firing = INPUT_PACKET.unpack(data)
+                if seq > self.input_seq:
+                    self.input_seq = seq
+                    keys = {key: bool(key_bits & bit) for key, bit in KEY_BITS}
+                    self.game.partner_input = (keys, (aim_x, aim_y), bool(firing))
+                if acked in self.sent and (self.acked is None or acked > self.acked):
+                    self.acked = acked
+        if self.client is not None and now - self.last_heard > TIMEOUT:
+            self.client = None
+            self.game.partner = None
+            self.acked = None
+            self.sent.clear()
+
+    def send(self):
+        """Send this tick's state to the client; call after Game.update.
+        The tick only advances when the state changed, so while the game is
+        paused or over the client's extrapolated bullets stay put."""
+        game = self.game
+        simulated = game.frames != self.frames
+        self.frames = game.frames
+        if self.client is None:
+            self.tick += simulated
+            return
+        start = time.perf_counter()
+        state = self.capture()
+        if simulated or state != self.sent.get(self.tick):
+            self.tick += 1
+        baseline = self.sent.get(self.acked)
+        if baseline is None:
+            baseline_tick = NO_BASELINE
+            baseline = {}
+            self.full_states += 1
+        else:
+            baseline_tick = self.acked
+        flags = (1 if game.game_over else 0) | (2 if game.paused else 0)
+        header = (min(game.score, 0xFFFFFFFF), game.wave, min(game.combo, 0xFFFF), flags)
+        packet = encode_state(self.tick, baseline_tick, baseline, state, header)
+        self.sent[self.tick] = state
+        self.sent.pop(self.tick - HISTORY, None)
+        self.encode_time += time.perf_counter() - start
+        self.states_sent += 1
+        self.link.send(packet, self.client)
+
+    def entity_id(self, obj):
+        net_id = getattr(obj, "net_id", None)
+        if net_id is None:
+            net_id = obj.net_id = self.next_id
+            self.next_id += 1
+        return net_id
+
+    def capture(self):
+        """Quantized rows for everything the client draws, keyed by entity ID"""
+        game = self.game
+        state = {}
+        for index, player in enumerate((game.player, game.partner)):
+            if player is None or player.health <= 0:
+                continue
+            flags = ((player.shield_time > 0) | (player.rapid_fire_time > 0) << 1
+                     | (player.hit_flash > 0) << 2 | (player.invulnerable_frames > 0) << 3)
+            state[self.entity_id(player)] = (
+                PLAYER, quantize(player.x), quantize(player.y), angle_byte(player.angle),
+                max(0, min(255, player.health)), flags, (index, 0, 0, 0, 0))
+        for enemy in game.enemies:
+            state[self.entity_id(enemy)] = (
+                ENEMY, quantize(enemy.x), quantize(enemy.y), angle_byte(enemy.angle),
+                fraction_byte(enemy.health, enemy.max_health), 0,
+                (ENEMY_TYPES.index(enemy.type), 0, 0, 0, 0))
+        for bullet in game.bullets:
+            # Bullets are the bulk of the rows; their extras never change
+            extras = getattr(bullet, "net_extras", None)
+            if extras is None:
+                extras = bullet.net_extras = (
+                    quantize(bullet.vx, VELOCITY_SCALE), quantize(bullet.vy, VELOCITY_SCALE),
+                    pack_color(bullet.color), bullet.radius, bullet.is_enemy | bullet.homing << 1)
+            state[self.entity_id(bullet)] = (
+                BULLET, quantize(bullet.x), quantize(bullet.y), 0, 0, 0, extras)
+        if game.boss:
+            boss = game.boss
+            state[self.entity_id(boss)] = (
+                BOSS, quantize(boss.x), quantize(boss.y), 0,
+                fraction_byte(boss.health, boss.max_health), boss.phase | boss.entering << 2,
+                (boss.wave, 0, 0, 0, 0))
+        for powerup in game.powerups:
+            state[self.entity_id(powerup)] = (
+                POWERUP, quantize(powerup.x), quantize(powerup.y), 0, 0, 0,
+                (powerup.type.value, 0, 0, 0, 0))
+        return state
+
+    def close(self):
+        self.link.close()
+
+
+class CoopClient:
+    def __init__(self, game, address, link=None):
+        self.game = game
+        self.address = address
+        self.link = link or Link()
+        self.states = {}
+        self.latest = None
+        self.render_tick = None
+        self.seq = 0
+        self.objects = {}
+        self.firing = True
+        self.frame = 0
+
+        # Counters
+        self.states_received = 0
+        self.bytes_received = 0
+        self.undecodable = 0
+        self.decode_time = 0.0
+
+    def poll(self):
+        for data, address in self.link.receive():
+            if address != self.address or not data or data[0] != STATE:
+                continue
+            self.states_received += 1
+            self.bytes_received += len(data)
+            start = time.perf_counter()
+            decoded = decode_state(data, self.states)
+            self.decode_time += time.perf_counter() - start
+            if decoded is None:
+                self.undecodable += 1
+                continue
+            tick, header, state = decoded
+            self.states[tick] = state
+            # A repeated tick carries the same state but maybe new flags
+            if self.latest is None or tick >= self.latest[0]:
+                self.latest = (tick, header)
+        if self.latest is not None:
+            # Keep enough history for any baseline the host may still use
+            oldest = self.latest[0] - 2 * HISTORY
+            for tick in [t for t in self.states if t < oldest]:
+                del self.states[tick]
+
+    def send_input(self, keys=None, aim=None, firing=None):
+        """Send this frame's input; defaults to the local keyboard and mouse"""
+        if self.latest is None:
+            self.link.send(bytes([HELLO]), self.address)
+            return
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if aim is None:
+            aim = pygame.mouse.get_pos()
+        if firing is None:
+            firing = self.firing or pygame.mouse.get_pressed()[0]
+        key_bits = 0
+        for key, bit in KEY_BITS:
+            if keys[key]:
+                key_bits |= bit
+        self.seq += 1
+        self.link.send(INPUT_PACKET.pack(INPUT, self.seq, self.latest[0], key_bits,
+                                         int(aim[0]), int(aim[1]), bool(firing)), self.address)
+
+    def advance_render_tick(self):
+        latest, header = self.latest
+        target = latest - INTERP_TICKS
+        if self.render_tick is None or abs(self.render_tick - target) > 2 * INTERP_TICKS:
+            self.render_tick = float(target)
+        elif not header[3] & 3:
+            # Step one tick per frame, drifting gently towards the target;
+            # hold while the host is paused or the game is over
+            self.render_tick += 1 + (target - self.render_tick) * 0.05
+        # Never run ahead of what the host has sent
+        self.render_tick = min(self.render_tick, float(latest))
+
+    def view(self):
+        """Interpolated {id: (kind, x, y, angle, value, flags, extras)} at the render tick"""
+        render = self.render_tick
+        before = after = None
+        for tick in self.states:
+            if tick <= render and (before is None or tick > before):
+                before = tick
+            if tick > render and (after is None or tick < after):
+                after = tick
+        if before is None:
+            before = after
+        state = self.states[before]
+        later = self.states.get(after, {}) if after is not None else {}
+        t = (render - before) / (after - before) if after is not None and after != before else 0.0
+
+        view = {}
+        for net_id, row in state.items():
+            kind, x, y, angle, value, flags, extras, ref = row
+            if kind == BULLET and not extras[4] & 2:
+                # Straight bullets fly at constant velocity from their reference tick
+                steps = render - ref
+                x = x / POSITION_SCALE + extras[0] / VELOCITY_SCALE * steps
+                y = y / POSITION_SCALE + extras[1] / VELOCITY_SCALE * steps
+            else:
+                x /= POSITION_SCALE
+                y /= POSITION_SCALE
+                nxt = later.get(net_id)
+                if nxt is not None:
+                    x += (nxt[1] / POSITION_SCALE - x) * t
+                    y += (nxt[2] / POSITION_SCALE - y) * t
+            view[net_id] = (kind, x, y, angle, value, flags, extras)
+        return view
+
+    def present(self):
+        """Update the client's game objects to the interpolated host state"""
+        if self.latest is None:
+            return
+        from space_shooter import Boss, Bullet, Enemy, Player, PowerUp, PowerUpType, GREEN, WIDTH
+
+        self.frame += 1
+        self.advance_render_tick()
+        game = self.game
+        view = self.view()
+
+        for net_id in [i for i in self.objects if i not in view]:
+            obj = self.objects.pop(net_id)
+            if isinstance(obj, (Enemy, Boss)) and -50 < obj.x < WIDTH + 50 and obj.y > -50:
+                game.create_explosion(obj.x, obj.y, obj.color, 25, 5)
+
+        players = [None, None]
+        game.enemies = []
+        game.bullets = []
+        game.powerups = []
+        game.boss = None
+        for net_id, (kind, x, y, angle, value, flags, extras) in view.items():
+            obj = self.objects.get(net_id)
+            if kind == PLAYER:
+                if obj is None:
+                    obj = Player(x, y, game.sound_manager)
+                    if extras[0] == 0:
+                        obj.color = GREEN
+                obj.angle = angle * 2 * math.pi / 256
+                obj.health = value
+                obj.shield_time = flags & 1
+                obj.rapid_fire_time = flags >> 1 & 1
+                obj.hit_flash = flags >> 2 & 1
+                obj.invulnerable_frames = self.frame if flags & 8 else 0
+                players[extras[0]] = obj
+            elif kind == ENEMY:
+                if obj is None:
+                    obj = Enemy(x, y, ENEMY_TYPES[extras[0]])
+                obj.angle = angle * 2 * math.pi / 256
+                obj.health = obj.max_health * value / 255
+                obj.rotation += 3
+                game.enemies.append(obj)
+            elif kind == BULLET:
+                vx = extras[0] / VELOCITY_SCALE
+                vy = extras[1] / VELOCITY_SCALE
+                if obj is None:
+                    obj = Bullet(x, y, x + vx, y + vy, color=unpack_color(extras[2]),
+                                 is_enemy=bool(extras[4] & 1), homing=bool(extras[4] & 2))
+                    obj.radius = extras[3]
+                if obj.homing:
+                    obj.trail.append((obj.x, obj.y))
+                    del obj.trail[:-Bullet.trail_length]
+                else:
+                    obj.trail = [(x - vx * k, y - vy * k) for k in range(Bullet.trail_length, 0, -1)]
+                game.bullets.append(obj)
+            elif kind == BOSS:
+                if obj is None:
+                    obj = Boss(extras[0], game.sound_manager)
+                obj.health = obj.max_health * value // 255
+                obj.phase = flags & 3
+                obj.entering = bool(flags & 4)
+                obj.rotation += 3
+                game.boss = obj
+            elif kind == POWERUP:
+                if obj is None:
+                    obj = PowerUp(x, y, PowerUpType(extras[0]))
+                obj.rotation += 4
+                obj.pulse += 0.1
+                game.powerups.append(obj)
+            obj.x = x
+            obj.y = y
+            self.objects[net_id] = obj
+
+        # The client sees itself as the main player
+        host, own = players
+        if own is not None:
+            game.player, game.partner = own, host
+        elif host is not None:
+            game.player, game.partner = host, None
+        else:
+            # Everyone is down; keep a dead player for the UI
+            game.player.health = 0
+        score, wave, combo, flags = self.latest[1]
+        game.score = score
+        game.wave = wave
+        game.combo = combo
+        game.game_over = bool(flags & 1)
+        game.paused = bool(flags & 2)
+
+        game.stars.update()
+        for particle in game.particles[:]:
+            particle.update()
+            if particle.life <= 0:
+                game.particles.remove(particle)
+
+    def close(self):
+        self.link.close()
+
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    host, _, port = text.partition(":")
+    return (socket.gethostbyname(host or "127.0.0.1"), int(port) if port else default_port)
+
+
+def run_client(address):
+    """Join a co-op session hosted at address and play until the window closes"""
+    from space_shooter import Game, FPS
+
+    game = Game()
+    game.show_menu = False
+    pygame.display.set_caption("Space Shooter - Co-op")
+    client = CoopClient(game, address)
+    running = True
+    while running:
+        start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_f:
+                    client.firing = not client.firing
+        client.poll()
+        client.send_input()
+        client.present()
+        if client.latest is not None:
+            game.draw()
+        else:
+            game.screen.fill((0, 0, 0))
+            pygame.display.flip()
+        game.quality.frame((time.perf_counter() - start) * 1000)
+        game.clock.tick(FPS)
+    client.close()
+    game.stats_store.close()
+    game.run_history.close()
+    pygame.quit()
@@ -0,0 +1,160 @@
+"""Declarative boss bullet patterns.
+
+A boss attack is a plain dict rather than code:
+
+    {"name": "spiral", "shape": "ring", "timer": "special_cooldown",
+     "cooldown": 160, "phases": [2], "count": 20, "spin": 0.05,
+     "speed": 6, "color": [0, 255, 255], "damage": 25}
+
+Shapes:
+  ring    count bullets evenly around a circle, starting at angle (radians).
+          With spin, the ring turns by spin * the boss's rotation, which
+          makes successive rings a spiral.
+  spread  count bullets fanned over arc radians, centred on angle, or on the
+          nearest player with aim.
+  wall    count bullets per side (sides, default both) leaving the boss
+          offset pixels out, aimed at points distance pixels away and
+          spacing pixels apart: a wall of shots sweeping sideways.
+  volley  count bullets from origins jittered by up to jitter pixels, each
+          aimed at the player; with homing they steer after launch.
+
+Timing and phase conditions: a pattern fires when the boss is in one of its
+phases and the boss timer it names (shoot_cooldown or special_cooldown) has
+run out, then resets that timer to cooldown. Patterns sharing a timer are
+tried in order and the first one that fires wins. Keeping the boss's own two
+timers means snapshots and netplay need nothing new.
+
+Every pattern is compiled once into a table of origin offsets and unit
+directions, so firing a volley is a rotation of that table (one hypot for
+an aimed pattern, one cos/sin for a spinning one) and a list comprehension
+that builds the bullets straight from their velocities. New bosses are new
+lists of dicts, either in BOSS_PATTERNS or in a JSON file (load_patterns).
+"""
+import json
+import math
+import random
+
+ORANGE = (255, 165, 0)
+RED = (255, 50, 50)
+PINK = (255, 100, 180)
+YELLOW = (255, 255, 100)
+CYAN = (0, 255, 255)
+
+BOSS_PATTERNS = [
+    # Aimed shots
+    {"name": "triple shot", "shape": "spread", "timer": "shoot_cooldown", "cooldown": 45,
+     "phases": [1], "count": 3, "arc": 0.6, "aim": True, "speed": 7, "color": ORANGE, "damage": 22},
+    {"name": "five-way spread", "shape": "spread", "timer": "shoot_cooldown", "cooldown": 35,
+     "phases": [2], "count": 5, "arc": 1.0, "aim": True, "speed": 8, "color": RED, "damage": 28},
+    {"name": "homing trio", "shape": "volley", "timer": "shoot_cooldown", "cooldown": 25,
+     "phases": [3], "count": 3, "jitter": 20, "homing": True, "speed": 5, "color": PINK, "damage": 35},
+    # Specials
+    {"name": "burst", "shape": "ring", "timer": "special_cooldown", "cooldown": 200,
+     "phases": [1], "count": 16, "speed": 5, "color": YELLOW, "damage": 20},
+    {"name": "spiral", "shape": "ring", "timer": "special_cooldown", "cooldown": 160,
+     "phases": [2], "count": 20, "spin": 0.05, "speed": 6, "color": CYAN, "damage": 25},
+    {"name": "laser walls", "shape": "wall", "timer": "special_cooldown", "cooldown": 130,
+     "phases": [3], "count": 7, "offset": 30, "distance": 570, "spacing": 60,
+     "speed": 10, "color": RED, "damage": 40},
+]
+
+TIMERS = ("shoot_cooldown", "special_cooldown")
+
+
+class Pattern:
+    def __init__(self, name, shape, timer, cooldown, phases, count, speed, color, damage,
+                 angle=0.0, arc=0.0, spin=0.0, aim=False, homing=False, jitter=0,
+                 offset=0, distance=300, spacing=0, sides=(-1, 1)):
+        if timer not in TIMERS:
+            raise ValueError(f"pattern {name!r}: unknown timer {timer!r}")
+        self.name = name
+        self.shape = shape
+        self.timer = timer
+        self.cooldown = cooldown
+        self.phases = frozenset(phases)
+        self.speed = speed
+        self.color = tuple(color)
+        self.damage = damage
+        self.spin = spin
+        self.aim = aim
+        self.homing = homing
+        self.jitter = jitter
+        self.count = count
+
+        # (origin dx, origin dy, unit vx, unit vy) per bullet
+        if shape == "ring":
+            step = 2 * math.pi / count
+            self.table = [(0, 0, math.cos(angle + step * i), math.sin(angle + step * i))
+                          for i in range(count)]
+        elif shape == "spread":
+            step = arc / (count - 1) if count > 1 else 0
+            first = angle - arc / 2
+            self.table = [(0, 0, math.cos(first + step * i), math.sin(first + step * i))
+                          for i in range(count)]
+        elif shape == "wall":
+            self.table = []
+            for i in range(count):
+                lane = (i - (count - 1) / 2) * spacing
+                for side in sides:
+                    length = math.hypot(distance, lane)
+                    self.table.append((side * offset, 0, side * distance / length, lane / length))
+        elif shape == "volley":
+            self.table = None  # aimed per bullet from its jittered origin
+        else:
+            raise ValueError(f"pattern {name!r}: unknown shape {shape!r}")
+
+    def fire(self, make_bullet, x, y, target_x, target_y, rotation):
+        """Bullets for one volley from (x, y), built with make_bullet(x, y, vx, vy, ...)"""
+        speed, color, damage = self.speed, self.color, self.damage
+        if self.table is None:
+            bullets = []
+            jitter = self.jitter
+            for _ in range(self.count):
+                bx = x + random.randint(-jitter, jitter)
+                by = y + random.randint(-jitter, jitter)
+                dx, dy = target_x - bx, target_y - by
+                length = math.hypot(dx, dy) or 1
+                bullets.append(make_bullet(bx, by, dx / length * speed, dy / length * speed,
+                                           speed, color, damage, True, self.homing))
+            return bullets
+
+        # Rotate the whole table by the aim direction and/or the spin
+        if self.aim:
+            dx, dy = target_x - x, target_y - y
+            length = math.hypot(dx, dy) or 1
+            c, s = dx / length, dy / length
+        elif self.spin:
+            turn = rotation * self.spin
+            c, s = math.cos(turn), math.sin(turn)
+        else:
+            c, s = 1.0, 0.0
+        c *= speed
+        s *= speed
+        homing = self.homing
+        return [make_bullet(x + ox, y + oy, ux * c - uy * s, ux * s + uy * c,
+                            speed, color, damage, True, homing)
+                for ox, oy, ux, uy in self.table]
+
+
+def compile_patterns(definitions):
+    return [Pattern(**definition) for definition in definitions]
+
+
+def load_patterns(path):
+    """Compile a JSON file holding a list of pattern definitions"""
+    with open(path) as f:
+        return compile_patterns(json.load(f))
+
+
+def fire_ready(patterns, boss, make_bullet, target_x, target_y):
+    """Fire every pattern whose phase matches and whose timer has run out"""
+    bullets = []
+    for pattern in patterns:
+        if boss.phase in pattern.phases and getattr(boss, pattern.timer) == 0:
+            setattr(boss, pattern.timer, pattern.cooldown)
+            bullets.extend(pattern.fire(make_bullet, boss.x, boss.y, target_x, target_y,
+                                        boss.rotation))
+    return bullets
+
+
+default_patterns = compile_patterns(BOSS_PATTERNS)
@@ -0,0 +1,111 @@
+"""Score and stats persistence shared by both games.
+
+A FileStore loads its file once and then serves the value from memory.
+save() only swaps the cached value and wakes a background writer thread, so
+the game loop never waits on the disk. The writer holds off for a moment so
+a burst of saves turns into a single write, then writes a temporary file and
+renames it over the real one; a crash mid-write leaves the old file intact.
+The temporary file gets the old file's permissions (or the umask's, for a
+new file), since mkstemp makes it private to the owner.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+# How long the writer waits for more saves before writing
+COALESCE_SECONDS = 0.25
+
+# Read once, at import: os.umask can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class FileStore:
+    def __init__(self, path, default, dumps=json.dumps, loads=json.loads, delay=COALESCE_SECONDS):
+        self.path = path
+        self.dumps = dumps
+        self.loads = loads
+        self.delay = delay
+        self.value = self.load(default)
+
+        self.cond = threading.Condition()
+        self.pending = False
+        self.closed = False
+        self.thread = None
+        self.writes = 0
+        atexit.register(self.close)   # unregistered again by close()
+
+    def load(self, default):
+        try:
+            with open(self.path, "r") as f:
+                return self.loads(f.read())
+        except (OSError, ValueError):
+            return default
+
+    def save(self, value):
+        """Cache value and schedule a write; never blocks on the disk"""
+        with self.cond:
+            self.value = value
+            if self.closed:
+                return
+            self.pending = True
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.writer, name=f"FileStore({self.path})",
+                                               daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def writer(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                # Let rapid saves pile up; close() cuts the wait short
+                deadline = time.monotonic() + self.delay
+                while not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                text = self.dumps(self.value)
+                self.pending = False
+            self.write(text)
+
+    def write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                mode = os.stat(self.path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o666 & ~UMASK
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+            self.writes += 1
+        except OSError as e:
+            print(f"Could not save {self.path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def close(self):
+        """Write any pending value and stop the writer"""
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify()
+            thread = self.thread
+        atexit.unregister(self.close)
+        if thread is not None:
+            thread.join()
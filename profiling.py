@@ -0,0 +1,185 @@
+"""cProfile captures of the shooter.
+
+Press F9 in a live session and Game.run is profiled for the next
+CAPTURE_SECONDS (with --split, the simulation process's loop, which gets
+the forwarded key). When the capture ends it is turned into two timestamped
+files, so play carries on while they are written. A background thread only
+dumps the raw stats. Building the text summary takes longer and would hold
+the GIL, so it runs in a separate process, `python profiling.py PROF FRAMES
+SECONDS`:
+
+  profile-YYYYmmdd-HHMMSS.prof   for pstats, snakeviz and the like
+  profile-YYYYmmdd-HHMMSS.txt    where the time went, then the top functions
+
+`python space_shooter.py --profile [FRAMES]` profiles a whole headless,
+seeded, auto-firing run instead (the player is kept alive and a boss is
+forced halfway) and writes the same two files with a profile-headless
+prefix.
+
+The summary starts with the areas that usually matter here: particle and
+bullet updates, the collision loops (Game.check_bullet_hits), rewind
+snapshots, pygame.draw calls, blits, fills and the rest of the drawing.
+Python functions are charged their own time, so the areas don't overlap.
+"""
+import cProfile
+import io
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+
+CAPTURE_SECONDS = 5
+TOP_FUNCTIONS = 25
+
+
+def areas():
+    """(label, code locations, builtin name prefixes) for the time-by-area table"""
+    # Imported here to avoid a cycle; space_shooter imports this module
+    import snapshot
+    import sprites
+    from space_shooter import Boss, Bullet, Enemy, Game, Particle, Player, PowerUp
+
+    def where(*functions):
+        return {(f.__code__.co_filename, f.__code__.co_firstlineno, f.__code__.co_name) for f in functions}
+
+    return [
+        ("Particle.update", where(Particle.update), ()),
+        ("Bullet.update", where(Bullet.update), ()),
+        ("collision loops", where(Game.check_bullet_hits), ("<built-in method math.hypot>",)),
+        ("Game.update (rest)", where(Game.update), ()),
+        ("rewind snapshots", where(snapshot.snapshot, snapshot.Table.pack), ()),
+        ("entity draw (Python)", where(Enemy.draw, Boss.draw, Player.draw, PowerUp.draw, Bullet.draw,
+                                       Particle.draw, sprites.draw_particles, sprites.draw_bullets), ()),
+        ("pygame.draw", set(), ("<built-in method pygame.draw.",)),
+        ("Surface.blit/blits", set(), ("<method 'blit' of 'pygame.surface", "<method 'blits' of")),
+        ("Surface.fill", set(), ("<method 'fill' of 'pygame.surface",)),
+        ("font rendering", set(), ("<method 'render' of 'pygame.font",)),
+        ("display flip", set(), ("<built-in method pygame.display.flip>",)),
+    ]
+
+
+def summary(stats, frames, seconds):
+    """Text summary of a pstats.Stats covering frames frames over seconds"""
+    out = io.StringIO()
+    per_frame = 1000 / max(1, frames)
+    out.write(f"{frames} frames in {seconds:.2f} s ({frames / max(seconds, 1e-9):.1f} FPS), "
+              f"{stats.total_tt:.3f} s profiled\n\n")
+    out.write(f"{'area':24s} {'calls':>10s} {'own s':>8s} {'ms/frame':>9s} {'share':>6s}\n")
+    for label, locations, prefixes in areas():
+        calls = own = 0
+        for key, (_, ncalls, tottime, _, _) in stats.stats.items():
+            if key in locations or (key[0] == "~" and key[2].startswith(prefixes)):
+                calls += ncalls
+                own += tottime
+        out.write(f"{label:24s} {calls:10d} {own:8.3f} {own * per_frame:9.3f} "
+                  f"{own / max(stats.total_tt, 1e-9):6.1%}\n")
+    out.write("\n")
+    stats.stream = out
+    stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def write_profile(profile, base, frames, seconds):
+    stats = pstats.Stats(profile)
+    stats.dump_stats(base + ".prof")
+    with open(base + ".txt", "w") as f:
+        f.write(summary(stats, frames, seconds))
+    return base + ".prof", base + ".txt"
+
+
+def write_capture(profile, base, frames, seconds):
+    """Dump the raw stats here; summarize them in a child process"""
+    profile.dump_stats(base + ".prof")
+    subprocess.run([sys.executable, os.path.abspath(__file__), base + ".prof", str(frames), str(seconds)],
+                   check=False)
+
+
+class ProfileCapture:
+    """Profiles the next few seconds of the frame loop on request"""
+    def __init__(self, seconds=CAPTURE_SECONDS, prefix="profile"):
+        self.seconds = seconds
+        self.prefix = prefix
+        self.profile = None
+        self.frames = 0
+        self.writers = []
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.active:
+            return
+        self.frames = 0
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def frame(self):
+        """Call once per frame; ends the capture when its time is up"""
+        if self.active:
+            self.frames += 1
+            if time.perf_counter() - self.started >= self.seconds:
+                self.stop()
+
+    def stop(self):
+        self.profile.disable()
+        profile, self.profile = self.profile, None
+        base = time.strftime(f"{self.prefix}-%Y%m%d-%H%M%S")
+        seconds = time.perf_counter() - self.started
+        # Writing the files takes a while; don't hold up the game
+        writer = threading.Thread(target=write_capture, args=(profile, base, self.frames, seconds),
+                                  name="profile writer", daemon=True)
+        writer.start()
+        self.writers = [w for w in self.writers if w.is_alive()] + [writer]
+        print(f"Profile of {self.frames} frames -> {base}.prof, {base}.txt")
+
+    def close(self):
+        if self.active:
+            self.stop()
+        for writer in self.writers:
+            writer.join()
+
+
+def profile_headless(frames=3600, seed=0):
+    """Profile a whole headless run of frames frames; returns the written paths"""
+    from space_shooter import Game
+
+    game = Game(headless=True)
+    game.reset_game(seed)
+    game.show_menu = False
+    game.auto_fire = True
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    played = 0
+    profile.enable()
+    for played in range(1, frames + 1):
+        if played == frames // 2 and not game.boss:
+            game.kills = game.kills_for_boss
+        game.player.health = game.player.max_health
+        game.update()
+        game.draw()
+        if game.game_over:
+            break
+    profile.disable()
+    seconds = time.perf_counter() - start
+    game.stats_store.close()
+    game.run_history.close()
+    paths = write_profile(profile, time.strftime("profile-headless-%Y%m%d-%H%M%S"), played, seconds)
+    with open(paths[1]) as f:
+        print("".join(f.readlines()[:16]), end="")
+    print(f"Wrote {paths[0]} and {paths[1]}")
+    return paths
+
+
+if __name__ == "__main__":
+    # python profiling.py PROF FRAMES SECONDS: write PROF's text summary next to it
+    if hasattr(os, "nice"):
+        os.nice(10)   # the game is still running
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    path, frames, seconds = sys.argv[1], int(sys.argv[2]), float(sys.argv[3])
+    with open(os.path.splitext(path)[0] + ".txt", "w") as f:
+        f.write(summary(pstats.Stats(path), frames, seconds))
@@ -0,0 +1,128 @@
+"""Adaptive quality governor for the shooter.
+
+Game.run times the work of each frame (events, update, draw and flip, not
+the clock's sleep) and feeds it to a QualityGovernor. The governor keeps a
+rolling average over the last WINDOW frames and compares it with the frame
+budget:
+
+  * over budget for a whole window: step one level down right away, so a
+    boss explosion that tanks the frame rate is dealt with in about half a
+    second;
+  * under UP_RATIO of the budget for UP_FRAMES frames in a row: step one
+    level back up. The wider gap and the longer wait are the hysteresis that
+    keeps it from flapping between two levels.
+
+After every change the window starts over, so the next decision is made on
+frames drawn at the new level. Each change is logged with the average frame
+time that triggered it, and the last CHANGES_KEPT changes are kept in
+governor.changes.
+
+Lower levels trade looks for frame time: fewer particles per explosion,
+shorter bullet trails, no powerup glow rings, fewer stars, and particle and
+bullet glow stamps without their soft halo (smaller blits).
+
+The same governor also drives dynamic resolution (Game(dynamic_resolution=
+True)): with RENDER_SCALES as its levels and the world layer's draw time
+against DRAW_BUDGET_MS, it renders background, stars, particles and bullets
+to an off-screen surface at half the window size and upscales it.
+
+Quality changes explosion particle counts, and particles draw from the
+game's random sequence, so the governor only runs in the interactive loop;
+headless games and benchmarks stay at the top level and reproducible.
+"""
+from collections import deque
+from dataclasses import dataclass
+
+WINDOW = 30          # frames averaged for each decision
+UP_RATIO = 0.7       # step up only when well under budget...
+UP_FRAMES = 180      # ...for this many frames in a row (3 s at 60 FPS)
+CHANGES_KEPT = 100   # a kiosk runs for days; don't keep every change
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    name: str
+    particles: float     # share of each explosion's particles
+    trail: int           # bullet trail points
+    glow_rings: bool     # powerup glow rings
+    stars: float         # share of the starfield drawn
+    glow: int            # halo pixels around particle/bullet stamps
+
+
+LEVELS = [
+    QualityLevel("high", 1.0, 8, True, 1.0, 2),
+    QualityLevel("medium", 0.6, 6, True, 0.5, 2),
+    QualityLevel("low", 0.35, 4, False, 0.25, 1),
+    QualityLevel("minimum", 0.2, 2, False, 0.1, 0),
+]
+
+
+@dataclass(frozen=True)
+class RenderScale:
+    name: str
+    scale: float         # world surface size as a share of the window
+
+
+# 100% draws straight to the window. Any other scale pays for an upscale,
+# which is about 1 ms for an exact 2x but 2.5-3 ms at 60-90% (1000x700), more
+# than those scales save, so there is no step in between.
+RENDER_SCALES = [
+    RenderScale("100%", 1.0),
+    RenderScale("50%", 0.5),
+]
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms, levels=LEVELS, apply=None, log=print, label="Quality"):
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.index = 0
+        self.apply = apply      # called with the new level on every change
+        self.label = label
+        self.log = log
+        self.times = deque(maxlen=WINDOW)
+        self.total = 0.0
+        self.calm_frames = 0
+        self.frames = 0
+        self.changes = deque(maxlen=CHANGES_KEPT)   # (frame, old name, new name, average ms)
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def frame(self, ms):
+        """Record one frame's work time; returns True if the level changed"""
+        self.frames += 1
+        if len(self.times) == WINDOW:
+            self.total -= self.times[0]
+        self.times.append(ms)
+        self.total += ms
+        if len(self.times) < WINDOW:
+            return False
+
+        average = self.total / WINDOW
+        if average > self.budget_ms:
+            self.calm_frames = 0
+            if self.index < len(self.levels) - 1:
+                return self.step(1, average)
+        elif average < self.budget_ms * UP_RATIO:
+            self.calm_frames += 1
+            if self.calm_frames >= UP_FRAMES and self.index > 0:
+                return self.step(-1, average)
+        else:
+            self.calm_frames = 0
+        return False
+
+    def step(self, direction, average):
+        old = self.level
+        self.index += direction
+        new = self.level
+        self.changes.append((self.frames, old.name, new.name, average))
+        self.log(f"{self.label} {old.name} -> {new.name}: {average:.1f} ms/frame over "
+                 f"{WINDOW} frames (budget {self.budget_ms:.1f} ms)")
+        self.times.clear()
+        self.total = 0.0
+        self.calm_frames = 0
+        if self.apply:
+            self.apply(new)
+        return True
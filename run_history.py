@@ -0,0 +1,188 @@
+"""Run history for both games, stored in a local SQLite database.
+
+Every finished run is one row. Inserts are queued and written in batches
+inside a single transaction. The games call flush_later() at game over,
+which hands the queue to a background writer thread with its own
+connection, so a frame never waits on the disk; queries and close() wait
+for that writer first. The indexes cover the leaderboard queries
+(top-N overall, per wave and per day) so they stay fast with millions of
+rows. `version` goes up on every write so callers can cache query results
+and only re-query when something changed.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+
+HISTORY_FILE = "run_history.db"
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    wave INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    bosses INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER,
+    ended_at REAL NOT NULL,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (game, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_wave ON runs (game, wave, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_day ON runs (game, day, score DESC);
+"""
+
+
+@dataclass
+class RunRecord:
+    game: str
+    score: int
+    wave: int = 0
+    kills: int = 0
+    bosses: int = 0
+    duration: float = 0.0   # seconds of game time
+    seed: int = None
+    ended_at: float = None  # unix time, filled in when recorded
+
+
+COLUMNS = ", ".join(f.name for f in fields(RunRecord))
+INSERT = f"INSERT INTO runs ({COLUMNS}, day) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class RunHistory:
+    def __init__(self, path=HISTORY_FILE, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.version = 0
+        self.db = None
+        self.lock = threading.Lock()   # guards pending and writing against the writer thread
+        self.writing = False
+        self.writer = None
+
+    def open(self):
+        db = sqlite3.connect(self.path)
+        # WAL keeps commits cheap and lets readers run alongside a writer
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        # Room for the index pages during large batch inserts
+        db.execute("PRAGMA cache_size=-65536")
+        db.executescript(SCHEMA)
+        return db
+
+    def connect(self):
+        """Open the database on first use, so startup doesn't wait on it"""
+        if self.db is None:
+            self.db = self.open()
+        return self.db
+
+    def record(self, run):
+        """Queue a run; written once the batch is full, on flush() or by flush_later()"""
+        with self.lock:
+            self.pending.append(self.row(run))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush_later(self):
+        """Write the queued runs on a background thread"""
+        with self.lock:
+            if not self.pending or self.writing:
+                return   # a running writer picks up new runs before it stops
+            self.writing = True
+        self.writer = threading.Thread(target=self.write_pending, name="RunHistory writer", daemon=True)
+        self.writer.start()
+
+    def write_pending(self):
+        rows = []
+        try:
+            db = self.open()   # connections stay on the thread that made them
+            try:
+                while True:
+                    with self.lock:
+                        rows, self.pending = self.pending, []
+                        if not rows:
+                            # Under the same lock as the check, so a run queued
+                            # after it starts a new writer
+                            self.writing = False
+                            return
+                    with db:
+                        db.executemany(INSERT, rows)
+                    rows = []
+                    self.version += 1
+            finally:
+                db.close()
+        except BaseException:
+            with self.lock:
+                self.pending[:0] = rows   # put back a batch that failed
+                self.writing = False
+            raise
+
+    def wait(self):
+        """Let a background write finish"""
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    def record_many(self, runs):
+        """Write a large batch of runs in one transaction"""
+        self.flush()
+        now = time.time()
+        db = self.connect()
+        with db:
+            db.executemany(INSERT, (self.row(run, now) for run in runs))
+        self.version += 1
+
+    def row(self, run, now=None):
+        if run.ended_at is None:
+            run.ended_at = now if now is not None else time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(run.ended_at))
+        # Plain attribute reads; dataclasses.astuple deep-copies every field
+        return (run.game, run.score, run.wave, run.kills, run.bosses, run.duration,
+                run.seed, run.ended_at, day)
+
+    def flush(self):
+        self.wait()
+        if not self.pending:
+            return
+        db = self.connect()
+        with db:
+            db.executemany(INSERT, self.pending)
+        self.pending.clear()
+        self.version += 1
+
+    def close(self):
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def query(self, where, params, limit):
+        self.flush()
+        rows = self.connect().execute(
+            f"SELECT {COLUMNS} FROM runs WHERE {where} ORDER BY score DESC LIMIT ?",
+            params + (limit,),
+        )
+        return [RunRecord(*row) for row in rows]
+
+    def top(self, game, limit=10):
+        return self.query("game = ?", (game,), limit)
+
+    def top_for_wave(self, game, wave, limit=10):
+        return self.query("game = ? AND wave = ?", (game, wave), limit)
+
+    def top_for_day(self, game, day=None, limit=10):
+        """Best runs on day ("YYYY-MM-DD", local time); defaults to today"""
+        if day is None:
+            day = time.strftime("%Y-%m-%d")
+        return self.query("game = ? AND day = ?", (game, day), limit)
+
+    def count(self, game=None):
+        self.flush()
+        db = self.connect()
+        if game is None:
+            return db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return db.execute("SELECT COUNT(*) FROM runs WHERE game = ?", (game,)).fetchone()[0]
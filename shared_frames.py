@@ -0,0 +1,331 @@
+"""Run the shooter's simulation and rendering in two processes.
+
+With `python space_shooter.py --split`, a child process runs Game.update at
+60 Hz and the main process owns the window and draws, so on a multi-core
+machine the two no longer take turns on one core under the GIL.
+
+Every tick the simulation packs its entity tables with snapshot.snapshot
+(players, enemies, bullets with trails, boss, powerups and particles as
+column arrays) and publishes them into a FrameBuffer: a
+multiprocessing.shared_memory block with a small control header and three
+slots (triple buffering). The control header says which slot holds the
+newest complete frame and which one the renderer has claimed. The writer
+always fills the third slot, never the newest or the claimed one, and then
+makes it the newest; the renderer claims the newest slot and keeps it
+until it takes a newer frame. The two only share a lock while they swap
+slot numbers, never while writing or drawing a frame.
+
+The renderer reads its slot in place: snapshot.view casts the particle,
+bullet and enemy tables to memoryviews over the shared memory, and
+Game.draw draws them from there (Presenter supplies Game.draw_sprites and
+Game.draw_enemies) without copying the slot or building an object per
+entity. Only the counters, the players, the boss and the powerups, a few
+objects, are restored. Since the writer never touches a claimed slot, a
+frame can't change while it is drawn.
+
+Each slot also carries what the HUD needs that isn't in a snapshot (menu
+flag, sound flag, lifetime stats) and how long the tick took. Input goes
+the other way over a Pipe, once per rendered frame: the key and mouse
+button presses Game.handle_events reacts to, plus the movement keys and
+mouse position (Game.local_input). Audio plays in the simulation process.
+
+With lockstep the simulation stays at most one frame ahead of what the
+renderer has taken (the renderer writes the last sequence number it
+consumed into the control header), which is what tools/bench_split.py uses
+to compare combined frame time with a single process.
+"""
+import multiprocessing
+import struct
+import time
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+
+import pygame
+
+import snapshot as snapshots
+from snapshot import snapshot
+from sprites import draw_bullet_columns, draw_particle_columns
+
+SLOT_BYTES = 2 * 1024 * 1024
+SLOTS = 3
+NO_SLOT = 0xFF
+
+# Control header: last frame the renderer consumed (written only by the
+# renderer), the simulation's closed flag (written only by the simulation),
+# then, under the lock, the newest frame's sequence number and slot and the
+# slot the renderer has claimed
+CONSUMED = struct.Struct("<Q")
+CLOSED = struct.Struct("<B")
+SWAP = struct.Struct("<QBB")
+CONTROL_BYTES = CONSUMED.size + CLOSED.size + SWAP.size
+SWAP_OFFSET = CONSUMED.size + CLOSED.size
+# sequence number, payload size, tick time (ms), show_menu, sound enabled,
+# then the lifetime stats shown in the HUD
+SLOT = struct.Struct("<QIdBBqqqqq")
+
+# Events Game.handle_events reacts to, and the attributes it reads
+FORWARDED_EVENTS = {pygame.KEYDOWN: ("key",), pygame.MOUSEBUTTONDOWN: ("pos", "button")}
+MOVE_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+
+
+class FrameBuffer:
+    """Three snapshot slots in shared memory; pass name and the creator's lock to attach to
+    an existing one"""
+    def __init__(self, name=None, lock=None, slot_bytes=SLOT_BYTES):
+        size = CONTROL_BYTES + SLOTS * (SLOT.size + slot_bytes)
+        self.shm = SharedMemory(name, create=name is None, size=size)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self.lock = lock or multiprocessing.get_context("spawn").Lock()
+        self.slot_bytes = slot_bytes
+        self.seq = 0            # writer: frames published
+        self.last_seq = 0       # reader: newest frame read
+        self.oversized = 0      # frames too big for a slot, not published
+        if name is None:
+            self.buf[:CONTROL_BYTES] = bytes(CONTROL_BYTES)
+            SWAP.pack_into(self.buf, SWAP_OFFSET, 0, 0, NO_SLOT)
+
+    def slot_offset(self, slot):
+        return CONTROL_BYTES + slot * (SLOT.size + self.slot_bytes)
+
+    def write(self, data, game, tick_ms):
+        if len(data) > self.slot_bytes:
+            self.oversized += 1
+            return
+        with self.lock:
+            _, latest, claimed = SWAP.unpack_from(self.buf, SWAP_OFFSET)
+        slot = next(s for s in range(SLOTS) if s != latest and s != claimed)
+        self.seq += 1
+        offset = self.slot_offset(slot)
+        stats = game.stats
+        self.buf[offset + SLOT.size:offset + SLOT.size + len(data)] = data
+        SLOT.pack_into(self.buf, offset, self.seq, len(data), tick_ms, game.show_menu,
+                       game.sound_manager.enabled, stats.high_score, stats.total_kills,
+                       stats.bosses_defeated, stats.games_played, stats.powerups_collected)
+        with self.lock:
+            _, _, claimed = SWAP.unpack_from(self.buf, SWAP_OFFSET)
+            SWAP.pack_into(self.buf, SWAP_OFFSET, self.seq, slot, claimed)
+
+    def read(self):
+        """(sequence number, header fields, snapshot memoryview) of the newest frame, or
+        None if nothing new. The view is the slot itself, not a copy; the slot stays
+        claimed, and the writer keeps out of it, until the next read that finds a newer
+        frame. Release the view before then."""
+        with self.lock:
+            seq, slot, _ = SWAP.unpack_from(self.buf, SWAP_OFFSET)
+            if seq <= self.last_seq:
+                return None
+            SWAP.pack_into(self.buf, SWAP_OFFSET, seq, slot, slot)
+        offset = self.slot_offset(slot)
+        header = SLOT.unpack_from(self.buf, offset)
+        self.last_seq = seq
+        return seq, header, self.buf[offset + SLOT.size:offset + SLOT.size + header[1]]
+
+    def consume(self, seq):
+        """Tell a lockstep writer that frame seq has been drawn"""
+        CONSUMED.pack_into(self.buf, 0, seq)
+
+    @property
+    def consumed(self):
+        return CONSUMED.unpack_from(self.buf, 0)[0]
+
+    @property
+    def closed(self):
+        return CLOSED.unpack_from(self.buf, CONSUMED.size)[0] != 0
+
+    def mark_closed(self):
+        CLOSED.pack_into(self.buf, CONSUMED.size, 1)
+
+    def close(self, unlink=False):
+        self.buf.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def simulate(name, lock, conn, seed=None, sound=True, fps=60, lockstep=False, script=None):
+    """Simulation process: apply forwarded input, update, publish, repeat"""
+    from space_shooter import WIDTH, Game
+
+    frames = FrameBuffer(name, lock)
+    game = Game(headless=True)
+    game.sound_manager.enabled = sound
+    if seed is not None:
+        game.reset_game(seed)
+    game.local_input = (dict.fromkeys(MOVE_KEYS, False), (WIDTH // 2, 0))
+
+    def apply_input():
+        """Apply the renderer's pending input; False once it asks the simulation to stop"""
+        while conn.poll():
+            message = conn.recv()
+            if message is None:
+                return False
+            events, keys, mouse = message
+            for event_type, attributes in events:
+                pygame.event.post(pygame.event.Event(event_type, attributes))
+            game.local_input = (keys, mouse)
+        return True
+
+    running = apply_input()
+    while running:
+        start = time.perf_counter()
+        if script is not None:
+            script(game)
+        running = game.handle_events()
+        game.update()
+        frames.write(snapshot(game), game, (time.perf_counter() - start) * 1000)
+
+        if lockstep:
+            # Don't get more than a frame ahead of the renderer. It sends input
+            # once per frame, so block on that rather than spinning; the
+            # timeout covers a frame taken without new input.
+            while running and frames.consumed < frames.seq - 1:
+                conn.poll(0.001)
+                running = apply_input()
+        elif fps:
+            game.clock.tick(fps)
+        game.profiler.frame()   # F9 is forwarded, so captures profile this loop
+        running = running and apply_input()
+
+    frames.mark_closed()
+    frames.close()
+    game.profiler.close()
+    game.stats_store.close()
+    game.run_history.close()
+    conn.close()
+
+
+def start_simulation(seed=None, sound=True, fps=60, lockstep=False, script=None):
+    """Start the simulation process; returns its FrameBuffer, input Pipe end and Process"""
+    frames = FrameBuffer()
+    conn, child_conn = multiprocessing.Pipe()
+    # spawn rather than fork, so the child doesn't inherit this process's SDL state
+    process = multiprocessing.get_context("spawn").Process(
+        target=simulate, args=(frames.name, frames.lock, child_conn, seed, sound, fps, lockstep, script), daemon=True)
+    process.start()
+    child_conn.close()
+    return frames, conn, process
+
+
+class Presenter:
+    """Render-process side: forwards input and draws the newest published frame"""
+    def __init__(self, game, frames, conn):
+        self.game = game
+        self.frames = frames
+        self.conn = conn
+        self.tick_ms = 0.0
+        self.frames_drawn = 0
+        self.frames_new = 0
+        self.seq = None         # frame being shown
+        self.frame = None       # its snapshot.Frame, views into the slot
+        self.new = False        # not drawn yet
+        game.draw_sprites = self.draw_sprites
+        game.draw_enemies = self.draw_enemies
+
+    def send_input(self):
+        """Forward this frame's input; False once the window is closed"""
+        events = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            attributes = FORWARDED_EVENTS.get(event.type)
+            if attributes:
+                events.append((event.type, {name: getattr(event, name) for name in attributes}))
+        pressed = pygame.key.get_pressed()
+        self.game.mouse_pos = pygame.mouse.get_pos()
+        self.conn.send((events, {key: pressed[key] for key in MOVE_KEYS}, self.game.mouse_pos))
+        return True
+
+    def receive(self):
+        """Map the newest frame into the game; False if there is no new one"""
+        game = self.game
+        frame = self.frames.read()
+        if frame is None:
+            return False
+        seq, header, data = frame
+        self.release()
+        view = snapshots.view(game, data)
+        self.seq, self.frame, self.new = seq, view, True
+        game.particles, game.bullets, game.enemies = view.particles, view.bullets, view.enemies
+        _, _, self.tick_ms, show_menu, sound, *stats = header
+        if show_menu and not game.show_menu:
+            game.leaderboard_version = None  # the simulation may have recorded a run
+        game.show_menu = bool(show_menu)
+        game.sound_manager.enabled = bool(sound)
+        (game.stats.high_score, game.stats.total_kills, game.stats.bosses_defeated,
+         game.stats.games_played, game.stats.powerups_collected) = stats
+        self.frames_new += 1
+        return True
+
+    def draw(self):
+        self.game.stars.update()
+        self.game.draw()
+        self.frames_drawn += 1
+        if self.new:
+            self.frames.consume(self.seq)
+            self.new = False
+
+    def present(self):
+        self.receive()
+        self.draw()
+
+    def draw_sprites(self, world, scale):
+        """Game.draw_sprites from the frame's columns"""
+        frame = self.frame
+        if frame is None:
+            return 0
+        calls = sum(draw_particle_columns(world, engine, scale) for engine in frame.engine_particles)
+        calls += draw_particle_columns(world, frame.particles, scale)
+        return calls + draw_bullet_columns(world, frame.bullets, frame.trail_lengths, frame.trail_points, scale)
+
+    def draw_enemies(self):
+        """Game.draw_enemies from the frame's columns"""
+        from space_shooter import draw_enemy
+
+        if self.frame is None:
+            return
+        enemies = self.frame.enemies
+        screen = self.game.screen
+        for x, y, kind, radius, color, angle, rotation, health, max_health in zip(
+                enemies["x"], enemies["y"], enemies["type"], enemies["radius"], enemies["color"],
+                enemies["angle"], enemies["rotation"], enemies["health"], enemies["max_health"]):
+            draw_enemy(screen, x, y, snapshots.ENEMY_TYPES[kind], radius, snapshots.unpack_color(color),
+                       angle, rotation, health, max_health)
+
+    def release(self):
+        if self.frame is not None:
+            self.frame.release()
+            self.frame = None
+
+    def close(self, process):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        wait([process.sentinel], timeout=2)
+        if process.is_alive():
+            process.terminate()
+        self.conn.close()
+        self.release()
+        self.game.particles, self.game.bullets, self.game.enemies = [], [], []
+        self.frames.close(unlink=True)
+
+
+def run_split(dynamic_resolution=False):
+    """Play with simulation and rendering in separate processes until the window closes"""
+    from space_shooter import FPS, Game
+
+    frames, conn, process = start_simulation(fps=FPS)
+    game = Game(dynamic_resolution=dynamic_resolution)
+    presenter = Presenter(game, frames, conn)
+    while not frames.closed and process.is_alive():
+        start = time.perf_counter()
+        if not presenter.send_input():
+            break
+        presenter.present()
+        game.quality.frame((time.perf_counter() - start) * 1000)
+        game.clock.tick(FPS)
+    presenter.close(process)
+    game.stats_store.close()
+    game.run_history.close()
+    pygame.quit()
@@ -1,9 +1,15 @@
 import pygame
+import os
 import sys
 import random
 import math  # For bonus pulse
+import time
+from collections import deque
 
-pygame.init()
+from fonts import LazyFont
+from persistence import FileStore
+from run_history import RunHistory, RunRecord
+from snake_autoplay import AutoPlayer
 
 # Window size (smaller, more like classic phones)
 SCREEN_WIDTH = 800
@@ -21,12 +27,82 @@ DARK_BLUE = (50, 150, 255)       # Bonus
 WHITE = (255, 255, 255)
 GRAY = (80, 80, 80)
 
+HIGH_SCORE_FILE = "snake_highscore.txt"
+
 BASE_SPEED = 10
 SPEED_INCREASE = 0.3
 
+# Rendering and input run at display rate; the snake moves self.speed times per second
+RENDER_FPS = 60
+MAX_TICKS_PER_FRAME = 5   # catch-up limit after a stall
+MAX_QUEUED_TURNS = 3
+
+# Food only spawns away from the edges
+FOOD_MARGIN = 2
+
+# Body segments past this index all share the darkest shade
+SHADED_SEGMENTS = 8
+
+class FreeCellIndex:
+    """Free food cells with O(1) add, remove and random sampling.
+
+    Cells live in a flat list with a cell -> position map, so removal swaps
+    the cell with the last entry instead of shifting the list.
+    """
+    def __init__(self, cells):
+        self.allowed = frozenset(cells)
+        self.cells = list(self.allowed)
+        self.positions = {cell: i for i, cell in enumerate(self.cells)}
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def __contains__(self, cell):
+        return cell in self.positions
+    
+    def add(self, cell):
+        if cell in self.allowed and cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+    
+    def discard(self, cell):
+        i = self.positions.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[i] = last
+            self.positions[last] = i
+    
+    def pop_random(self):
+        """Remove and return a random free cell, or None if none are left"""
+        if not self.cells:
+            return None
+        cell = random.choice(self.cells)
+        self.discard(cell)
+        return cell
+
 class SnakeGame:
-    def __init__(self):
+    # Fonts, loaded on first use
+    font_small = LazyFont(32)
+    font_medium = LazyFont(48)
+    font_large = LazyFont(72)
+    font_huge = LazyFont(96)
+    font_bonus = LazyFont(20)
+    
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, headless=False):
+        # The board can be larger than the window for headless runs
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.autoplayer = None
+        self.high_score_store = FileStore(HIGH_SCORE_FILE, 0, dumps=str, loads=int)
+        self.run_history = RunHistory()
+        # Only the display is brought up here; fonts and render caches are
+        # built on the first draw. Headless runs use an invisible window.
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
         try:
+            pygame.display.init()
             self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
             pygame.display.set_caption("Nokia Snake - Classic Edition")
         except Exception as e:
@@ -35,20 +111,34 @@ class SnakeGame:
             sys.exit(1)
         
         self.clock = pygame.time.Clock()
-        self.font_small = pygame.font.Font(None, 32)
-        self.font_medium = pygame.font.Font(None, 48)
-        self.font_large = pygame.font.Font(None, 72)
-        self.font_huge = pygame.font.Font(None, 96)
+        self.background = None
+        self.background_key = None
+        self.status_rect = None
+        self.segment_tiles = None
         
         self.reset_game()
     
-    def reset_game(self):
-        start_x = GRID_WIDTH // 2
-        start_y = GRID_HEIGHT // 2
+    def reset_game(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(1 << 31)
+        random.seed(self.seed)
+        self.foods_eaten = 0
+        self.play_time = 0.0
+        start_x = self.grid_width // 2
+        start_y = self.grid_height // 2
         self.snake = [(start_x, start_y), (start_x-1, start_y), (start_x-2, start_y)]
+        self.snake_cells = set(self.snake)
         self.direction = (1, 0)
+        self.turn_queue = deque()
+        self.tick_accumulator = 0
         self.bonus_food = None
         self.bonus_timer = 0
+        self.free_cells = FreeCellIndex(
+            (x, y)
+            for x in range(FOOD_MARGIN, self.grid_width - FOOD_MARGIN)
+            for y in range(FOOD_MARGIN, self.grid_height - FOOD_MARGIN)
+        )
+        for segment in self.snake:
+            self.free_cells.discard(segment)
         self.food = self.generate_food()
         self.score = 0
         self.high_score = self.load_high_score()
@@ -56,31 +146,38 @@ class SnakeGame:
         self.game_over = False
         self.paused = False
         self.speed = BASE_SPEED
+        
+        # Incremental renderer state
+        self.full_redraw = True
+        self.vacated_cells = []
+        self.ticks_since_draw = 0
+        self.drawn_scene = None
+        self.drawn_status = None
+        self.drawn_food = None
+        self.drawn_bonus = None
     
     def load_high_score(self):
-        try:
-            with open("snake_highscore.txt", "r") as f:
-                return int(f.read())
-        except:
-            return 0
+        # Read from disk once at startup, then served from memory
+        return self.high_score_store.value
     
     def save_high_score(self):
         if self.score > self.high_score:
             self.high_score = self.score
-            with open("snake_highscore.txt", "w") as f:
-                f.write(str(self.score))
+            self.high_score_store.save(self.score)
+    
+    def record_run(self):
+        self.run_history.record(RunRecord("snake", self.score, self.level, self.foods_eaten,
+                                          0, self.play_time, self.seed))
+        self.run_history.flush_later()
     
     def generate_food(self):
-        while True:
-            food = (random.randint(2, GRID_WIDTH - 3), random.randint(2, GRID_HEIGHT - 3))
-            if food not in self.snake and (self.bonus_food is None or food != self.bonus_food):
-                return food
+        # Food and bonus cells are taken out of the index while they are on
+        # the board, so any sampled cell is clear of the snake and other food.
+        # Returns None once the board is full.
+        return self.free_cells.pop_random()
     
     def spawn_bonus_food(self):
-        while True:
-            bonus = (random.randint(2, GRID_WIDTH - 3), random.randint(2, GRID_HEIGHT - 3))
-            if bonus not in self.snake and bonus != self.food:
-                return bonus
+        return self.free_cells.pop_random()
     
     def handle_input(self):
         for event in pygame.event.get():
@@ -93,20 +190,31 @@ class SnakeGame:
                     elif event.key == pygame.K_ESCAPE:
                         return False
                 else:
-                    if event.key == pygame.K_UP and self.direction != (0, 1):
-                        self.direction = (0, -1)
-                    elif event.key == pygame.K_DOWN and self.direction != (0, -1):
-                        self.direction = (0, 1)
-                    elif event.key == pygame.K_LEFT and self.direction != (1, 0):
-                        self.direction = (-1, 0)
-                    elif event.key == pygame.K_RIGHT and self.direction != (-1, 0):
-                        self.direction = (1, 0)
+                    if event.key == pygame.K_UP:
+                        self.queue_turn((0, -1))
+                    elif event.key == pygame.K_DOWN:
+                        self.queue_turn((0, 1))
+                    elif event.key == pygame.K_LEFT:
+                        self.queue_turn((-1, 0))
+                    elif event.key == pygame.K_RIGHT:
+                        self.queue_turn((1, 0))
                     elif event.key == pygame.K_p:
                         self.paused = not self.paused
+                    elif event.key == pygame.K_a:
+                        self.autoplayer = None if self.autoplayer else AutoPlayer(self)
                     elif event.key == pygame.K_ESCAPE:
                         return False
         return True
     
+    def queue_turn(self, direction):
+        # Turns are checked against the last queued direction, so a quick
+        # up-then-left from moving right is kept as two turns on two ticks
+        last = self.turn_queue[-1] if self.turn_queue else self.direction
+        if direction in (last, (-last[0], -last[1])):
+            return
+        if len(self.turn_queue) < MAX_QUEUED_TURNS:
+            self.turn_queue.append(direction)
+    
     def update_speed(self):
         self.speed = BASE_SPEED + (self.score // 100) * SPEED_INCREASE
         self.speed = min(self.speed, 25)
@@ -116,76 +224,146 @@ class SnakeGame:
             return
         
         self.update_speed()
+        self.play_time += 1 / int(self.speed)
+        
+        if self.turn_queue:
+            self.direction = self.turn_queue.popleft()
         
         if self.bonus_timer > 0:
             self.bonus_timer -= 1
             if self.bonus_timer <= 0:
+                self.free_cells.add(self.bonus_food)
                 self.bonus_food = None
         
         head_x, head_y = self.snake[0]
         # Move head and wrap around the grid (classic Nokia-style)
-        new_head_x = (head_x + self.direction[0]) % GRID_WIDTH
-        new_head_y = (head_y + self.direction[1]) % GRID_HEIGHT
+        new_head_x = (head_x + self.direction[0]) % self.grid_width
+        new_head_y = (head_y + self.direction[1]) % self.grid_height
         new_head = (new_head_x, new_head_y)
         
-        if new_head in self.snake:
+        if new_head in self.snake_cells:
             self.game_over = True
             self.save_high_score()
+            self.record_run()
             return
         
         self.snake.insert(0, new_head)
+        self.snake_cells.add(new_head)
+        self.free_cells.discard(new_head)
         
-        ate_bonus = False
+        ate_food = False
         if self.bonus_food and new_head == self.bonus_food:
             self.score += 50
             self.bonus_food = None
             self.bonus_timer = 0
-            ate_bonus = True
         
         elif new_head == self.food:
             self.score += 10
+            self.foods_eaten += 1
+            ate_food = True
             self.food = self.generate_food()
+            if self.food is None:
+                # No free cell left: the board is full
+                self.game_over = True
+                self.save_high_score()
+                self.record_run()
+                return
             if self.score % 50 == 0:
+                if self.bonus_food is not None:
+                    self.free_cells.add(self.bonus_food)
                 self.bonus_food = self.spawn_bonus_food()
-                self.bonus_timer = 300  # ~5-10 seconds depending on speed
+                if self.bonus_food is not None:
+                    self.bonus_timer = 300  # ~5-10 seconds depending on speed
         else:
-            self.snake.pop()
+            tail = self.snake.pop()
+            self.snake_cells.discard(tail)
+            self.free_cells.add(tail)
+            self.vacated_cells.append(tail)
+        
+        self.ticks_since_draw += 1
         
-        if self.score % 50 == 0 and not ate_bonus:
+        # Level up when regular food brings the score to a multiple of 50
+        if ate_food and self.score % 50 == 0:
             self.level += 1
     
-    def draw_background(self):
-        for y in range(0, SCREEN_HEIGHT, GRID_SIZE):
-            gray_intensity = int(20 + (y / SCREEN_HEIGHT) * 40)
+    def advance(self, dt):
+        """Run as many logic ticks as dt milliseconds cover at the current speed"""
+        if self.game_over or self.paused:
+            self.tick_accumulator = 0
+            return
+        interval = 1000 / int(self.speed)
+        self.tick_accumulator = min(self.tick_accumulator + dt, interval * MAX_TICKS_PER_FRAME)
+        while self.tick_accumulator >= interval and not self.game_over:
+            self.tick_accumulator -= interval
+            if self.autoplayer:
+                self.autoplayer.step()
+            self.update()
+            interval = 1000 / int(self.speed)
+    
+    def render_background(self, surface):
+        width, height = surface.get_size()
+        for y in range(0, height, GRID_SIZE):
+            gray_intensity = int(20 + (y / height) * 40)
             color = (gray_intensity, gray_intensity, gray_intensity)
-            pygame.draw.rect(self.screen, color, (0, y, SCREEN_WIDTH, GRID_SIZE))
+            pygame.draw.rect(surface, color, (0, y, width, GRID_SIZE))
         
-        for x in range(0, SCREEN_WIDTH, GRID_SIZE):
-            pygame.draw.line(self.screen, GRAY, (x, 0), (x, SCREEN_HEIGHT), 1)
-        for y in range(0, SCREEN_HEIGHT, GRID_SIZE):
-            pygame.draw.line(self.screen, GRAY, (0, y), (SCREEN_WIDTH, y), 1)
+        for x in range(0, width, GRID_SIZE):
+            pygame.draw.line(surface, GRAY, (x, 0), (x, height), 1)
+        for y in range(0, height, GRID_SIZE):
+            pygame.draw.line(surface, GRAY, (0, y), (width, y), 1)
     
-    def draw_snake(self):
-        for i, segment in enumerate(self.snake):
-            x = segment[0] * GRID_SIZE + 2
-            y = segment[1] * GRID_SIZE + 2
-            w = GRID_SIZE - 4
-            h = GRID_SIZE - 4
+    def draw_background(self):
+        # The gradient and grid never change, so they are drawn once into a
+        # display-format surface and only rebuilt if the grid or window size does
+        key = (GRID_SIZE, self.screen.get_size())
+        if self.background is None or self.background_key != key:
+            self.background = pygame.Surface(self.screen.get_size()).convert()
+            self.background.fill(BLACK)
+            self.render_background(self.background)
+            self.background_key = key
+        self.screen.blit(self.background, (0, 0))
+    
+    def prepare_rendering(self):
+        # Rows covered by the status bar, including text that hangs below it
+        status_bottom = max(60, 50 + self.font_small.get_height())
+        status_rows = -(-status_bottom // GRID_SIZE)
+        self.status_rect = pygame.Rect(0, 0, SCREEN_WIDTH, status_rows * GRID_SIZE)
+        self.segment_tiles = self.build_segment_tiles()
+    
+    def build_segment_tiles(self):
+        """Pre-render the head tile (index 0) and one body tile per shade"""
+        hw = GRID_SIZE - 2
+        head = pygame.Surface((hw, hw)).convert()
+        head.fill(LIGHT_RED)
+        pygame.draw.rect(head, WHITE, (0, 0, hw, hw), 2)
+        pygame.draw.rect(head, (255, 150, 150), (2, 2, hw-4, hw-4))
+        tiles = [(head, 1)]
+        
+        w = GRID_SIZE - 4
+        for i in range(1, SHADED_SEGMENTS + 1):
             alpha = max(100, 255 - (i * 20))
             body_color = (min(255, alpha), int(alpha * 0.4), int(alpha * 0.4))
-            pygame.draw.rect(self.screen, body_color, (x, y, w, h))
-            pygame.draw.rect(self.screen, DARK_RED, (x, y, w, h), 2)
-        
-        head = self.snake[0]
-        hx = head[0] * GRID_SIZE + 1
-        hy = head[1] * GRID_SIZE + 1
-        hw = GRID_SIZE - 2
-        hh = GRID_SIZE - 2
-        pygame.draw.rect(self.screen, LIGHT_RED, (hx, hy, hw, hh))
-        pygame.draw.rect(self.screen, WHITE, (hx, hy, hw, hh), 2)
-        pygame.draw.rect(self.screen, (255, 150, 150), (hx+2, hy+2, hw-4, hh-4))
+            tile = pygame.Surface((w, w)).convert()
+            tile.fill(body_color)
+            pygame.draw.rect(tile, DARK_RED, (0, 0, w, w), 2)
+            tiles.append((tile, 2))
+        return tiles
+    
+    def draw_segment(self, i, segment):
+        tile, offset = self.segment_tiles[min(i, SHADED_SEGMENTS)]
+        self.screen.blit(tile, (segment[0] * GRID_SIZE + offset, segment[1] * GRID_SIZE + offset))
+    
+    def draw_snake(self):
+        for i, segment in enumerate(self.snake):
+            self.draw_segment(i, segment)
     
     def draw_food(self):
+        if self.food is not None:
+            self.draw_regular_food()
+        if self.bonus_food and self.bonus_timer > 0:
+            self.draw_bonus_food()
+    
+    def draw_regular_food(self):
         fx = self.food[0] * GRID_SIZE + 3
         fy = self.food[1] * GRID_SIZE + 3
         fw = GRID_SIZE - 6
@@ -193,26 +371,25 @@ class SnakeGame:
         pygame.draw.rect(self.screen, LIGHT_BLUE, (fx, fy, fw, fh))
         pygame.draw.rect(self.screen, DARK_BLUE, (fx+2, fy+2, fw-4, fh-4))
         pygame.draw.rect(self.screen, WHITE, (fx, fy, fw, fh), 2)
+    
+    def draw_bonus_food(self):
+        bx = self.bonus_food[0] * GRID_SIZE + 2
+        by = self.bonus_food[1] * GRID_SIZE + 2
+        bw = GRID_SIZE - 4
+        bh = GRID_SIZE - 4
+        pulse = abs(math.sin(time.monotonic() * 20)) * 0.3 + 0.7
+        sparkle_size = int(bw * pulse)
+        sx = bx + (bw - sparkle_size) // 2
+        sy = by + (bh - sparkle_size) // 2
+        pygame.draw.rect(self.screen, DARK_BLUE, (sx, sy, sparkle_size, sparkle_size))
+        pygame.draw.rect(self.screen, LIGHT_BLUE, (sx+1, sy+1, sparkle_size-2, sparkle_size-2))
+        pygame.draw.rect(self.screen, WHITE, (sx, sy, sparkle_size, sparkle_size), 2)
         
-        if self.bonus_food and self.bonus_timer > 0:
-            bx = self.bonus_food[0] * GRID_SIZE + 2
-            by = self.bonus_food[1] * GRID_SIZE + 2
-            bw = GRID_SIZE - 4
-            bh = GRID_SIZE - 4
-            pulse = abs(math.sin(pygame.time.get_ticks() * 0.02)) * 0.3 + 0.7
-            sparkle_size = int(bw * pulse)
-            sx = bx + (bw - sparkle_size) // 2
-            sy = by + (bh - sparkle_size) // 2
-            pygame.draw.rect(self.screen, DARK_BLUE, (sx, sy, sparkle_size, sparkle_size))
-            pygame.draw.rect(self.screen, LIGHT_BLUE, (sx+1, sy+1, sparkle_size-2, sparkle_size-2))
-            pygame.draw.rect(self.screen, WHITE, (sx, sy, sparkle_size, sparkle_size), 2)
-            
-            bonus_font = pygame.font.Font(None, 20)
-            bonus_text = bonus_font.render("50", True, WHITE)
-            bonus_rect = bonus_text.get_rect(center=(bx + bw//2, by + bh//2))
-            self.screen.blit(bonus_text, bonus_rect)
+        bonus_text = self.font_bonus.render("50", True, WHITE)
+        bonus_rect = bonus_text.get_rect(center=(bx + bw//2, by + bh//2))
+        self.screen.blit(bonus_text, bonus_rect)
     
-    def draw_ui(self):
+    def draw_status_bar(self):
         bar_height = 60
         pygame.draw.rect(self.screen, GRAY, (0, 0, SCREEN_WIDTH, bar_height))
         pygame.draw.rect(self.screen, WHITE, (0, 0, SCREEN_WIDTH, bar_height), 3)
@@ -230,6 +407,9 @@ class SnakeGame:
         
         speed_text = self.font_small.render(f"SPEED: {int(self.speed)}", True, WHITE)
         self.screen.blit(speed_text, (20, 50))
+    
+    def draw_ui(self):
+        self.draw_status_bar()
         
         status_y = SCREEN_HEIGHT - 50
         if self.paused:
@@ -261,19 +441,97 @@ class SnakeGame:
             self.screen.blit(inst1, (SCREEN_WIDTH//2 - inst1.get_width()//2, SCREEN_HEIGHT//2 + 80))
             self.screen.blit(inst2, (SCREEN_WIDTH//2 - inst2.get_width()//2, SCREEN_HEIGHT//2 + 130))
     
-    def run(self):
-        running = True
-        while running:
-            running = self.handle_input()
-            self.update()
-            self.screen.fill(BLACK)
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * GRID_SIZE, cell[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+    
+    def draw(self):
+        """Draw a frame and return the changed rects, or None if the whole screen changed"""
+        if self.segment_tiles is None:
+            self.prepare_rendering()
+        scene = (self.level, self.game_over, self.paused)
+        if self.full_redraw or scene != self.drawn_scene or self.game_over or self.paused:
             self.draw_background()
             self.draw_food()
             self.draw_snake()
             self.draw_ui()
-            pygame.display.flip()
-            self.clock.tick(int(self.speed))
+            dirty = None
+        else:
+            dirty = self.draw_incremental()
+        
+        self.full_redraw = False
+        self.drawn_scene = scene
+        self.drawn_status = (self.score, self.high_score, self.level, int(self.speed))
+        self.drawn_food = self.food
+        self.drawn_bonus = self.bonus_food
+        self.vacated_cells.clear()
+        self.ticks_since_draw = 0
+        return dirty
+    
+    def draw_incremental(self):
+        # Only cells whose content can have changed since the last frame are
+        # repainted: vacated tail cells, old and new food, and the leading
+        # segments whose shade shifts as the snake moves. Deeper body
+        # segments keep the same tile and are left untouched.
+        contents = dict.fromkeys(self.vacated_cells)
+        for cell in (self.drawn_food, self.drawn_bonus):
+            if cell is not None:
+                contents[cell] = None
+        if self.food is not None:
+            contents[self.food] = "food"
+        if self.bonus_food and self.bonus_timer > 0:
+            contents[self.bonus_food] = "bonus"
+        if self.ticks_since_draw:
+            for i in range(min(len(self.snake), SHADED_SEGMENTS + 1 + self.ticks_since_draw)):
+                contents[self.snake[i]] = i
+        
+        dirty = []
+        status_dirty = (self.score, self.high_score, self.level, int(self.speed)) != self.drawn_status
+        for cell, content in contents.items():
+            rect = self.cell_rect(cell)
+            if rect.colliderect(self.status_rect):
+                status_dirty = True
+                continue
+            self.screen.blit(self.background, rect, rect)
+            self.draw_cell_content(cell, content)
+            dirty.append(rect)
+        
+        if status_dirty:
+            # Status text overlaps the top rows, so the strip is repainted as a whole
+            self.screen.blit(self.background, self.status_rect, self.status_rect)
+            strip_rows = self.status_rect.bottom // GRID_SIZE
+            for i, segment in enumerate(self.snake):
+                if segment[1] < strip_rows:
+                    self.draw_segment(i, segment)
+            if self.food is not None and self.food[1] < strip_rows:
+                self.draw_regular_food()
+            if self.bonus_food and self.bonus_timer > 0 and self.bonus_food[1] < strip_rows:
+                self.draw_bonus_food()
+            self.draw_status_bar()
+            dirty.append(self.status_rect)
+        return dirty
+    
+    def draw_cell_content(self, cell, content):
+        if content == "food":
+            self.draw_regular_food()
+        elif content == "bonus":
+            self.draw_bonus_food()
+        elif content is not None:
+            self.draw_segment(content, cell)
+    
+    def run(self):
+        running = True
+        while running:
+            running = self.handle_input()
+            self.advance(self.clock.get_time())
+            dirty = self.draw()
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+            self.clock.tick(RENDER_FPS)
         
+        self.high_score_store.close()
+        self.run_history.close()
         pygame.quit()
         sys.exit()
 
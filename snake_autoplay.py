@@ -0,0 +1,254 @@
+"""Automatic player for SnakeGame.
+
+Each tick the player picks a direction and hands it to SnakeGame.queue_turn,
+the same entry point the arrow keys use in handle_input. It plans a shortest
+path to the food (or the bonus, when it can be reached in time) with a
+breadth-first search that knows when each body cell will be vacated, and only
+takes that path if the tail is still reachable once the food is eaten.
+Otherwise it falls back to following a Hamiltonian cycle of the board, or any
+move that keeps the tail reachable.
+
+A planned path stays valid while the snake follows it: the body evolves
+exactly as predicted, so it is reused until the head leaves the path, the
+target moves or the snake grows.
+"""
+from collections import deque
+
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# After a failed plan, ticks spent on the fallback before planning again
+RETRY_TICKS = 8
+
+
+def hamiltonian_cycle(width, height):
+    """Successor of every flat cell on a Hamiltonian cycle of the grid.
+
+    Returns None when both sides are odd and no such cycle exists.
+    """
+    order = []
+    if height % 2 == 0:
+        # Serpentine over columns 1.., then back up column 0
+        for y in range(height):
+            xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+            order.extend(y * width + x for x in xs)
+        order.extend(y * width for y in range(height - 1, -1, -1))
+    elif width % 2 == 0:
+        # Same, transposed: serpentine over rows 1.., back along row 0
+        for x in range(width):
+            ys = range(1, height) if x % 2 == 0 else range(height - 1, 0, -1)
+            order.extend(y * width + x for y in ys)
+        order.extend(range(width - 1, -1, -1))
+    else:
+        return None
+    successor = [0] * (width * height)
+    for cell, nxt in zip(order, order[1:] + order[:1]):
+        successor[cell] = nxt
+    return successor
+
+
+class AutoPlayer:
+    def __init__(self, game):
+        self.game = game
+        self.width = game.grid_width
+        self.height = game.grid_height
+        self.neighbours = []
+        for cell in range(self.width * self.height):
+            y, x = divmod(cell, self.width)
+            self.neighbours.append(tuple(
+                ((y + dy) % self.height) * self.width + (x + dx) % self.width
+                for dx, dy in DIRECTIONS
+            ))
+        self.cycle = hamiltonian_cycle(self.width, self.height)
+
+        # Search scratch space, reused between searches. A cell counts as
+        # seen when its stamp matches the current search, so nothing has to
+        # be cleared between searches.
+        size = self.width * self.height
+        self.free_at = [0] * size
+        self.parent = [0] * size
+        self.seen = [0] * size
+        self.stamp = 0
+
+        # Cached plan: cells still to visit, and what it was planned for
+        self.path = deque()
+        self.path_key = None
+        self.expected_head = None
+        self.skipped_bonus = None
+        self.retry_in = 0
+
+        # Counters
+        self.plans = 0
+        self.reused = 0
+        self.fallbacks = 0
+
+    def flat(self, cell):
+        return cell[1] * self.width + cell[0]
+
+    def step(self):
+        direction = self.choose()
+        if direction is not None:
+            self.game.queue_turn(direction)
+
+    def choose(self):
+        game = self.game
+        head = self.flat(game.snake[0])
+        target = self.target()
+        key = (target, len(game.snake))
+
+        if self.path and self.path_key == key and head == self.expected_head:
+            self.reused += 1
+            return self.take(head, self.path.popleft())
+
+        self.path.clear()
+        body = [self.flat(cell) for cell in game.snake]
+
+        if self.retry_in > 0 and self.path_key == key:
+            self.retry_in -= 1
+        elif target is not None:
+            limit = game.bonus_timer - 1 if game.bonus_food and target == self.flat(game.bonus_food) else None
+            path = self.find_path(body, target, limit)
+            if path is None and limit is not None:
+                # Bonus can't be reached in time: go for the regular food instead
+                self.skipped_bonus = game.bonus_food
+                target = self.target()
+                key = (target, len(game.snake))
+                path = self.find_path(body, target) if target is not None else None
+            if path and self.tail_reachable(self.advance(body, path, target)):
+                self.plans += 1
+                self.path = deque(path)
+                self.path_key = key
+                return self.take(head, self.path.popleft())
+            # No safe path for now; don't search again every tick
+            self.path_key = key
+            self.retry_in = RETRY_TICKS
+
+        self.fallbacks += 1
+        return self.fallback(body, target)
+
+    def target(self):
+        game = self.game
+        if game.bonus_food and game.bonus_timer > 1 and game.bonus_food != self.skipped_bonus:
+            return self.flat(game.bonus_food)
+        if game.food is not None:
+            return self.flat(game.food)
+        return None
+
+    def take(self, head, cell):
+        self.expected_head = cell
+        hy, hx = divmod(head, self.width)
+        cy, cx = divmod(cell, self.width)
+        dx = cx - hx
+        dy = cy - hy
+        # Undo wrap-around
+        if dx > 1:
+            dx -= self.width
+        elif dx < -1:
+            dx += self.width
+        if dy > 1:
+            dy -= self.height
+        elif dy < -1:
+            dy += self.height
+        return (dx, dy)
+
+    def search(self, body, goal, limit=None):
+        """BFS from the head; True once goal is reached, leaving self.parent filled in.
+
+        Body cell i (0 = head) blocks the search until step len(body) - i + 1,
+        when the tail has moved off it. Entering the current tail cell on the
+        first move counts as a collision, as in SnakeGame.update.
+        """
+        length = len(body)
+        free_at = self.free_at
+        for i, cell in enumerate(body):
+            free_at[cell] = length - i + 1
+        try:
+            return self.bfs(body[0], goal, limit)
+        finally:
+            for cell in body:
+                free_at[cell] = 0
+
+    def bfs(self, start, goal, limit):
+        self.stamp += 1
+        stamp = self.stamp
+        seen = self.seen
+        parent = self.parent
+        free_at = self.free_at
+        neighbours = self.neighbours
+        seen[start] = stamp
+        frontier = [start]
+        depth = 0
+        while frontier:
+            depth += 1
+            if limit is not None and depth > limit:
+                return False
+            nxt = []
+            for cell in frontier:
+                for n in neighbours[cell]:
+                    if seen[n] == stamp or free_at[n] > depth:
+                        continue
+                    seen[n] = stamp
+                    parent[n] = cell
+                    if n == goal:
+                        return True
+                    nxt.append(n)
+            frontier = nxt
+        return False
+
+    def find_path(self, body, goal, limit=None):
+        if not self.search(body, goal, limit):
+            return None
+        parent = self.parent
+        path = []
+        cell = goal
+        while cell != body[0]:
+            path.append(cell)
+            cell = parent[cell]
+        path.reverse()
+        return path
+
+    def advance(self, body, path, food):
+        """Body after following path, growing by one if it ends on food"""
+        length = len(body) + (1 if path[-1] == food else 0)
+        return (path[::-1] + body)[:length]
+
+    def tail_reachable(self, body):
+        return self.search(body, body[-1])
+
+    def fallback(self, body, target):
+        body_cells = set(body)
+        moves = [n for n in self.neighbours[body[0]] if n not in body_cells]
+        if not moves:
+            return None
+        successor = self.cycle[body[0]] if self.cycle else None
+        if successor in moves:
+            # Try the cycle first so the body tends to settle along it
+            moves.remove(successor)
+            moves.insert(0, successor)
+            if self.tail_reachable(self.advance(body, [successor], target)):
+                return self.take(body[0], successor)
+        safe = [n for n in moves if n != successor
+                and self.tail_reachable(self.advance(body, [n], target))]
+        if safe:
+            move = max(safe, key=lambda n: self.distance(n, target))
+        else:
+            move = moves[0]
+        return self.take(body[0], move)
+
+    def distance(self, a, b):
+        if b is None:
+            return 0
+        ay, ax = divmod(a, self.width)
+        by, bx = divmod(b, self.width)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        return min(dx, self.width - dx) + min(dy, self.height - dy)
+
+
+def play(game, player, max_ticks=None):
+    """Run one game to the end without rendering; returns the number of ticks"""
+    ticks = 0
+    while not game.game_over and (max_ticks is None or ticks < max_ticks):
+        player.step()
+        game.update()
+        ticks += 1
+    return ticks
@@ -0,0 +1,188 @@
+"""Headless, batched snake environment for agent training.
+
+Steps many independent snake boards at once with NumPy. The rules follow
+SnakeGame.update: wrap-around movement, death on hitting the body, +10 food,
++50 bonus food that appears when the score reaches a multiple of 50 and
+expires after 300 ticks, and game over once no free cell is left for food.
+
+Each board stores, per cell, the clock value at which the segment on it
+expires. A cell is occupied while its value is greater than the board's
+clock, so moving the snake is one write for the new head; the tail frees
+itself when the clock advances. Eating skips the clock advance, which grows
+the snake by one.
+"""
+import numpy as np
+
+from snake import GRID_WIDTH, GRID_HEIGHT, FOOD_MARGIN
+
+# Actions, in the same order as the arrow keys in SnakeGame.handle_input
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int64)
+
+# Mirrors SnakeGame.update
+FOOD_POINTS = 10
+BONUS_POINTS = 50
+BONUS_EVERY = 50
+BONUS_TICKS = 300
+
+# Observation cell values
+EMPTY, BODY, HEAD, FOOD, BONUS = 0, 1, 2, 3, 4
+
+# Vectorized rejection-sampling rounds before falling back to an exact scan
+SAMPLE_ROUNDS = 4
+
+
+class VectorSnakeEnv:
+    """N independent snake boards stepped together.
+
+    step() takes one action per board and returns (obs, rewards, dones, info).
+    Finished boards are reset automatically; their final scores are reported
+    in info["final_score"] (-1 for boards that did not finish this step).
+    """
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        if width <= 2 * FOOD_MARGIN or height <= 2 * FOOD_MARGIN:
+            raise ValueError(f"board must be larger than {2 * FOOD_MARGIN} cells each way")
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.index = np.arange(num_envs)
+
+        self.board = np.zeros((num_envs, height, width), dtype=np.int32)
+        self.clock = np.zeros(num_envs, dtype=np.int32)
+        self.length = np.zeros(num_envs, dtype=np.int32)
+        self.head_x = np.zeros(num_envs, dtype=np.int64)
+        self.head_y = np.zeros(num_envs, dtype=np.int64)
+        self.direction = np.zeros((num_envs, 2), dtype=np.int64)
+        self.food = np.full(num_envs, -1, dtype=np.int64)   # flat cell index, -1 = none
+        self.bonus = np.full(num_envs, -1, dtype=np.int64)
+        self.bonus_timer = np.zeros(num_envs, dtype=np.int32)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+
+        # Food may only land inside the margin
+        self.food_area = np.zeros((height, width), dtype=bool)
+        self.food_area[FOOD_MARGIN:height - FOOD_MARGIN, FOOD_MARGIN:width - FOOD_MARGIN] = True
+        self.food_cells = np.flatnonzero(self.food_area)
+
+    def reset(self):
+        self.reset_boards(self.index)
+        return self.observe()
+
+    def reset_boards(self, envs):
+        """Put the boards in envs back to the SnakeGame.reset_game start state"""
+        if len(envs) == 0:
+            return
+        start_x = self.width // 2
+        start_y = self.height // 2
+        self.board[envs] = 0
+        self.clock[envs] = 0
+        self.length[envs] = 3
+        # Tail expires first: values 1, 2, 3 from tail to head
+        for i in range(3):
+            self.board[envs, start_y, start_x - i] = 3 - i
+        self.head_x[envs] = start_x
+        self.head_y[envs] = start_y
+        self.direction[envs] = (1, 0)
+        self.bonus[envs] = -1
+        self.bonus_timer[envs] = 0
+        self.score[envs] = 0
+        self.food[envs] = -1
+        self.food[envs] = self.place(envs)
+
+    def free_mask(self, envs):
+        """Cells of the given boards where food could be placed"""
+        free = self.board[envs] <= self.clock[envs, None, None]
+        free &= self.food_area
+        flat = free.reshape(len(envs), -1)
+        for cells in (self.food[envs], self.bonus[envs]):
+            taken = cells >= 0
+            flat[np.flatnonzero(taken), cells[taken]] = False
+        return flat
+
+    def place(self, envs):
+        """Pick a free food cell on each board in envs; -1 where the board is full"""
+        result = np.full(len(envs), -1, dtype=np.int64)
+        pending = np.arange(len(envs))
+        for _ in range(SAMPLE_ROUNDS):
+            if len(pending) == 0:
+                return result
+            e = envs[pending]
+            cells = self.food_cells[self.rng.integers(len(self.food_cells), size=len(pending))]
+            y, x = np.divmod(cells, self.width)
+            ok = (self.board[e, y, x] <= self.clock[e]) & (cells != self.food[e]) & (cells != self.bonus[e])
+            result[pending[ok]] = cells[ok]
+            pending = pending[~ok]
+
+        # Crowded boards: choose uniformly among the remaining free cells
+        if len(pending):
+            free = self.free_mask(envs[pending])
+            for row, i in zip(free, pending):
+                cells = np.flatnonzero(row)
+                if len(cells):
+                    result[i] = cells[self.rng.integers(len(cells))]
+        return result
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        idx = self.index
+
+        # Reversing onto the body is ignored, as in handle_input
+        new_dir = DIRECTIONS[actions]
+        turn = (new_dir != -self.direction).any(axis=1)
+        self.direction[turn] = new_dir[turn]
+
+        # Bonus food expires before the move
+        ticking = self.bonus_timer > 0
+        self.bonus_timer[ticking] -= 1
+        self.bonus[ticking & (self.bonus_timer == 0)] = -1
+
+        hx = (self.head_x + self.direction[:, 0]) % self.width
+        hy = (self.head_y + self.direction[:, 1]) % self.height
+        cell = hy * self.width + hx
+
+        # Includes the current tail cell, which SnakeGame also treats as a hit
+        dead = self.board[idx, hy, hx] > self.clock
+        alive = ~dead
+        ate_bonus = alive & (cell == self.bonus)
+        ate_food = alive & ~ate_bonus & (cell == self.food)
+        grow = ate_bonus | ate_food
+
+        self.clock += (alive & ~grow)
+        self.length += grow
+        live = np.flatnonzero(alive)
+        self.board[live, hy[live], hx[live]] = self.clock[live] + self.length[live]
+        self.head_x[live] = hx[live]
+        self.head_y[live] = hy[live]
+
+        rewards = BONUS_POINTS * ate_bonus + FOOD_POINTS * ate_food
+        self.score += rewards
+        self.bonus[ate_bonus] = -1
+        self.bonus_timer[ate_bonus] = 0
+
+        fed = np.flatnonzero(ate_food)
+        if len(fed):
+            self.food[fed] = -1
+            self.food[fed] = self.place(fed)
+            full = fed[self.food[fed] < 0]
+            dead[full] = True
+
+            spawn = fed[(self.score[fed] % BONUS_EVERY == 0) & (self.food[fed] >= 0)]
+            if len(spawn):
+                self.bonus[spawn] = -1
+                self.bonus[spawn] = self.place(spawn)
+                self.bonus_timer[spawn] = np.where(self.bonus[spawn] >= 0, BONUS_TICKS, 0)
+
+        final_score = np.where(dead, self.score, -1)
+        self.reset_boards(np.flatnonzero(dead))
+        info = {"final_score": final_score}
+        return self.observe(), rewards, dead, info
+
+    def observe(self):
+        """Boards as int8 (N, height, width) arrays of EMPTY/BODY/HEAD/FOOD/BONUS"""
+        obs = (self.board > self.clock[:, None, None]).view(np.int8)
+        flat = obs.reshape(self.num_envs, -1)
+        flat[self.index, self.head_y * self.width + self.head_x] = HEAD
+        for cells, value in ((self.food, FOOD), (self.bonus, BONUS)):
+            present = np.flatnonzero(cells >= 0)
+            flat[present, cells[present]] = value
+        return obs
@@ -0,0 +1,413 @@
+"""Binary snapshots of a space shooter Game, and a rewind buffer built on them.
+
+snapshot(game) packs everything the simulation depends on: the game's
+counters and timers, the players (with their engine particles), enemies,
+bullets (with their trails), the boss, powerups, particles and the state
+of the global random generator. restore(game, data) rebuilds
+all of those objects from the bytes, so play continues exactly as it would
+have from that frame.
+
+Each entity list is stored as a table: a row count followed by one packed
+array per field, so a snapshot is a handful of array.tobytes() calls rather
+than per-object serialization. Lifetime stats, the menu, the starfield
+(which is purely visual) and audio are not part of the snapshot; the
+run's own kill, boss and powerup counts are, and Game.rewind_time takes
+whatever the rewound frames added back out of the lifetime stats.
+
+view(game, data) is restore for a renderer (shared_frames): the particles,
+bullets and enemies stay in data as Columns, memoryviews cast to each
+field's type, and are drawn from there without building objects.
+
+RewindBuffer keeps the last few seconds of per-frame snapshots. Every
+KEYFRAME_INTERVAL-th frame is stored whole; the frames in between are
+stored as the XOR with the previous frame, which is mostly zero bytes, and
+everything is zlib-compressed. Memory use is bounded by the number of
+frames kept and reported by memory().
+"""
+import random
+import struct
+import zlib
+from array import array
+from collections import deque
+
+MAGIC = b"SSG2"
+HEADER = struct.Struct("<4sd")  # magic, gauss_next (NaN when unset)
+COUNT = struct.Struct("<I")
+
+KEYFRAME_INTERVAL = 30
+
+
+def pack_color(color):
+    return color[0] << 16 | color[1] << 8 | color[2]
+
+
+def unpack_color(value):
+    return (value >> 16 & 255, value >> 8 & 255, value & 255)
+
+
+# Field kinds: array typecode plus how to convert to and from the stored value
+COLOR = ("I", pack_color, unpack_color)
+BOOL = ("B", int, bool)
+
+
+class Columns:
+    """One table of a snapshot as zero-copy memoryviews, one per field"""
+    def __init__(self, count, columns):
+        self.count = count
+        self.columns = columns
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def release(self):
+        for column in self.columns.values():
+            column.release()
+
+
+class Table:
+    """Column layout for a list of objects of one class"""
+    def __init__(self, fields):
+        self.fields = []
+        for name, kind in fields:
+            if isinstance(kind, str):
+                kind = (kind, None, None)
+            self.fields.append((name,) + kind)
+
+    def pack(self, objects, out):
+        out.append(COUNT.pack(len(objects)))
+        for name, code, to_stored, _ in self.fields:
+            values = [getattr(obj, name) for obj in objects]
+            if to_stored is not None:
+                values = [to_stored(v) for v in values]
+            out.append(array(code, values).tobytes())
+
+    def unpack(self, view, offset):
+        """Returns the columns as lists and the offset after the table"""
+        count = COUNT.unpack_from(view, offset)[0]
+        offset += COUNT.size
+        columns = []
+        for name, code, _, from_stored in self.fields:
+            column = array(code)
+            size = column.itemsize * count
+            column.frombytes(view[offset:offset + size])
+            offset += size
+            values = column.tolist()
+            if from_stored is not None:
+                values = [from_stored(v) for v in values]
+            columns.append((name, values))
+        return count, columns, offset
+
+    def columns(self, view, offset):
+        """The table as Columns over view, stored values unconverted, and the offset after it"""
+        count = COUNT.unpack_from(view, offset)[0]
+        offset += COUNT.size
+        columns = {}
+        for name, code, _, _ in self.fields:
+            size = array(code).itemsize * count
+            if offset + size > len(view):
+                raise ValueError("snapshot is truncated")
+            columns[name] = view[offset:offset + size].cast(code)
+            offset += size
+        return Columns(count, columns), offset
+
+    def fill(self, objects, columns):
+        for name, values in columns:
+            for obj, value in zip(objects, values):
+                setattr(obj, name, value)
+
+
+GAME = Table([
+    ("seed", "q"), ("frames", "q"), ("run_kills", "i"), ("run_bosses", "i"),
+    ("run_powerups", "i"), ("score", "q"),
+    ("enemy_spawn_timer", "i"), ("powerup_spawn_timer", "i"), ("difficulty_timer", "i"),
+    ("wave", "i"), ("kills", "i"), ("kills_for_boss", "i"), ("game_over", BOOL),
+    ("victory", BOOL), ("auto_fire", BOOL), ("paused", BOOL), ("difficulty_multiplier", "d"),
+    ("combo", "i"), ("combo_timer", "i"),
+])
+
+PLAYER = Table([
+    ("x", "d"), ("y", "d"), ("health", "i"), ("max_health", "i"), ("base_speed", "d"),
+    ("speed", "d"), ("shoot_cooldown", "i"), ("base_shoot_delay", "i"), ("shoot_delay", "i"),
+    ("rapid_fire_time", "i"), ("shield_time", "i"), ("angle", "d"),
+    ("invulnerable_frames", "i"), ("hit_flash", "i"), ("vx", "d"), ("vy", "d"),
+])
+
+PARTICLES = Table([
+    ("x", "d"), ("y", "d"), ("color", COLOR), ("vx", "d"), ("vy", "d"), ("life", "i"),
+    ("max_life", "i"), ("size", "d"), ("gravity", "d"),
+])
+
+BULLETS = Table([
+    ("x", "d"), ("y", "d"), ("damage", "i"), ("is_enemy", BOOL), ("color", COLOR),
+    ("homing", BOOL), ("speed", "d"), ("vx", "d"), ("vy", "d"), ("radius", "i"),
+])
+
+ENEMY_TYPES = ["normal", "shooter"]
+ENEMIES = Table([
+    ("x", "d"), ("y", "d"), ("type", ("B", ENEMY_TYPES.index, ENEMY_TYPES.__getitem__)),
+    ("health", "i"), ("speed", "d"), ("radius", "i"), ("color", COLOR), ("damage", "i"),
+    ("score_value", "i"), ("max_health", "i"), ("shoot_cooldown", "i"), ("angle", "d"),
+    ("rotation", "d"),
+])
+
+BOSSES = Table([
+    ("x", "d"), ("y", "d"), ("target_y", "d"), ("wave", "i"), ("health", "i"),
+    ("max_health", "i"), ("radius", "i"), ("color", COLOR), ("speed", "d"), ("direction", "i"),
+    ("shoot_cooldown", "i"), ("special_cooldown", "i"), ("phase", "i"), ("entering", BOOL),
+    ("rotation", "d"),
+])
+
+POWERUPS = Table([
+    ("x", "d"), ("y", "d"), ("type", ("B", lambda t: t.value, None)), ("radius", "i"),
+    ("collected", BOOL), ("rotation", "d"), ("pulse", "d"),
+])
+
+
+def snapshot(game):
+    """Pack the game's simulation state into bytes"""
+    _, mt_state, gauss = random.getstate()
+    out = [HEADER.pack(MAGIC, float("nan") if gauss is None else gauss),
+           array("I", mt_state).tobytes()]
+
+    GAME.pack([game], out)
+    players = [game.player] if game.partner is None else [game.player, game.partner]
+    PLAYER.pack(players, out)
+    for player in players:
+        PARTICLES.pack(player.engine_particles, out)
+    PARTICLES.pack(game.particles, out)
+    BULLETS.pack(game.bullets, out)
+    lengths = [len(bullet.trail) for bullet in game.bullets]
+    out.append(array("B", lengths).tobytes())
+    out.append(array("d", [c for bullet in game.bullets for point in bullet.trail for c in point]).tobytes())
+    ENEMIES.pack(game.enemies, out)
+    BOSSES.pack([game.boss] if game.boss else [], out)
+    POWERUPS.pack(game.powerups, out)
+    return b"".join(out)
+
+
+class Reader:
+    """Walks the sections of snapshot() bytes in order"""
+    def __init__(self, data):
+        self.view = data if isinstance(data, memoryview) else memoryview(data)
+        magic, self.gauss = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise ValueError("not a space shooter snapshot")
+        self.offset = HEADER.size
+
+    def array(self, code, count):
+        values = array(code)
+        size = values.itemsize * count
+        values.frombytes(self.view[self.offset:self.offset + size])
+        self.offset += size
+        return values
+
+    def cast(self, code, count):
+        """Like array, but a memoryview over the data"""
+        size = array(code).itemsize * count
+        if self.offset + size > len(self.view):
+            raise ValueError("snapshot is truncated")
+        values = self.view[self.offset:self.offset + size].cast(code)
+        self.offset += size
+        return values
+
+    def objects(self, table, make):
+        count, columns, self.offset = table.unpack(self.view, self.offset)
+        objects = [make() for _ in range(count)]
+        table.fill(objects, columns)
+        return objects
+
+    def columns(self, table):
+        columns, self.offset = table.columns(self.view, self.offset)
+        return columns
+
+    def end(self):
+        if self.offset != len(self.view):
+            raise ValueError("snapshot has trailing data")
+
+
+def restore_players(game, reader, engine_particles):
+    """Players from reader, each with engine_particles(reader) as its engine particles"""
+    # Imported here to avoid a cycle; space_shooter imports this module
+    from space_shooter import GREEN, Player
+
+    players = reader.objects(PLAYER, lambda: Player(0, 0, game.sound_manager))
+    for player in players:
+        player.engine_particles = engine_particles(reader)
+    game.player = players[0]
+    game.partner = None
+    if len(players) > 1:
+        game.partner = players[1]
+        game.partner.color = GREEN
+
+
+def restore_boss_and_powerups(game, reader):
+    from space_shooter import Boss, PowerUp, PowerUpType
+
+    bosses = reader.objects(BOSSES, lambda: Boss(1, game.sound_manager))
+    game.boss = bosses[0] if bosses else None
+    powerups = reader.objects(POWERUPS, lambda: PowerUp(0, 0, PowerUpType.HEALTH))
+    for p in powerups:
+        p.type = PowerUpType(p.type)
+    game.powerups = powerups
+
+
+def restore(game, data):
+    """Rebuild the game's simulation state from snapshot() bytes"""
+    from space_shooter import Bullet, Enemy, Particle
+
+    reader = Reader(data)
+    mt_state = reader.array("I", 625)
+    random.setstate((3, tuple(mt_state), None if reader.gauss != reader.gauss else reader.gauss))
+
+    def particles(reader):
+        return reader.objects(PARTICLES, lambda: Particle.__new__(Particle))
+
+    reader.objects(GAME, lambda: game)
+    restore_players(game, reader, particles)
+    game.particles = particles(reader)
+
+    bullets = reader.objects(BULLETS, lambda: Bullet.__new__(Bullet))
+    lengths = reader.array("B", len(bullets))
+    points = reader.array("d", sum(lengths) * 2)
+    i = 0
+    for bullet, length in zip(bullets, lengths):
+        bullet.trail = [(points[j], points[j + 1]) for j in range(i, i + 2 * length, 2)]
+        i += 2 * length
+    game.bullets = bullets
+
+    game.enemies = reader.objects(ENEMIES, lambda: Enemy.__new__(Enemy))
+    restore_boss_and_powerups(game, reader)
+    reader.end()
+
+
+class Frame:
+    """Column views of one snapshot's particles, bullets and enemies; see view()"""
+    def __init__(self, reader):
+        self.reader = reader
+        self.engine_particles = []   # Columns per player
+        self.particles = None
+        self.bullets = None
+        self.trail_lengths = None    # points per bullet trail
+        self.trail_points = None     # x, y of every trail point, bullet by bullet
+        self.enemies = None
+
+    def release(self):
+        """Drop the views, so the buffer under them can be reused or closed"""
+        for columns in self.engine_particles + [self.particles, self.bullets, self.enemies]:
+            if columns is not None:
+                columns.release()
+        for values in (self.trail_lengths, self.trail_points):
+            if values is not None:
+                values.release()
+        self.reader.view.release()
+
+
+def view(game, data):
+    """Restore the game's counters, players, boss and powerups from snapshot()
+    bytes, and return the particles, bullets and enemies as a Frame of views
+    into data. The players' engine particles are in the Frame too. The
+    random generator is left alone. Call Frame.release() before data is
+    reused or freed.
+    """
+    reader = Reader(data)
+    frame = Frame(reader)
+    try:
+        reader.offset += 625 * array("I").itemsize   # the simulation's random state
+        reader.objects(GAME, lambda: game)
+
+        def particles(reader):
+            frame.engine_particles.append(reader.columns(PARTICLES))
+            return []
+
+        restore_players(game, reader, particles)
+        frame.particles = reader.columns(PARTICLES)
+        frame.bullets = reader.columns(BULLETS)
+        frame.trail_lengths = reader.cast("B", len(frame.bullets))
+        frame.trail_points = reader.cast("d", sum(frame.trail_lengths) * 2)
+        frame.enemies = reader.columns(ENEMIES)
+        restore_boss_and_powerups(game, reader)
+        reader.end()
+    except Exception:
+        frame.release()
+        raise
+    return frame
+
+
+def xor_bytes(a, b):
+    """XOR of two byte strings, the shorter one padded with zeros"""
+    size = max(len(a), len(b))
+    value = int.from_bytes(a, "little") ^ int.from_bytes(b, "little")
+    return value.to_bytes(size, "little")
+
+
+class RewindBuffer:
+    def __init__(self, max_frames, keyframe_interval=KEYFRAME_INTERVAL):
+        self.max_frames = max_frames
+        self.keyframe_interval = keyframe_interval
+        # Groups of [keyframe, delta, delta, ...], oldest first. Each entry
+        # is (length, compressed bytes).
+        self.groups = deque()
+        self.frames = 0
+        self.bytes = 0
+        self.previous = None
+
+    def push(self, data):
+        """Store the snapshot for one frame"""
+        if self.previous is None or len(self.groups[-1]) >= self.keyframe_interval:
+            self.groups.append([])
+            payload = data
+        else:
+            payload = xor_bytes(data, self.previous)
+        entry = (len(data), zlib.compress(payload, 1))
+        self.groups[-1].append(entry)
+        self.frames += 1
+        self.bytes += len(entry[1])
+        self.previous = data
+
+        # Drop whole groups once the rest still covers max_frames
+        while self.frames - len(self.groups[0]) >= self.max_frames:
+            old = self.groups.popleft()
+            self.frames -= len(old)
+            self.bytes -= sum(len(blob) for _, blob in old)
+
+    def get(self, back):
+        """Snapshot from back frames ago (0 = newest)"""
+        if not 0 <= back < min(self.frames, self.max_frames):
+            raise IndexError("frame not in rewind buffer")
+        index = self.frames - 1 - back
+        for group in self.groups:
+            if index < len(group):
+                break
+            index -= len(group)
+        length, blob = group[0]
+        data = zlib.decompress(blob)
+        for length, blob in group[1:index + 1]:
+            data = xor_bytes(data, zlib.decompress(blob))[:length]
+        return data
+
+    def rewind(self, back):
+        """Snapshot from back frames ago; newer frames are discarded"""
+        back = min(back, min(self.frames, self.max_frames) - 1)
+        data = self.get(back)
+        for _ in range(back):
+            group = self.groups[-1]
+            _, blob = group.pop()
+            self.frames -= 1
+            self.bytes -= len(blob)
+            if not group:
+                self.groups.pop()
+        self.previous = data
+        return data
+
+    def clear(self):
+        self.groups.clear()
+        self.frames = 0
+        self.bytes = 0
+        self.previous = None
+
+    def memory(self):
+        """Frames held and compressed bytes used"""
+        return {"frames": min(self.frames, self.max_frames), "bytes": self.bytes}
@@ -1,16 +1,44 @@
 import pygame
+import os
 import random
 import math
 import sys
+import time
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, fields
 
-pygame.init()
-pygame.mixer.init()
+from fonts import get_font, LazyFont
+from latency import InputLatency
+from persistence import FileStore
+from run_history import RunHistory, RunRecord
+from music import MusicStream
+from patterns import default_patterns, fire_ready
+from profiling import ProfileCapture
+from quality import RENDER_SCALES, QualityGovernor
+from snapshot import RewindBuffer, snapshot, restore
+from telemetry import Telemetry
+import sprites
+from sprites import draw_bullets, draw_particles
+
+try:
+    from starfield import StarField
+except ImportError:  # needs numpy
+    StarField = None
+try:
+    import horde
+except ImportError:  # needs numpy
+    horde = None
+from voices import VoiceManager
 
 # Constants
 WIDTH, HEIGHT = 1000, 700
 FPS = 60
+REWIND_SECONDS = 5
+FRAME_BUDGET_MS = 1000 / FPS * 0.85  # work per frame, leaving headroom for the OS
+DRAW_BUDGET_MS = 1000 / FPS * 0.4    # world layer draw (and upscale) with dynamic resolution
+STATS_FILE = "space_shooter_stats.json"
+HORDE_SIZE = 2000
+HORDE_WAVE_KILLS = 150               # horde kills per wave
 
 # Colors
 BLACK = (0, 0, 0)
@@ -35,124 +63,201 @@ class GameStats:
     bosses_defeated: int = 0
     games_played: int = 0
     powerups_collected: int = 0
+    
+    @classmethod
+    def from_dict(cls, data):
+        # Ignore unknown or malformed entries from older/newer stats files
+        if not isinstance(data, dict):
+            return cls()
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names and isinstance(v, int)})
 
 class SoundManager:
     """Manages game sounds with procedural generation"""
-    def __init__(self):
-        self.enabled = True
+    def __init__(self, enabled=True):
+        self.enabled = enabled
         self.volume = 0.3
-        
-    def play_shoot(self):
-        if not self.enabled:
-            return
+        self.mixer_failed = False
+        self.music_failed = False   # effects can still play when the music can't
+        self.sounds = {}
+        self.voices = None
+        self.music = None
+    
+    def mixer_ready(self):
+        # The audio device is only opened once the first sound plays
+        if self.voices is not None:
+            return True
+        if self.mixer_failed:
+            return False
         try:
-            duration = 100
-            frequency = 440
-            sample_rate = 22050
-            n_samples = int(duration * sample_rate / 1000)
-            
-            # Generate shooting sound
-            buf = []
-            for i in range(n_samples):
-                t = float(i) / sample_rate
-                value = int(32767.0 * math.sin(2.0 * math.pi * frequency * t) * (1 - i / n_samples))
-                buf.extend([value & 0xFF, (value >> 8) & 0xFF])
-            
-            sound = pygame.mixer.Sound(bytes(buf))
-            sound.set_volume(self.volume * 0.3)
-            sound.play()
-        except:
-            pass
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            self.voices = VoiceManager()
+            return True
+        except pygame.error:
+            self.mixer_failed = True
+            return False
     
-    def play_explosion(self):
-        if not self.enabled:
+    def play(self, name, make):
+        if not self.enabled or not self.mixer_ready():
             return
-        try:
-            duration = 200
-            sample_rate = 22050
-            n_samples = int(duration * sample_rate / 1000)
-            
-            # Generate explosion sound (white noise)
-            buf = []
-            for i in range(n_samples):
-                value = int(random.randint(-32767, 32767) * (1 - i / n_samples))
-                buf.extend([value & 0xFF, (value >> 8) & 0xFF])
-            
-            sound = pygame.mixer.Sound(bytes(buf))
-            sound.set_volume(self.volume * 0.4)
-            sound.play()
-        except:
-            pass
+        # Each effect is synthesized once, on first use
+        sound = self.sounds.get(name)
+        if sound is None:
+            try:
+                sound = self.sounds[name] = make()
+            except pygame.error:
+                return
+        self.voices.play(name, sound)
     
-    def play_powerup(self):
+    def update_music(self, wave, boss_phase=0):
+        """Hand the music stream its next chunk; starts and stops it with the sound toggle"""
         if not self.enabled:
+            if self.music is not None:
+                self.music.stop()
+                self.music = None
             return
-        try:
-            duration = 150
-            sample_rate = 22050
-            n_samples = int(duration * sample_rate / 1000)
-            
-            # Generate powerup sound (rising tone)
-            buf = []
-            for i in range(n_samples):
-                t = float(i) / sample_rate
-                freq = 440 + (i / n_samples) * 440
-                value = int(32767.0 * math.sin(2.0 * math.pi * freq * t) * (1 - i / n_samples))
-                buf.extend([value & 0xFF, (value >> 8) & 0xFF])
-            
-            sound = pygame.mixer.Sound(bytes(buf))
-            sound.set_volume(self.volume * 0.5)
-            sound.play()
-        except:
-            pass
+        if self.music is None:
+            if self.music_failed or not self.mixer_ready():
+                return
+            # The music gets its own channel after the effect channels
+            index = self.voices.end_channel
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), index + 1))
+            pygame.mixer.set_reserved(index + 1)
+            try:
+                self.music = MusicStream(pygame.mixer.Channel(index))
+            except pygame.error:
+                self.music_failed = True
+                return
+            self.music.start()
+        self.music.set_state(wave, boss_phase)
+        self.music.update()
+    
+    def play_shoot(self):
+        self.play("shoot", self.make_shoot)
+    
+    def play_explosion(self):
+        self.play("explosion", self.make_explosion)
+    
+    def play_powerup(self):
+        self.play("powerup", self.make_powerup)
     
     def play_damage(self):
-        if not self.enabled:
-            return
-        try:
-            duration = 120
-            sample_rate = 22050
-            n_samples = int(duration * sample_rate / 1000)
-            
-            # Generate damage sound (low frequency pulse)
-            buf = []
-            for i in range(n_samples):
-                t = float(i) / sample_rate
-                value = int(32767.0 * math.sin(2.0 * math.pi * 110 * t) * (1 - i / n_samples))
-                buf.extend([value & 0xFF, (value >> 8) & 0xFF])
-            
-            sound = pygame.mixer.Sound(bytes(buf))
-            sound.set_volume(self.volume * 0.6)
-            sound.play()
-        except:
-            pass
+        self.play("damage", self.make_damage)
+    
+    def make_shoot(self):
+        duration = 100
+        frequency = 440
+        sample_rate = 22050
+        n_samples = int(duration * sample_rate / 1000)
+        
+        # Generate shooting sound
+        buf = []
+        for i in range(n_samples):
+            t = float(i) / sample_rate
+            value = int(32767.0 * math.sin(2.0 * math.pi * frequency * t) * (1 - i / n_samples))
+            buf.extend([value & 0xFF, (value >> 8) & 0xFF])
+        
+        sound = pygame.mixer.Sound(bytes(buf))
+        sound.set_volume(self.volume * 0.3)
+        return sound
+    
+    def make_explosion(self):
+        duration = 200
+        sample_rate = 22050
+        n_samples = int(duration * sample_rate / 1000)
+        
+        # Generate explosion sound (white noise)
+        buf = []
+        for i in range(n_samples):
+            value = int(random.randint(-32767, 32767) * (1 - i / n_samples))
+            buf.extend([value & 0xFF, (value >> 8) & 0xFF])
+        
+        sound = pygame.mixer.Sound(bytes(buf))
+        sound.set_volume(self.volume * 0.4)
+        return sound
+    
+    def make_powerup(self):
+        duration = 150
+        sample_rate = 22050
+        n_samples = int(duration * sample_rate / 1000)
+        
+        # Generate powerup sound (rising tone)
+        buf = []
+        for i in range(n_samples):
+            t = float(i) / sample_rate
+            freq = 440 + (i / n_samples) * 440
+            value = int(32767.0 * math.sin(2.0 * math.pi * freq * t) * (1 - i / n_samples))
+            buf.extend([value & 0xFF, (value >> 8) & 0xFF])
+        
+        sound = pygame.mixer.Sound(bytes(buf))
+        sound.set_volume(self.volume * 0.5)
+        return sound
+    
+    def make_damage(self):
+        duration = 120
+        sample_rate = 22050
+        n_samples = int(duration * sample_rate / 1000)
+        
+        # Generate damage sound (low frequency pulse)
+        buf = []
+        for i in range(n_samples):
+            t = float(i) / sample_rate
+            value = int(32767.0 * math.sin(2.0 * math.pi * 110 * t) * (1 - i / n_samples))
+            buf.extend([value & 0xFF, (value >> 8) & 0xFF])
+        
+        sound = pygame.mixer.Sound(bytes(buf))
+        sound.set_volume(self.volume * 0.6)
+        return sound
 
 class PowerUpType(Enum):
     RAPID_FIRE = 1
     SHIELD = 2
     HEALTH = 3
 
+# Stars are purely visual, so they don't draw from the game's random sequence
+star_random = random.Random()
+
 class Star:
     def __init__(self):
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.speed = random.uniform(0.5, 3)
-        self.size = random.randint(1, 3)
-        self.brightness = random.randint(100, 255)
-        self.twinkle = random.uniform(0, math.pi * 2)
+        self.x = star_random.randint(0, WIDTH)
+        self.y = star_random.randint(0, HEIGHT)
+        self.speed = star_random.uniform(0.5, 3)
+        self.size = star_random.randint(1, 3)
+        self.brightness = star_random.randint(100, 255)
+        self.twinkle = star_random.uniform(0, math.pi * 2)
     
     def update(self):
         self.y += self.speed
         if self.y > HEIGHT:
             self.y = 0
-            self.x = random.randint(0, WIDTH)
+            self.x = star_random.randint(0, WIDTH)
         self.twinkle += 0.05
     
-    def draw(self, screen):
+    def draw(self, screen, scale=1.0):
         twinkle_factor = (math.sin(self.twinkle) + 1) / 2
         brightness = int(self.brightness * (0.5 + 0.5 * twinkle_factor))
         color = (brightness, brightness, brightness)
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.size)
+        pygame.draw.circle(screen, color, (int(self.x * scale), int(self.y * scale)),
+                           max(1, int(self.size * scale)))
+
+class StarList:
+    """Starfield of individually drawn Star objects, used when NumPy isn't installed"""
+    def __init__(self, count=150):
+        self.stars = [Star() for _ in range(count)]
+        self.shown = count
+    
+    def set_density(self, share):
+        """Draw only this share of the stars"""
+        self.shown = max(1, int(len(self.stars) * share))
+    
+    def update(self):
+        for star in self.stars:
+            star.update()
+    
+    def draw(self, screen, scale=1.0):
+        for star in self.stars[:self.shown]:
+            star.draw(screen, scale)
 
 class Particle:
     def __init__(self, x, y, color, size=5, velocity=None):
@@ -187,6 +292,8 @@ class Particle:
             pygame.draw.circle(screen, color, (int(self.x), int(self.y)), int(self.size))
 
 class Bullet:
+    trail_length = 8  # lowered by the quality governor
+    
     def __init__(self, x, y, target_x, target_y, speed=12, color=YELLOW, damage=15, is_enemy=False, homing=False):
         self.x = x
         self.y = y
@@ -200,6 +307,23 @@ class Bullet:
         self.vy = math.sin(angle) * speed
         self.radius = 5 if is_enemy else 4
         self.trail = []
+
+    @classmethod
+    def with_velocity(cls, x, y, vx, vy, speed, color, damage, is_enemy=False, homing=False):
+        """Bullet from a ready-made velocity, skipping the aim trig (used for pattern volleys)"""
+        bullet = cls.__new__(cls)
+        bullet.x = x
+        bullet.y = y
+        bullet.damage = damage
+        bullet.is_enemy = is_enemy
+        bullet.color = color
+        bullet.homing = homing
+        bullet.speed = speed
+        bullet.vx = vx
+        bullet.vy = vy
+        bullet.radius = 5 if is_enemy else 4
+        bullet.trail = []
+        return bullet
     
     def update(self, target_x=None, target_y=None):
         if self.homing and target_x and target_y:
@@ -212,8 +336,8 @@ class Bullet:
                 self.vy = (self.vy / speed) * self.speed
         
         self.trail.append((self.x, self.y))
-        if len(self.trail) > 8:
-            self.trail.pop(0)
+        if len(self.trail) > self.trail_length:
+            del self.trail[:-self.trail_length]
         
         self.x += self.vx
         self.y += self.vy
@@ -240,6 +364,8 @@ class Bullet:
                 self.y < -margin or self.y > HEIGHT + margin)
 
 class PowerUp:
+    glow_rings = True  # turned off by the quality governor
+    
     def __init__(self, x, y, power_type=None):
         self.x = x
         self.y = y
@@ -274,11 +400,12 @@ class PowerUp:
         radius = self.radius + pulse_size
         
         # Outer glow rings
-        for i in range(4):
-            glow_radius = radius + (4 - i) * 4
-            alpha = 30 + i * 20
-            glow_color = tuple(min(255, c + alpha) for c in color2[:3])
-            pygame.draw.circle(screen, glow_color, (int(self.x), int(self.y)), int(glow_radius), 2)
+        if self.glow_rings:
+            for i in range(4):
+                glow_radius = radius + (4 - i) * 4
+                alpha = 30 + i * 20
+                glow_color = tuple(min(255, c + alpha) for c in color2[:3])
+                pygame.draw.circle(screen, glow_color, (int(self.x), int(self.y)), int(glow_radius), 2)
         
         # Main circle with gradient effect
         pygame.draw.circle(screen, color1, (int(self.x), int(self.y)), int(radius))
@@ -286,7 +413,7 @@ class PowerUp:
         pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), int(radius), 3)
         
         # Rotating icon
-        font = pygame.font.Font(None, 32)
+        font = get_font(32)
         text = self.icons[self.type]
         text_surf = font.render(text, True, WHITE)
         text_rect = text_surf.get_rect(center=(int(self.x), int(self.y)))
@@ -321,10 +448,12 @@ class Player:
         # Visual effects
         self.engine_particles = []
         self.angle = 0
+        self.vx = 0
+        self.vy = 0
         self.invulnerable_frames = 0
         self.hit_flash = 0
     
-    def update(self, keys):
+    def update(self, keys, aim=None):
         # Movement
         dx, dy = 0, 0
         if keys[pygame.K_w] and self.y > self.radius + 10:
@@ -344,8 +473,8 @@ class Player:
         self.x += dx
         self.y += dy
         
-        # Update angle for aiming
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        # Update angle for aiming; a remote player sends its own aim point
+        mouse_x, mouse_y = aim if aim is not None else pygame.mouse.get_pos()
         self.angle = math.atan2(mouse_y - self.y, mouse_x - self.x)
         
         # Cooldowns
@@ -417,15 +546,18 @@ class Player:
         elif powerup_type == PowerUpType.HEALTH:
             self.health = min(self.max_health, self.health + 40)
     
-    def draw(self, screen):
+    def draw(self, screen, angle=None):
+        # angle overrides self.angle for this draw only (late latch)
+        if angle is None:
+            angle = self.angle
+        
         # Draw engine particles
-        for particle in self.engine_particles:
-            particle.draw(screen)
+        draw_particles(screen, self.engine_particles)
         
         # Draw shield
         if self.shield_time > 0:
             shield_radius = self.radius + 10
-            pulse = abs(math.sin(pygame.time.get_ticks() * 0.008)) * 4
+            pulse = abs(math.sin(time.monotonic() * 8)) * 4
             
             # Shield layers
             for i in range(3):
@@ -443,8 +575,8 @@ class Player:
         
         # Main triangle
         for angle_offset in [0, 2.5, -2.5]:
-            px = self.x + math.cos(self.angle + angle_offset) * self.radius
-            py = self.y + math.sin(self.angle + angle_offset) * self.radius
+            px = self.x + math.cos(angle + angle_offset) * self.radius
+            py = self.y + math.sin(angle + angle_offset) * self.radius
             points.append((px, py))
         
         # Fill with gradient effect
@@ -461,18 +593,18 @@ class Player:
         # Wings
         wing_points_left = [
             (self.x, self.y),
-            (self.x + math.cos(self.angle + 2.2) * self.radius * 0.7,
-             self.y + math.sin(self.angle + 2.2) * self.radius * 0.7),
-            (self.x + math.cos(self.angle + 1.8) * self.radius * 1.2,
-             self.y + math.sin(self.angle + 1.8) * self.radius * 1.2)
+            (self.x + math.cos(angle + 2.2) * self.radius * 0.7,
+             self.y + math.sin(angle + 2.2) * self.radius * 0.7),
+            (self.x + math.cos(angle + 1.8) * self.radius * 1.2,
+             self.y + math.sin(angle + 1.8) * self.radius * 1.2)
         ]
         
         wing_points_right = [
             (self.x, self.y),
-            (self.x + math.cos(self.angle - 2.2) * self.radius * 0.7,
-             self.y + math.sin(self.angle - 2.2) * self.radius * 0.7),
-            (self.x + math.cos(self.angle - 1.8) * self.radius * 1.2,
-             self.y + math.sin(self.angle - 1.8) * self.radius * 1.2)
+            (self.x + math.cos(angle - 2.2) * self.radius * 0.7,
+             self.y + math.sin(angle - 2.2) * self.radius * 0.7),
+            (self.x + math.cos(angle - 1.8) * self.radius * 1.2,
+             self.y + math.sin(angle - 1.8) * self.radius * 1.2)
         ]
         
         pygame.draw.polygon(screen, DARK_BLUE, wing_points_left)
@@ -481,8 +613,8 @@ class Player:
         pygame.draw.polygon(screen, CYAN, wing_points_right, 1)
         
         # Cockpit
-        cockpit_x = self.x + math.cos(self.angle) * (self.radius * 0.3)
-        cockpit_y = self.y + math.sin(self.angle) * (self.radius * 0.3)
+        cockpit_x = self.x + math.cos(angle) * (self.radius * 0.3)
+        cockpit_y = self.y + math.sin(angle) * (self.radius * 0.3)
         pygame.draw.circle(screen, CYAN, (int(cockpit_x), int(cockpit_y)), 5)
         pygame.draw.circle(screen, WHITE, (int(cockpit_x), int(cockpit_y)), 5, 1)
         
@@ -514,7 +646,7 @@ class Player:
         pygame.draw.rect(screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
         
         # Health text
-        font = pygame.font.Font(None, 16)
+        font = get_font(16)
         health_text = font.render(f"{self.health}", True, WHITE)
         text_rect = health_text.get_rect(center=(self.x, bar_y + bar_height // 2))
         screen.blit(health_text, text_rect)
@@ -576,50 +708,55 @@ class Enemy:
         return None
     
     def draw(self, screen):
-        # Draw enemy with rotation
-        if self.type == "shooter":
-            # Hexagon for shooter
-            points = []
-            for i in range(6):
-                angle = (math.pi / 3) * i + (self.rotation * 0.02)
-                px = self.x + math.cos(angle) * self.radius
-                py = self.y + math.sin(angle) * self.radius
-                points.append((px, py))
-            pygame.draw.polygon(screen, self.color, points)
-            pygame.draw.polygon(screen, WHITE, points, 2)
-            
-            # Inner circle
-            pygame.draw.circle(screen, DARK_RED, (int(self.x), int(self.y)), self.radius // 2)
-        else:
-            # Triangle for normal
-            points = []
-            for i in range(3):
-                angle = self.angle + (i * 2 * math.pi / 3) + (self.rotation * 0.01)
-                px = self.x + math.cos(angle) * self.radius
-                py = self.y + math.sin(angle) * self.radius
-                points.append((px, py))
-            pygame.draw.polygon(screen, self.color, points)
-            pygame.draw.polygon(screen, WHITE, points, 2)
-        
-        # Core glow
-        pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), 4)
-        
-        # Health bar
-        bar_width = self.radius * 2.5
-        bar_height = 5
-        bar_x = self.x - bar_width // 2
-        bar_y = self.y - self.radius - 12
-        
-        pygame.draw.rect(screen, (40, 40, 40), (bar_x - 1, bar_y - 1, bar_width + 2, bar_height + 2))
-        pygame.draw.rect(screen, DARK_RED, (bar_x, bar_y, bar_width, bar_height))
+        draw_enemy(screen, self.x, self.y, self.type, self.radius, self.color, self.angle, self.rotation,
+                   self.health, self.max_health)
+
+def draw_enemy(screen, x, y, kind, radius, color, angle, rotation, health, max_health):
+    """Enemy.draw from the fields alone; the --split renderer has no Enemy objects"""
+    # Draw enemy with rotation
+    if kind == "shooter":
+        # Hexagon for shooter
+        points = []
+        for i in range(6):
+            corner = (math.pi / 3) * i + (rotation * 0.02)
+            px = x + math.cos(corner) * radius
+            py = y + math.sin(corner) * radius
+            points.append((px, py))
+        pygame.draw.polygon(screen, color, points)
+        pygame.draw.polygon(screen, WHITE, points, 2)
         
-        health_width = int(bar_width * (self.health / self.max_health))
-        health_color = GREEN if self.health > self.max_health * 0.5 else YELLOW
-        pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, bar_height))
-        pygame.draw.rect(screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 1)
+        # Inner circle
+        pygame.draw.circle(screen, DARK_RED, (int(x), int(y)), radius // 2)
+    else:
+        # Triangle for normal
+        points = []
+        for i in range(3):
+            corner = angle + (i * 2 * math.pi / 3) + (rotation * 0.01)
+            px = x + math.cos(corner) * radius
+            py = y + math.sin(corner) * radius
+            points.append((px, py))
+        pygame.draw.polygon(screen, color, points)
+        pygame.draw.polygon(screen, WHITE, points, 2)
+    
+    # Core glow
+    pygame.draw.circle(screen, YELLOW, (int(x), int(y)), 4)
+    
+    # Health bar
+    bar_width = radius * 2.5
+    bar_height = 5
+    bar_x = x - bar_width // 2
+    bar_y = y - radius - 12
+    
+    pygame.draw.rect(screen, (40, 40, 40), (bar_x - 1, bar_y - 1, bar_width + 2, bar_height + 2))
+    pygame.draw.rect(screen, DARK_RED, (bar_x, bar_y, bar_width, bar_height))
+    
+    health_width = int(bar_width * (health / max_health))
+    health_color = GREEN if health > max_health * 0.5 else YELLOW
+    pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, bar_height))
+    pygame.draw.rect(screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 1)
 
 class Boss:
-    def __init__(self, wave, sound_manager):
+    def __init__(self, wave, sound_manager, patterns=None):
         self.x = WIDTH // 2
         self.y = -120
         self.target_y = 130
@@ -636,6 +773,8 @@ class Boss:
         self.entering = True
         self.rotation = 0
         self.sound_manager = sound_manager
+        # Attacks are data; see patterns.py
+        self.patterns = patterns if patterns is not None else default_patterns
         
     def update(self):
         # Entry animation
@@ -668,75 +807,9 @@ class Boss:
             self.special_cooldown -= 1
     
     def shoot(self, player_x, player_y):
-        bullets = []
-        
         if self.entering:
-            return bullets
-        
-        # Normal attack
-        if self.shoot_cooldown == 0:
-            if self.phase == 1:
-                self.shoot_cooldown = 45
-                # Triple shot
-                for angle_offset in [-0.3, 0, 0.3]:
-                    angle = math.atan2(player_y - self.y, player_x - self.x) + angle_offset
-                    target_x = self.x + math.cos(angle) * 300
-                    target_y = self.y + math.sin(angle) * 300
-                    bullets.append(Bullet(self.x, self.y, target_x, target_y, 
-                                        speed=7, color=ORANGE, damage=22, is_enemy=True))
-            
-            elif self.phase == 2:
-                self.shoot_cooldown = 35
-                # Five shot spread
-                for angle_offset in [-0.5, -0.25, 0, 0.25, 0.5]:
-                    angle = math.atan2(player_y - self.y, player_x - self.x) + angle_offset
-                    target_x = self.x + math.cos(angle) * 300
-                    target_y = self.y + math.sin(angle) * 300
-                    bullets.append(Bullet(self.x, self.y, target_x, target_y,
-                                        speed=8, color=RED, damage=28, is_enemy=True))
-            
-            else:  # phase 3
-                self.shoot_cooldown = 25
-                # Homing missiles
-                for _ in range(3):
-                    bullets.append(Bullet(self.x + random.randint(-20, 20), 
-                                        self.y + random.randint(-20, 20), 
-                                        player_x, player_y,
-                                        speed=5, color=PINK, damage=35, is_enemy=True, homing=True))
-        
-        # Special attacks
-        if self.special_cooldown == 0:
-            if self.phase == 1:
-                self.special_cooldown = 200
-                # Circular burst
-                for i in range(16):
-                    angle = (math.pi * 2 / 16) * i
-                    target_x = self.x + math.cos(angle) * 300
-                    target_y = self.y + math.sin(angle) * 300
-                    bullets.append(Bullet(self.x, self.y, target_x, target_y,
-                                        speed=5, color=YELLOW, damage=20, is_enemy=True))
-            
-            elif self.phase == 2:
-                self.special_cooldown = 160
-                # Spiral pattern
-                for i in range(20):
-                    angle = (math.pi * 2 / 20) * i + (self.rotation * 0.05)
-                    target_x = self.x + math.cos(angle) * 300
-                    target_y = self.y + math.sin(angle) * 300
-                    bullets.append(Bullet(self.x, self.y, target_x, target_y,
-                                        speed=6, color=CYAN, damage=25, is_enemy=True))
-            
-            else:  # phase 3
-                self.special_cooldown = 130
-                # Laser walls
-                for i in range(7):
-                    y_offset = (i - 3) * 60
-                    bullets.append(Bullet(self.x - 30, self.y, self.x - 600, self.y + y_offset,
-                                        speed=10, color=RED, damage=40, is_enemy=True))
-                    bullets.append(Bullet(self.x + 30, self.y, self.x + 600, self.y + y_offset,
-                                        speed=10, color=RED, damage=40, is_enemy=True))
-        
-        return bullets
+            return []
+        return fire_ready(self.patterns, self, Bullet.with_velocity, player_x, player_y)
     
     def draw(self, screen):
         # Outer rotating ring
@@ -820,8 +893,8 @@ class Boss:
         pygame.draw.rect(screen, GOLD, (bar_x + 1, bar_y + 1, bar_width - 2, bar_height - 2), 1)
         
         # Text
-        font_large = pygame.font.Font(None, 32)
-        font_small = pygame.font.Font(None, 20)
+        font_large = get_font(32)
+        font_small = get_font(20)
         
         boss_text = font_large.render(f"BOSS - PHASE {self.phase}", True, GOLD)
         health_text = font_small.render(f"{self.health} / {self.max_health}", True, WHITE)
@@ -838,28 +911,100 @@ class Boss:
         screen.blit(health_text, health_rect)
 
 class Game:
-    def __init__(self):
+    # Fonts, loaded on first use
+    font_large = LazyFont(80)
+    font_medium = LazyFont(56)
+    font_small = LazyFont(36)
+    font_tiny = LazyFont(28)
+    font_mini = LazyFont(20)
+    
+    def __init__(self, headless=False, dynamic_resolution=False, telemetry=None, late_latch=False, horde_size=0):
+        # Only the display is brought up here; fonts and audio start on first use.
+        # Headless runs draw into an invisible window and stay silent.
+        # With dynamic_resolution the world layer is drawn at a resolution that
+        # follows its draw time and upscaled; ships and the HUD stay native.
+        # telemetry is a path to log per-frame counters to from run().
+        # late_latch reads the mouse again right before shots are spawned and
+        # before the player and reticle are drawn (latency.py).
+        # horde_size replaces the waves and bosses with a horde of that many
+        # enemies streaming round the arena's obstacles (horde.py).
+        if horde_size and horde is None:
+            raise RuntimeError("Horde mode needs NumPy (pip install numpy)")
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pygame.display.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Space Shooter - Complete Edition")
         self.clock = pygame.time.Clock()
         
-        # Fonts
-        self.font_large = pygame.font.Font(None, 80)
-        self.font_medium = pygame.font.Font(None, 56)
-        self.font_small = pygame.font.Font(None, 36)
-        self.font_tiny = pygame.font.Font(None, 28)
-        self.font_mini = pygame.font.Font(None, 20)
-        
-        self.sound_manager = SoundManager()
-        self.stats = GameStats()
-        self.stars = [Star() for _ in range(150)]
+        self.sound_manager = SoundManager(enabled=not headless)
+        self.stats_store = FileStore(STATS_FILE, {})
+        self.stats = GameStats.from_dict(self.stats_store.value)
+        self.run_history = RunHistory()
+        self.leaderboard = []
+        self.leaderboard_version = None
+        self.star_field = None
+        self.rewind = RewindBuffer(REWIND_SECONDS * FPS)
+        # Frame-time governor; only fed by run(), so headless games stay at full quality
+        self.quality = QualityGovernor(FRAME_BUDGET_MS, apply=self.apply_quality)
+        self.particle_scale = 1.0
+        self.render_scale = 1.0
+        self.world_surface = None
+        self.resolution = (QualityGovernor(DRAW_BUDGET_MS, RENDER_SCALES, apply=self.set_render_scale,
+                                           label="Render scale")
+                           if dynamic_resolution else None)
+        # Co-op: the second player and its latest input (keys, aim point, firing)
+        self.partner = None
+        self.partner_input = (dict.fromkeys((pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d), False),
+                              (WIDTH // 2, 0), False)
+        # Local keys and aim point when they come from another process (shared_frames.py);
+        # None reads them from pygame
+        self.local_input = None
+        # Aim point from MOUSEMOTION events, and how long each one takes to reach the screen
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.late_latch = late_latch
+        self.input_latency = InputLatency()
+        self.report_latency = False
+        self.cursor_visible = True
+        # Per-frame counters for telemetry
+        self.collision_tests = 0
+        self.draw_calls = 0
+        self.telemetry = Telemetry(telemetry) if telemetry else None
+        # F9 profiles the next few seconds of run()
+        self.profiler = ProfileCapture()
+        self.horde_size = horde_size
         self.show_menu = True
         self.reset_game()
     
-    def reset_game(self):
+    @property
+    def stars(self):
+        if self.star_field is None:
+            self.star_field = StarField(WIDTH, HEIGHT) if StarField else StarList()
+            self.star_field.set_density(self.quality.level.stars)
+        return self.star_field
+    
+    def apply_quality(self, level):
+        self.particle_scale = level.particles
+        Bullet.trail_length = level.trail
+        PowerUp.glow_rings = level.glow_rings
+        sprites.set_glow(level.glow)
+        if self.star_field is not None:
+            self.star_field.set_density(level.stars)
+    
+    def reset_game(self, seed=None):
+        # Each run gets its own seed so it can be recorded and replayed
+        self.seed = seed if seed is not None else random.randrange(1 << 31)
+        random.seed(self.seed)
+        self.frames = 0
+        self.run_kills = 0
+        self.run_bosses = 0
+        self.run_powerups = 0
         self.player = Player(WIDTH // 2, HEIGHT - 100, self.sound_manager)
+        if self.partner is not None:
+            self.add_partner()
         self.bullets = []
         self.enemies = []
+        self.horde = horde.Horde(self.horde_size, self.seed, WIDTH, HEIGHT) if self.horde_size else None
         self.boss = None
         self.powerups = []
         self.particles = []
@@ -877,7 +1022,31 @@ class Game:
         self.difficulty_multiplier = 1.0
         self.combo = 0
         self.combo_timer = 0
+        self.rewind.clear()
+    
+    def start_run(self):
+        """A player starts a run from the menu or the game-over screen"""
+        self.reset_game()
         self.stats.games_played += 1
+        self.save_stats()
+    
+    def save_stats(self):
+        self.stats_store.save(asdict(self.stats))
+    
+    def add_partner(self):
+        self.partner = Player(WIDTH // 2 + 80, HEIGHT - 100, self.sound_manager)
+        self.partner.color = GREEN
+    
+    @property
+    def players(self):
+        """Players still alive"""
+        return [p for p in (self.player, self.partner) if p is not None and p.health > 0]
+    
+    def nearest_player(self, x, y):
+        players = self.players
+        if len(players) < 2:
+            return players[0] if players else self.player
+        return min(players, key=lambda p: (p.x - x) ** 2 + (p.y - y) ** 2)
     
     def spawn_enemy(self):
         spawn_side = random.choice(['top', 'left', 'right', 'top'])
@@ -903,7 +1072,118 @@ class Game:
     def spawn_powerup(self, x, y):
         self.powerups.append(PowerUp(x, y))
     
+    def set_render_scale(self, level):
+        self.render_scale = level.scale
+        if level.scale < 1:
+            size = (int(WIDTH * level.scale), int(HEIGHT * level.scale))
+            self.world_surface = pygame.Surface(size).convert(self.screen)
+        else:
+            self.world_surface = None
+    
+    def check_bullet_hits(self):
+        """Bullets against players, enemies and the boss; returns the number of distance tests"""
+        tests = 0
+        for bullet in self.bullets[:]:
+            if bullet.is_enemy:
+                for player in self.players:
+                    tests += 1
+                    dist = math.hypot(bullet.x - player.x, bullet.y - player.y)
+                    if dist < player.radius + bullet.radius:
+                        if player.take_damage(bullet.damage):
+                            self.create_explosion(bullet.x, bullet.y, YELLOW, 12, 3)
+                        if bullet in self.bullets:
+                            self.bullets.remove(bullet)
+                        break
+            else:
+                hit = False
+                for enemy in self.enemies[:]:
+                    tests += 1
+                    dist = math.hypot(bullet.x - enemy.x, bullet.y - enemy.y)
+                    if dist < enemy.radius + bullet.radius:
+                        enemy.health -= bullet.damage
+                        self.create_explosion(bullet.x, bullet.y, YELLOW, 10, 2)
+                        
+                        if enemy.health <= 0:
+                            self.sound_manager.play_explosion()
+                            self.create_explosion(enemy.x, enemy.y, enemy.color, 35, 6)
+                            
+                            self.combo += 1
+                            self.combo_timer = 120
+                            combo_multiplier = 1 + (self.combo * 0.1)
+                            
+                            score_gain = int(enemy.score_value * self.difficulty_multiplier * combo_multiplier)
+                            self.score += score_gain
+                            self.kills += 1
+                            self.run_kills += 1
+                            self.stats.total_kills += 1
+                            
+                            drop_chance = 0.3 if self.combo > 5 else 0.2
+                            if random.random() < drop_chance:
+                                self.spawn_powerup(enemy.x, enemy.y)
+                            
+                            self.enemies.remove(enemy)
+                        
+                        hit = True
+                        break
+                
+                if not hit and self.boss:
+                    tests += 1
+                    dist = math.hypot(bullet.x - self.boss.x, bullet.y - self.boss.y)
+                    if dist < self.boss.radius + bullet.radius:
+                        self.boss.health -= bullet.damage
+                        self.create_explosion(bullet.x, bullet.y, ORANGE, 12, 3)
+                        
+                        if self.boss.health <= 0:
+                            self.sound_manager.play_explosion()
+                            self.create_explosion(self.boss.x, self.boss.y, ORANGE, 100, 10)
+                            
+                            bonus = int(300 * self.difficulty_multiplier)
+                            self.score += bonus
+                            self.stats.bosses_defeated += 1
+                            self.run_bosses += 1
+                            self.save_stats()
+                            
+                            for _ in range(4):
+                                offset_x = random.randint(-60, 60)
+                                offset_y = random.randint(-60, 60)
+                                self.spawn_powerup(self.boss.x + offset_x, self.boss.y + offset_y)
+                            
+                            self.boss = None
+                            self.wave += 1
+                            self.kills = 0
+                        
+                        hit = True
+                
+                if hit and bullet in self.bullets:
+                    self.bullets.remove(bullet)
+        return tests
+    
+    def draw_world(self):
+        """Background, stars, particles and bullets: the fill-heavy part of a frame"""
+        start = time.perf_counter()
+        world = self.world_surface or self.screen
+        scale = self.render_scale
+        world.fill(DARK_BLUE)
+        self.stars.draw(world, scale)
+        self.draw_calls = 1  # background
+        if not self.show_menu:
+            self.draw_calls += self.draw_sprites(world, scale)
+        if world is not self.screen:
+            pygame.transform.scale(world, (WIDTH, HEIGHT), self.screen)
+        if self.resolution:
+            self.resolution.frame((time.perf_counter() - start) * 1000)
+    
+    def draw_sprites(self, world, scale):
+        """Particles and bullets; returns the number of blits"""
+        return draw_particles(world, self.particles, scale) + draw_bullets(world, self.bullets, scale)
+    
+    def draw_enemies(self):
+        for enemy in self.enemies:
+            enemy.draw(self.screen)
+    
     def create_explosion(self, x, y, color, count=30, size=5):
+        if self.particle_scale < 1:
+            count = max(1, int(count * self.particle_scale))
         for _ in range(count):
             self.particles.append(Particle(x, y, color, size))
     
@@ -912,13 +1192,17 @@ class Game:
             if event.type == pygame.QUIT:
                 return False
             
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = event.pos
+                self.input_latency.event(event)
+            
             if event.type == pygame.KEYDOWN:
                 if self.show_menu and event.key == pygame.K_SPACE:
                     self.show_menu = False
-                    self.reset_game()
+                    self.start_run()
                 elif event.key == pygame.K_SPACE and self.game_over:
                     self.game_over = False
-                    self.reset_game()
+                    self.start_run()
                 elif event.key == pygame.K_ESCAPE:
                     if self.game_over:
                         self.show_menu = True
@@ -930,30 +1214,58 @@ class Game:
                     self.auto_fire = not self.auto_fire
                 elif event.key == pygame.K_m:
                     self.sound_manager.enabled = not self.sound_manager.enabled
+                elif event.key == pygame.K_BACKSPACE and not self.game_over and not self.show_menu:
+                    self.rewind_time(1)
+                elif event.key == pygame.K_F9:
+                    self.profiler.start()
             
             if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over and not self.auto_fire and not self.paused and not self.show_menu:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                bullets = self.player.shoot(mouse_x, mouse_y)
+                bullets = self.player.shoot(*event.pos)
                 self.bullets.extend(bullets)
         
         return True
     
+    def latch_mouse(self):
+        """Take the motion events that arrived since handle_events; returns the aim point"""
+        for event in pygame.event.get(pygame.MOUSEMOTION):
+            self.mouse_pos = event.pos
+            self.input_latency.event(event)
+        return self.mouse_pos
+    
     def update(self):
+        self.sound_manager.update_music(0 if self.show_menu else self.wave,
+                                        self.boss.phase if self.boss else 0)
+        self.collision_tests = tests = 0
+        
         if self.game_over or self.paused or self.show_menu:
-            for star in self.stars:
-                star.update()
+            self.stars.update()
             return
         
-        for star in self.stars:
-            star.update()
+        self.frames += 1
         
-        if self.auto_fire:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            bullets = self.player.shoot(mouse_x, mouse_y)
-            self.bullets.extend(bullets)
+        self.stars.update()
         
-        keys = pygame.key.get_pressed()
-        self.player.update(keys)
+        if self.player.health > 0:
+            keys, aim = self.local_input or (pygame.key.get_pressed(), self.mouse_pos)
+            if self.late_latch and self.local_input is None:
+                aim = self.latch_mouse()
+            if self.auto_fire:
+                bullets = self.player.shoot(*aim)
+                self.bullets.extend(bullets)
+            
+            x, y = self.player.x, self.player.y
+            self.player.update(keys, aim)
+            if self.horde:
+                self.slide_along_walls(self.player, x, y)
+        
+        if self.partner is not None and self.partner.health > 0:
+            partner_keys, aim, firing = self.partner_input
+            if firing:
+                self.bullets.extend(self.partner.shoot(*aim))
+            x, y = self.partner.x, self.partner.y
+            self.partner.update(partner_keys, aim)
+            if self.horde:
+                self.slide_along_walls(self.partner, x, y)
         
         if self.combo_timer > 0:
             self.combo_timer -= 1
@@ -965,7 +1277,8 @@ class Game:
                 closest = min(self.enemies, key=lambda e: math.hypot(e.x - bullet.x, e.y - bullet.y))
                 bullet.update(closest.x, closest.y)
             elif bullet.homing and bullet.is_enemy:
-                bullet.update(self.player.x, self.player.y)
+                target = self.nearest_player(bullet.x, bullet.y)
+                bullet.update(target.x, target.y)
             else:
                 bullet.update()
             
@@ -978,16 +1291,23 @@ class Game:
             self.difficulty_timer = 0
         
         for enemy in self.enemies[:]:
-            enemy.update(self.player.x, self.player.y)
+            target = self.nearest_player(enemy.x, enemy.y)
+            enemy.update(target.x, target.y)
             
-            bullet = enemy.shoot(self.player.x, self.player.y)
+            bullet = enemy.shoot(target.x, target.y)
             if bullet:
                 self.bullets.append(bullet)
             
-            dist = math.hypot(enemy.x - self.player.x, enemy.y - self.player.y)
-            if dist < enemy.radius + self.player.radius:
-                if self.player.take_damage(enemy.damage):
-                    self.create_explosion(enemy.x, enemy.y, enemy.color, 25, 5)
+            rammed = False
+            for player in self.players:
+                tests += 1
+                dist = math.hypot(enemy.x - player.x, enemy.y - player.y)
+                if dist < enemy.radius + player.radius:
+                    if player.take_damage(enemy.damage):
+                        self.create_explosion(enemy.x, enemy.y, enemy.color, 25, 5)
+                    rammed = True
+                    break
+            if rammed:
                 self.enemies.remove(enemy)
                 continue
             
@@ -996,96 +1316,42 @@ class Game:
         
         if self.boss:
             self.boss.update()
-            boss_bullets = self.boss.shoot(self.player.x, self.player.y)
+            target = self.nearest_player(self.boss.x, self.boss.y)
+            boss_bullets = self.boss.shoot(target.x, target.y)
             self.bullets.extend(boss_bullets)
             
-            dist = math.hypot(self.boss.x - self.player.x, self.boss.y - self.player.y)
-            if dist < self.boss.radius + self.player.radius:
-                self.player.take_damage(35)
+            for player in self.players:
+                tests += 1
+                dist = math.hypot(self.boss.x - player.x, self.boss.y - player.y)
+                if dist < self.boss.radius + player.radius:
+                    player.take_damage(35)
         
         for powerup in self.powerups[:]:
             powerup.update()
-            dist = math.hypot(powerup.x - self.player.x, powerup.y - self.player.y)
-            if dist < powerup.radius + self.player.radius:
-                self.player.apply_powerup(powerup.type)
-                self.create_explosion(powerup.x, powerup.y, powerup.colors[powerup.type][0], 20, 4)
-                self.stats.powerups_collected += 1
-                self.powerups.remove(powerup)
-            elif powerup.y > HEIGHT + 100:
-                self.powerups.remove(powerup)
+            for player in self.players:
+                tests += 1
+                dist = math.hypot(powerup.x - player.x, powerup.y - player.y)
+                if dist < powerup.radius + player.radius:
+                    player.apply_powerup(powerup.type)
+                    self.create_explosion(powerup.x, powerup.y, powerup.colors[powerup.type][0], 20, 4)
+                    self.run_powerups += 1
+                    self.stats.powerups_collected += 1
+                    self.powerups.remove(powerup)
+                    break
+            else:
+                if powerup.y > HEIGHT + 100:
+                    self.powerups.remove(powerup)
         
         for particle in self.particles[:]:
             particle.update()
             if particle.life <= 0:
                 self.particles.remove(particle)
         
-        for bullet in self.bullets[:]:
-            if bullet.is_enemy:
-                dist = math.hypot(bullet.x - self.player.x, bullet.y - self.player.y)
-                if dist < self.player.radius + bullet.radius:
-                    if self.player.take_damage(bullet.damage):
-                        self.create_explosion(bullet.x, bullet.y, YELLOW, 12, 3)
-                    if bullet in self.bullets:
-                        self.bullets.remove(bullet)
-            else:
-                hit = False
-                for enemy in self.enemies[:]:
-                    dist = math.hypot(bullet.x - enemy.x, bullet.y - enemy.y)
-                    if dist < enemy.radius + bullet.radius:
-                        enemy.health -= bullet.damage
-                        self.create_explosion(bullet.x, bullet.y, YELLOW, 10, 2)
-                        
-                        if enemy.health <= 0:
-                            self.sound_manager.play_explosion()
-                            self.create_explosion(enemy.x, enemy.y, enemy.color, 35, 6)
-                            
-                            self.combo += 1
-                            self.combo_timer = 120
-                            combo_multiplier = 1 + (self.combo * 0.1)
-                            
-                            score_gain = int(enemy.score_value * self.difficulty_multiplier * combo_multiplier)
-                            self.score += score_gain
-                            self.kills += 1
-                            self.stats.total_kills += 1
-                            
-                            drop_chance = 0.3 if self.combo > 5 else 0.2
-                            if random.random() < drop_chance:
-                                self.spawn_powerup(enemy.x, enemy.y)
-                            
-                            self.enemies.remove(enemy)
-                        
-                        hit = True
-                        break
-                
-                if not hit and self.boss:
-                    dist = math.hypot(bullet.x - self.boss.x, bullet.y - self.boss.y)
-                    if dist < self.boss.radius + bullet.radius:
-                        self.boss.health -= bullet.damage
-                        self.create_explosion(bullet.x, bullet.y, ORANGE, 12, 3)
-                        
-                        if self.boss.health <= 0:
-                            self.sound_manager.play_explosion()
-                            self.create_explosion(self.boss.x, self.boss.y, ORANGE, 100, 10)
-                            
-                            bonus = int(300 * self.difficulty_multiplier)
-                            self.score += bonus
-                            self.stats.bosses_defeated += 1
-                            
-                            for _ in range(4):
-                                offset_x = random.randint(-60, 60)
-                                offset_y = random.randint(-60, 60)
-                                self.spawn_powerup(self.boss.x + offset_x, self.boss.y + offset_y)
-                            
-                            self.boss = None
-                            self.wave += 1
-                            self.kills = 0
-                        
-                        hit = True
-                
-                if hit and bullet in self.bullets:
-                    self.bullets.remove(bullet)
+        if self.horde:
+            tests += self.update_horde()
+        self.collision_tests = tests + self.check_bullet_hits()
         
-        if not self.boss:
+        if not self.boss and not self.horde:
             self.enemy_spawn_timer += 1
             spawn_rate = max(15, 45 - int(self.difficulty_multiplier * 8))
             
@@ -1102,15 +1368,83 @@ class Game:
             self.spawn_powerup(x, -50)
             self.powerup_spawn_timer = 0
         
-        if self.kills >= self.kills_for_boss and not self.boss:
+        if self.kills >= self.kills_for_boss and not self.boss and not self.horde:
             self.spawn_boss()
             self.kills = 0
             self.kills_for_boss = min(30, int(self.kills_for_boss * 1.3))
         
-        if self.player.health <= 0:
+        if not self.players:
             self.game_over = True
             if self.score > self.stats.high_score:
                 self.stats.high_score = self.score
+            self.save_stats()
+            self.record_run()
+        
+        # Keep the last few seconds for rewinding; snapshots don't cover the horde
+        if not self.horde:
+            self.rewind.push(snapshot(self))
+    
+    def slide_along_walls(self, player, x, y):
+        """Undo as much of a player's move from (x, y) as needed to keep out of the horde arena's walls"""
+        for new_x, new_y in ((player.x, player.y), (player.x, y), (x, player.y)):
+            if not self.horde.solid(new_x, new_y, player.radius):
+                player.x, player.y = new_x, new_y
+                return
+        player.x, player.y = x, y
+    
+    def update_horde(self):
+        """Move the horde and settle its bullet hits and rams; returns the number of distance tests"""
+        players = self.players
+        self.horde.update(players)
+        shots = [bullet for bullet in self.bullets if not bullet.is_enemy]
+        hits, killed_x, killed_y, tests = self.horde.shoot(shots)
+        spent = {id(shots[i]) for i in hits}
+        # Walls stop every bullet
+        self.bullets = [bullet for bullet in self.bullets
+                        if id(bullet) not in spent and not self.horde.solid(bullet.x, bullet.y, 0)]
+        
+        if len(killed_x):
+            self.sound_manager.play_explosion()
+        for x, y in zip(killed_x.tolist(), killed_y.tolist()):
+            self.create_explosion(x, y, horde.COLOR, 10, 3)
+            self.combo += 1
+            self.combo_timer = 120
+            combo_multiplier = 1 + (self.combo * 0.1)
+            self.score += int(horde.SCORE * self.difficulty_multiplier * combo_multiplier)
+            self.kills += 1
+            self.run_kills += 1
+            self.stats.total_kills += 1
+            if random.random() < 0.02:
+                self.spawn_powerup(x, y)
+        if self.kills >= HORDE_WAVE_KILLS:
+            self.wave += 1
+            self.kills = 0
+            self.horde.speed_scale = 1 + 0.05 * (self.wave - 1)
+        
+        for player in players:
+            tests += self.horde.count
+            touched_x, touched_y = self.horde.touching(player.x, player.y, player.radius)
+            if len(touched_x) and player.take_damage(horde.DAMAGE):
+                self.create_explosion(player.x, player.y, horde.COLOR, 25, 5)
+        return tests
+    
+    def rewind_time(self, seconds):
+        """Go back up to seconds of play, as far as the rewind buffer reaches"""
+        if self.rewind.frames:
+            run = (self.run_kills, self.run_bosses, self.run_powerups)
+            restore(self, self.rewind.rewind(int(seconds * FPS)))
+            # Lifetime stats aren't rewound; take back what the undone frames added,
+            # or a boss could be killed, rewound and killed again for credit
+            stats = self.stats
+            stats.total_kills -= run[0] - self.run_kills
+            stats.bosses_defeated -= run[1] - self.run_bosses
+            stats.powerups_collected -= run[2] - self.run_powerups
+            self.save_stats()
+    
+    def record_run(self):
+        self.run_history.record(RunRecord("space_shooter", self.score, self.wave, self.run_kills,
+                                          self.run_bosses, self.frames / FPS, self.seed))
+        self.run_history.flush_later()
     
     def draw_ui(self):
         panel_height = 140
@@ -1129,7 +1463,10 @@ class Game:
         wave_text = self.font_small.render(f"Wave: {self.wave}", True, CYAN)
         self.screen.blit(wave_text, (15, 80))
         
-        if not self.boss:
+        if self.horde:
+            horde_text = self.font_tiny.render(f"Horde: {self.horde.count}", True, ORANGE)
+            self.screen.blit(horde_text, (15, 115))
+        elif not self.boss:
             kills_text = self.font_tiny.render(f"Boss: {self.kills_for_boss - self.kills} kills", True, ORANGE)
             self.screen.blit(kills_text, (15, 115))
         
@@ -1259,32 +1596,50 @@ class Game:
             high_score_text = self.font_small.render(f"High Score: {self.stats.high_score}", True, GOLD)
             high_score_rect = high_score_text.get_rect(center=(WIDTH // 2, HEIGHT - 50))
             self.screen.blit(high_score_text, high_score_rect)
+        
+        # Only query the run history again when a run has been recorded since
+        if self.leaderboard_version != self.run_history.version:
+            self.leaderboard = self.run_history.top("space_shooter", 5)
+            self.leaderboard_version = self.run_history.version
+        
+        if self.leaderboard:
+            board_title = self.font_small.render("TOP RUNS", True, CYAN)
+            self.screen.blit(board_title, (60, y_start))
+            for i, run in enumerate(self.leaderboard):
+                line = self.font_tiny.render(f"{i + 1}. {run.score}  (wave {run.wave})", True, WHITE)
+                self.screen.blit(line, (60, y_start + 45 + i * 30))
     
     def draw(self):
-        self.screen.fill(DARK_BLUE)
-        
-        for star in self.stars:
-            star.draw(self.screen)
+        self.draw_world()
         
         if self.show_menu:
             self.draw_menu()
         else:
-            for particle in self.particles:
-                particle.draw(self.screen)
-            
-            for bullet in self.bullets:
-                bullet.draw(self.screen)
-            
             for powerup in self.powerups:
                 powerup.draw(self.screen)
             
-            for enemy in self.enemies:
-                enemy.draw(self.screen)
+            if self.horde:
+                self.draw_calls += self.horde.draw(self.screen)
+            
+            self.draw_enemies()
             
             if self.boss:
                 self.boss.draw(self.screen)
             
-            self.player.draw(self.screen)
+            playing = not self.paused and not self.game_over
+            angle = None
+            if playing and self.late_latch and self.local_input is None:
+                # Only drawn at the fresh aim; the simulation keeps its angle
+                x, y = self.latch_mouse()
+                angle = math.atan2(y - self.player.y, x - self.player.x)
+            for player in self.players:
+                player.draw(self.screen, angle if player is self.player else None)
+            if playing:
+                self.input_latency.latch()
+                if self.late_latch:
+                    self.draw_reticle()
+            self.draw_calls += (len(self.powerups) + len(self.enemies) + (self.boss is not None)
+                                + len(self.players))
             
             self.draw_ui()
             
@@ -1333,19 +1688,137 @@ class Game:
                 menu_rect = menu_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 200))
                 self.screen.blit(menu_text, menu_rect)
         
+        if self.show_menu or self.paused or self.game_over:
+            self.input_latency.discard()
+            self.set_cursor_visible(True)
+        elif self.late_latch:
+            self.set_cursor_visible(False)
+        
+        if self.profiler.active:
+            profiling_text = self.font_mini.render("PROFILING", True, RED)
+            self.screen.blit(profiling_text, profiling_text.get_rect(midtop=(WIDTH // 2, 8)))
+        
         pygame.display.flip()
+        self.input_latency.flipped()
+    
+    def draw_reticle(self):
+        x, y = self.mouse_pos
+        pygame.draw.circle(self.screen, CYAN, (x, y), 10, 1)
+        pygame.draw.line(self.screen, CYAN, (x - 15, y), (x - 5, y))
+        pygame.draw.line(self.screen, CYAN, (x + 5, y), (x + 15, y))
+        pygame.draw.line(self.screen, CYAN, (x, y - 15), (x, y - 5))
+        pygame.draw.line(self.screen, CYAN, (x, y + 5), (x, y + 15))
+    
+    def set_cursor_visible(self, visible):
+        # Under late latch the reticle stands in for the system cursor while playing
+        if visible != self.cursor_visible:
+            self.cursor_visible = visible
+            pygame.mouse.set_visible(visible)
     
-    def run(self):
+    def run(self, net=None):
+        """Main loop; net is an optional netplay.CoopHost serving a co-op partner"""
         running = True
         while running:
+            start = time.perf_counter()
             running = self.handle_events()
+            if net:
+                net.poll()
+            update_start = time.perf_counter()
             self.update()
+            update_end = time.perf_counter()
+            if net:
+                net.send()
+            draw_start = time.perf_counter()
             self.draw()
+            end = time.perf_counter()
+            self.quality.frame((end - start) * 1000)
+            if self.telemetry:
+                self.telemetry.frame(self, (end - start) * 1000, (update_end - update_start) * 1000,
+                                     (end - draw_start) * 1000)
             self.clock.tick(FPS)
-        
+            self.profiler.frame()
+        
+        if net:
+            net.close()
+        self.profiler.close()
+        if self.report_latency:
+            print(self.input_latency.report(
+                "Input latency (late latch)" if self.late_latch else "Input latency"))
+        if self.telemetry:
+            self.telemetry.close()
+        self.stats_store.close()
+        self.run_history.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    # python space_shooter.py [--dynamic-resolution] [--late-latch] [--input-latency]
+    #                          [--telemetry [PATH]] [--profile [FRAMES]]
+    #                          [--horde [COUNT] | --split | --host [PORT] | --join HOST[:PORT]]
+    dynamic_resolution = "--dynamic-resolution" in sys.argv
+    if dynamic_resolution:
+        sys.argv.remove("--dynamic-resolution")
+    late_latch = "--late-latch" in sys.argv
+    if late_latch:
+        sys.argv.remove("--late-latch")
+    report_latency = "--input-latency" in sys.argv
+    if report_latency:
+        sys.argv.remove("--input-latency")
+    telemetry_path = None
+    if "--telemetry" in sys.argv:
+        i = sys.argv.index("--telemetry")
+        del sys.argv[i]
+        if i < len(sys.argv) and not sys.argv[i].startswith("--"):
+            telemetry_path = sys.argv.pop(i)
+        else:
+            telemetry_path = time.strftime("telemetry-%Y%m%d-%H%M%S.sst")
+    horde_size = 0
+    if "--horde" in sys.argv:
+        i = sys.argv.index("--horde")
+        del sys.argv[i]
+        horde_size = int(sys.argv.pop(i)) if i < len(sys.argv) and sys.argv[i].isdigit() else HORDE_SIZE
+    # Options the other modes don't take, rather than silently ignore. The horde
+    # lives outside the entity lists that are sent to a partner or renderer.
+    mode = next((flag for flag in ("--profile", "--split", "--host", "--join") if flag in sys.argv), None)
+    for flag, given, modes in (("--dynamic-resolution", dynamic_resolution, ("--profile", "--join")),
+                               ("--late-latch", late_latch, ("--profile", "--split", "--join")),
+                               ("--input-latency", report_latency, ("--profile", "--split", "--join")),
+                               ("--telemetry", telemetry_path, ("--profile", "--split", "--join")),
+                               ("--horde", horde_size, ("--profile", "--split", "--host", "--join"))):
+        if given and mode in modes:
+            print(f"{flag} can't be combined with {mode}")
+            sys.exit(1)
+    if "--profile" in sys.argv:
+        # Profile a whole headless run instead of playing
+        import profiling
+        i = sys.argv.index("--profile") + 1
+        profiling.profile_headless(int(sys.argv[i]) if i < len(sys.argv) and sys.argv[i].isdigit() else 3600)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--split":
+        import shared_frames
+        shared_frames.run_split(dynamic_resolution)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--join":
+        import netplay
+        if len(sys.argv) < 3:
+            print("--join needs the host's address: --join HOST[:PORT]")
+            sys.exit(1)
+        try:
+            address = netplay.parse_address(sys.argv[2])
+        except (ValueError, OSError) as e:
+            print(f"Bad --join address {sys.argv[2]}: {e}")
+            sys.exit(1)
+        netplay.run_client(address)
+    else:
+        port = None
+        if len(sys.argv) > 1 and sys.argv[1] == "--host":
+            import netplay
+            port = netplay.DEFAULT_PORT
+            if len(sys.argv) > 2:
+                if not sys.argv[2].isdigit() or not 0 < int(sys.argv[2]) < 65536:
+                    print(f"--host takes a port number from 1 to 65535, not {sys.argv[2]}")
+                    sys.exit(1)
+                port = int(sys.argv[2])
+        game = Game(dynamic_resolution=dynamic_resolution, telemetry=telemetry_path, late_latch=late_latch,
+                    horde_size=horde_size)
+        game.report_latency = report_latency
+        net = netplay.CoopHost(game, port) if port is not None else None
+        game.run(net)
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""Pre-rendered glow stamps for particles and bullets.
+
+Particles and bullet trails are drawn as soft-glow circles that are
+additively blended, so overlapping sparks brighten instead of covering each
+other. Each stamp is rendered once per radius, colour and fade level (a
+faded colour is quantized to FADE_LEVELS steps) and cached. Bullet bodies
+get their own stamps: the core, its white outline and, for enemy bullets,
+the outer glow ring.
+
+draw_particles and draw_bullets turn a whole list into blit entries and
+draw them with a single Surface.blits call. The stamps for a whole bullet
+trail are cached together, keyed by radius, colour and trail length.
+draw_particle_columns and draw_bullet_columns do the same straight from a
+snapshot's column views (snapshot.view), for the --split renderer.
+"""
+import pygame
+
+from snapshot import unpack_color
+
+FADE_LEVELS = 16
+GLOW = 2          # pixels of soft halo around each glow stamp
+WHITE = (255, 255, 255)
+
+glow_cache = {}
+body_cache = {}
+trail_cache = {}
+
+
+def set_glow(pixels):
+    """Change the halo size (the quality governor shrinks it); drops the glow stamps"""
+    global GLOW
+    if pixels != GLOW:
+        GLOW = pixels
+        glow_cache.clear()
+        trail_cache.clear()
+
+
+def glow_stamp(radius, color, level):
+    """Soft circle of radius in color at fade level, and its top-left offset from the centre"""
+    key = (radius, color, level)
+    stamp = glow_cache.get(key)
+    if stamp is None:
+        fade = level / (FADE_LEVELS - 1)
+        size = 2 * (radius + GLOW) + 1
+        surface = pygame.Surface((size, size))
+        center = (radius + GLOW, radius + GLOW)
+        # Halo rings fading out, then the solid core
+        for i in range(GLOW, 0, -1):
+            halo = fade * 0.35 / i
+            pygame.draw.circle(surface, tuple(int(c * halo) for c in color[:3]), center, radius + i)
+        pygame.draw.circle(surface, tuple(int(c * fade) for c in color[:3]), center, radius)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        stamp = glow_cache[key] = (surface, radius + GLOW)
+    return stamp
+
+
+def body_stamp(radius, color, is_enemy):
+    """Bullet body (core, white outline and enemy glow ring) with black as colorkey"""
+    key = (radius, color, is_enemy)
+    stamp = body_cache.get(key)
+    if stamp is None:
+        offset = radius + 3
+        size = 2 * offset + 1
+        surface = pygame.Surface((size, size))
+        center = (offset, offset)
+        pygame.draw.circle(surface, color, center, radius)
+        pygame.draw.circle(surface, WHITE, center, radius, 1)
+        if is_enemy:
+            pygame.draw.circle(surface, color, center, radius + 2, 1)
+        surface.set_colorkey((0, 0, 0))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        stamp = body_cache[key] = (surface, offset)
+    return stamp
+
+
+def trail_stamps(radius, color, count):
+    """Glow stamp for each point of a trail of count points (None where too small to draw)"""
+    key = (radius, color, count)
+    stamps = trail_cache.get(key)
+    if stamps is None:
+        stamps = []
+        for i in range(count):
+            size = radius * (i + 1) // count
+            stamps.append(glow_stamp(size, color, fade_level((i + 1) / count * 0.7)) if size else None)
+        trail_cache[key] = stamps
+    return stamps
+
+
+def fade_level(factor):
+    return int(factor * (FADE_LEVELS - 1) + 0.5)
+
+
+def draw_particles(screen, particles, scale=1.0):
+    """Draw particles onto screen, which may be a world surface at scale times the window
+    size; returns the number of blits"""
+    blits = []
+    append = blits.append
+    cache = glow_cache
+    add = pygame.BLEND_ADD
+    levels = FADE_LEVELS - 1
+    for particle in particles:
+        if particle.life > 0:
+            level = int(particle.life / particle.max_life * levels + 0.5)
+            key = (int(particle.size * scale), particle.color, level)
+            stamp = cache.get(key) or glow_stamp(*key)
+            offset = stamp[1]
+            append((stamp[0], (int(particle.x * scale) - offset, int(particle.y * scale) - offset),
+                    None, add))
+    screen.blits(blits, doreturn=False)
+    return len(blits)
+
+
+def draw_bullets(screen, bullets, scale=1.0):
+    """Draw bullets and their trails; returns the number of blits"""
+    blits = []
+    append = blits.append
+    add = pygame.BLEND_ADD
+    for bullet in bullets:
+        radius = max(1, int(bullet.radius * scale + 0.5))
+        # Trail first, so the body is drawn over it
+        trail = bullet.trail
+        if trail:
+            for (tx, ty), stamp in zip(trail, trail_stamps(radius, bullet.color, len(trail))):
+                if stamp is not None:
+                    offset = stamp[1]
+                    append((stamp[0], (int(tx * scale) - offset, int(ty * scale) - offset), None, add))
+        surface, offset = body_stamp(radius, bullet.color, bullet.is_enemy)
+        append((surface, (int(bullet.x * scale) - offset, int(bullet.y * scale) - offset)))
+    screen.blits(blits, doreturn=False)
+    return len(blits)
+
+
+def draw_particle_columns(screen, particles, scale=1.0):
+    """draw_particles for a snapshot.Columns of particles"""
+    blits = []
+    append = blits.append
+    cache = glow_cache
+    add = pygame.BLEND_ADD
+    levels = FADE_LEVELS - 1
+    colors = {}
+    for x, y, color, life, max_life, size in zip(particles["x"], particles["y"], particles["color"],
+                                                 particles["life"], particles["max_life"], particles["size"]):
+        if life > 0:
+            rgb = colors.get(color)
+            if rgb is None:
+                rgb = colors[color] = unpack_color(color)
+            key = (int(size * scale), rgb, int(life / max_life * levels + 0.5))
+            stamp = cache.get(key) or glow_stamp(*key)
+            offset = stamp[1]
+            append((stamp[0], (int(x * scale) - offset, int(y * scale) - offset), None, add))
+    screen.blits(blits, doreturn=False)
+    return len(blits)
+
+
+def draw_bullet_columns(screen, bullets, trail_lengths, trail_points, scale=1.0):
+    """draw_bullets for a snapshot.Columns of bullets and their trails"""
+    blits = []
+    append = blits.append
+    add = pygame.BLEND_ADD
+    colors = {}
+    i = 0
+    for x, y, radius, color, is_enemy, length in zip(bullets["x"], bullets["y"], bullets["radius"],
+                                                     bullets["color"], bullets["is_enemy"], trail_lengths):
+        rgb = colors.get(color)
+        if rgb is None:
+            rgb = colors[color] = unpack_color(color)
+        radius = max(1, int(radius * scale + 0.5))
+        # Trail first, so the body is drawn over it
+        if length:
+            for stamp in trail_stamps(radius, rgb, length):
+                if stamp is not None:
+                    offset = stamp[1]
+                    append((stamp[0], (int(trail_points[i] * scale) - offset,
+                                       int(trail_points[i + 1] * scale) - offset), None, add))
+                i += 2
+        surface, offset = body_stamp(radius, rgb, bool(is_enemy))
+        append((surface, (int(x * scale) - offset, int(y * scale) - offset)))
+    screen.blits(blits, doreturn=False)
+    return len(blits)
@@ -0,0 +1,170 @@
+"""Per-frame telemetry log for the shooter.
+
+With `python space_shooter.py --telemetry [PATH]`, Game.run hands every
+frame to a Telemetry, which packs one fixed-size RECORD: entity counts
+(bullets, enemies, particles, powerups), collision tests and draw calls,
+frame / update / draw time, garbage collections and their pause time, wave,
+boss phase and game state.
+
+Records accumulate in memory and every FLUSH_FRAMES frames the batch goes
+to a background writer thread, which appends it to the file. The hand-off
+is a put_nowait on a bounded queue, so the game loop never waits on the
+disk; if the writer falls QUEUE_BATCHES behind, batches are dropped and
+counted rather than stalling the game, and close() reports the count. If
+writing fails, the writer keeps taking batches and throws them away, and
+close() reports the error and how many were lost. The file is
+append-only: a header (MAGIC, record format, start time) followed by
+records, so a crash loses at most the last batch and the file can be read
+while it is being written.
+
+Collision tests count the distance checks Game.update made this frame.
+Draw calls count blit entries plus one per entity drawn with pygame.draw.
+GC events come from gc.callbacks.
+
+read_records(path) yields the records back as Record tuples;
+tools/summarize_telemetry.py turns a log into percentiles per wave and
+boss phase.
+"""
+import atexit
+import gc
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+
+MAGIC = b"SST1"
+# frame, bullets, enemies, particles, powerups, collision tests, draw calls,
+# frame ms, update ms, draw ms, gc collections, gc pause ms, wave, boss phase, state
+RECORD = struct.Struct("<IIIIIIIfffBfHBB")
+HEADER = struct.Struct(f"<4sB{len(RECORD.format)}sd")  # magic, format length, format, start time
+
+FLUSH_FRAMES = 60
+QUEUE_BATCHES = 64
+
+# Game states
+PLAYING, PAUSED, MENU, GAME_OVER = range(4)
+STATE_NAMES = ["playing", "paused", "menu", "game over"]
+
+Record = namedtuple("Record", "frame bullets enemies particles powerups collision_tests draw_calls "
+                              "frame_ms update_ms draw_ms gc_collections gc_ms wave boss_phase state")
+
+
+class Telemetry:
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self.pending = bytearray()
+        self.batches = queue.Queue(maxsize=QUEUE_BATCHES)
+        self.dropped = 0        # batches the writer was too far behind to take
+        self.failed = 0         # batches lost because writing the file failed
+        self.error = None
+        self.written = 0
+        self.closed = False
+
+        # GC activity since the last record
+        self.gc_collections = 0
+        self.gc_seconds = 0.0
+        self.gc_start = None
+        gc.callbacks.append(self.on_gc)
+
+        with open(path, "wb") as f:  # one session per file
+            f.write(HEADER.pack(MAGIC, len(RECORD.format), RECORD.format.encode(), time.time()))
+        self.thread = threading.Thread(target=self.write_loop, name="telemetry", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            self.gc_seconds += time.perf_counter() - self.gc_start
+            self.gc_collections += 1
+            self.gc_start = None
+
+    def frame(self, game, frame_ms, update_ms, draw_ms):
+        """Record one frame of game; only reads from it"""
+        if game.show_menu:
+            state = MENU
+        elif game.game_over:
+            state = GAME_OVER
+        elif game.paused:
+            state = PAUSED
+        else:
+            state = PLAYING
+        self.frames += 1
+        self.pending += RECORD.pack(
+            self.frames, len(game.bullets), len(game.enemies) + (game.horde.count if game.horde else 0),
+            len(game.particles), len(game.powerups),
+            game.collision_tests, game.draw_calls, frame_ms, update_ms, draw_ms,
+            min(self.gc_collections, 255), self.gc_seconds * 1000, min(game.wave, 65535),
+            game.boss.phase if game.boss else 0, state)
+        self.gc_collections = 0
+        self.gc_seconds = 0.0
+        if self.frames % FLUSH_FRAMES == 0:
+            self.flush()
+
+    def flush(self):
+        if self.pending and self.error is not None:
+            self.failed += 1
+            self.pending.clear()
+        elif self.pending:
+            try:
+                self.batches.put_nowait(bytes(self.pending))
+            except queue.Full:
+                self.dropped += 1
+            self.pending.clear()
+
+    def write_loop(self):
+        try:
+            with open(self.path, "ab") as f:
+                while True:
+                    batch = self.batches.get()
+                    if batch is None:
+                        return
+                    try:
+                        f.write(batch)
+                        f.flush()
+                    except OSError:
+                        self.failed += 1
+                        raise
+                    self.written += len(batch) // RECORD.size
+        except OSError as e:
+            self.error = e
+        # Keep taking batches, so neither flush() nor close() finds the queue full
+        while self.batches.get() is not None:
+            self.failed += 1
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        self.flush()
+        if self.thread.is_alive():
+            try:
+                self.batches.put(None, timeout=5)
+            except queue.Full:
+                pass   # the writer is stuck; it's a daemon thread, so don't wait for it
+            self.thread.join(timeout=5)
+        if self.error is not None:
+            print(f"Telemetry: could not write {self.path}: {self.error}; "
+                  f"{self.failed} batches lost")
+        if self.dropped:
+            print(f"Telemetry: {self.dropped} batches dropped, the writer fell behind; "
+                  f"{self.path} is missing those frames")
+
+
+def read_records(path):
+    """Yield the Records of a telemetry log, stopping at a partly written one"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short for a telemetry log header")
+    magic, length, fmt, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or fmt[:length].decode() != RECORD.format:
+        raise ValueError(f"{path} is not a telemetry log of this version")
+    end = len(data) - (len(data) - HEADER.size) % RECORD.size
+    for values in RECORD.iter_unpack(data[HEADER.size:end]):
+        yield Record(*values)
@@ -0,0 +1,97 @@
+"""Compare the per-object particle and bullet draw path with the batched atlas path.
+
+Builds a busy headless scene (explosions plus boss-style bullet rings with
+full trails) and times drawing it with Particle.draw / Bullet.draw, which
+issue one pygame.draw call per circle, against sprites.draw_particles /
+sprites.draw_bullets, which issue one Surface.blits call per pass.
+Usage: python tools/bench_draw.py [particles] [bullets] [frames]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+import sprites  # noqa: E402
+from space_shooter import (HEIGHT, WIDTH, CYAN, ORANGE, PURPLE, RED, YELLOW,  # noqa: E402
+                           Bullet, Particle)
+
+
+def scene(particle_count, bullet_count, rng):
+    particles = []
+    colors = [RED, PURPLE, ORANGE, YELLOW]
+    while len(particles) < particle_count:
+        x, y = rng.uniform(100, WIDTH - 100), rng.uniform(100, HEIGHT - 100)
+        color = rng.choice(colors)
+        size = rng.choice([2, 3, 5, 6, 10])
+        for _ in range(30):
+            p = Particle(x, y, color, size)
+            for _ in range(rng.randrange(60)):
+                p.update()
+            if p.life > 0:
+                particles.append(p)
+    bullets = []
+    for i in range(bullet_count):
+        angle = 2 * math.pi * i / 20
+        x, y = WIDTH / 2, HEIGHT / 3
+        b = Bullet(x, y, x + math.cos(angle), y + math.sin(angle), speed=rng.choice([5, 6, 7]),
+                   color=rng.choice([YELLOW, CYAN, RED, ORANGE]), is_enemy=i % 5 != 0)
+        for _ in range(rng.randrange(8, 40)):
+            b.update()
+        bullets.append(b)
+    return particles[:particle_count], bullets
+
+
+def per_object(screen, particles, bullets):
+    for particle in particles:
+        particle.draw(screen)
+    for bullet in bullets:
+        bullet.draw(screen)
+
+
+def batched(screen, particles, bullets):
+    sprites.draw_particles(screen, particles)
+    sprites.draw_bullets(screen, bullets)
+
+
+def draw_calls(particles, bullets):
+    circles = sum(1 for p in particles if p.life > 0)
+    for b in bullets:
+        circles += len(b.trail) + (3 if b.is_enemy else 2)
+    return circles
+
+
+def time_path(fn, screen, particles, bullets, frames):
+    fn(screen, particles, bullets)  # warm the stamp caches
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.fill((15, 20, 45))
+        fn(screen, particles, bullets)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    particle_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bullet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    frames = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    particles, bullets = scene(particle_count, bullet_count, random.Random(0))
+
+    fill_ms = time_path(lambda *args: None, screen, particles, bullets, frames)
+    old_ms = time_path(per_object, screen, particles, bullets, frames) - fill_ms
+    new_ms = time_path(batched, screen, particles, bullets, frames) - fill_ms
+    print(f"{len(particles)} particles, {len(bullets)} bullets")
+    print(f"per-object draw   {old_ms:7.2f} ms/frame   {draw_calls(particles, bullets):6d} draw calls")
+    print(f"atlas + blits     {new_ms:7.2f} ms/frame   {2:6d} blits calls "
+          f"({len(sprites.glow_cache) + len(sprites.body_cache)} cached stamps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Horde mode update and draw time at several horde sizes.
+
+Plays a seeded horde game per size, headless and unthrottled, with the
+player walking a fixed loop round the arena, auto-firing and kept alive.
+The first 300 frames, while the horde pours in from the edges, are not
+counted. Reports Game.update per frame (all of it, and the horde's part:
+flow field, separation, movement, bullet hits and rams) and Game.draw, as
+median and 99th percentile, against the 16.7 ms of a 60 FPS frame.
+Usage: python tools/bench_horde.py [frames] [size ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from space_shooter import FPS, Game  # noqa: E402
+
+SEED = 3
+SIZES = [500, 1000, 2000, 4000]
+WARMUP_FRAMES = 300
+
+
+def walk(frame):
+    """Movement keys for a loop round the arena"""
+    leg = frame // 90 % 4
+    return {pygame.K_w: leg == 0, pygame.K_d: leg == 1, pygame.K_s: leg == 2, pygame.K_a: leg == 3}
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[round((len(ordered) - 1) * p / 100)]
+
+
+def play(size, frames):
+    """({update, horde, draw}: [ms per counted frame], horde count at the end)"""
+    game = Game(headless=True, horde_size=size)
+    game.reset_game(SEED)
+    game.show_menu = False
+    horde_ms = []
+    update_horde = game.update_horde
+
+    def timed_update_horde():
+        start = time.perf_counter()
+        tests = update_horde()
+        horde_ms.append((time.perf_counter() - start) * 1000)
+        return tests
+
+    game.update_horde = timed_update_horde
+    update_ms, draw_ms = [], []
+    for frame in range(WARMUP_FRAMES + frames):
+        game.auto_fire = True
+        game.player.health = game.player.max_health
+        game.local_input = (walk(frame), (game.player.x, game.player.y - 100))
+        start = time.perf_counter()
+        game.update()
+        middle = time.perf_counter()
+        game.draw()
+        end = time.perf_counter()
+        if frame >= WARMUP_FRAMES:
+            update_ms.append((middle - start) * 1000)
+            draw_ms.append((end - middle) * 1000)
+    count = game.horde.count
+    game.stats_store.close()
+    game.run_history.close()
+    return {"update": update_ms, "horde": horde_ms[WARMUP_FRAMES:], "draw": draw_ms}, count
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    sizes = [int(a) for a in sys.argv[2:]] or SIZES
+    os.chdir(tempfile.mkdtemp())   # stats file and run history
+    print(f"{frames} frames per size after {WARMUP_FRAMES} warm-up frames; a {FPS} FPS frame is "
+          f"{1000 / FPS:.1f} ms\n")
+    print(f"{'size':>6s} {'alive':>6s} {'update p50':>11s} {'p99':>7s} {'horde p50':>10s} {'p99':>7s} "
+          f"{'draw p50':>9s} {'p99':>7s}")
+    for size in sizes:
+        times, count = play(size, frames)
+        row = "".join(f" {statistics.median(times[part]):{width}.2f} {percentile(times[part], 99):7.2f}"
+                      for part, width in (("update", 11), ("horde", 10), ("draw", 9)))
+        print(f"{size:6d} {count:6d}{row}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Mouse-to-display latency of the shooter, normal vs. late latch.
+
+Plays the same seeded game (auto-fire, the player kept alive) through the
+real frame loop, throttled to FPS by Game.clock, once per mode:
+
+  normal      the aim is read once per frame in Game.handle_events;
+  late latch  Game(late_latch=True) reads it again before the player's
+              shots are spawned and before the player and reticle are drawn.
+
+Meanwhile a second thread posts MOUSEMOTION events to random points every
+2-30 ms, each stamped with time.perf_counter() as it is posted. The game's
+InputLatency (latency.py) measures each one up to the flip of the first
+frame that shows it, so the figures include the time an event waits in the
+queue. Late latch only shortens the wait for events that arrive while a
+frame is being updated or drawn; those that arrive while Game.clock sleeps
+are read at the start of the next frame either way. The thread switch
+interval is shortened so the poster runs on time while a frame is busy.
+Usage: python tools/bench_latency.py [seconds]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from space_shooter import FPS, HEIGHT, WIDTH, Game  # noqa: E402
+
+SEED = 5
+
+
+def move_mouse(stop, seed):
+    """Post motion events at random intervals until stop is set"""
+    rng = random.Random(seed)
+    while not stop.is_set():
+        time.sleep(rng.uniform(0.002, 0.030))
+        pos = (rng.randrange(WIDTH), rng.randrange(HEIGHT))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0),
+                                             probe_time=time.perf_counter()))
+
+
+def play(seconds, late_latch):
+    """Returns (the game's InputLatency, mean update + draw ms per frame)"""
+    game = Game(headless=True, late_latch=late_latch)
+    game.reset_game(SEED)
+    game.show_menu = False
+    stop = threading.Event()
+    mover = threading.Thread(target=move_mouse, args=(stop, SEED), daemon=True)
+    mover.start()
+    frames = 0
+    work = 0.0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        game.auto_fire = True
+        game.player.health = game.player.max_health
+        game.handle_events()
+        game.update()
+        game.draw()
+        work += time.perf_counter() - start
+        frames += 1
+        game.clock.tick(FPS)
+    stop.set()
+    mover.join()
+    game.stats_store.close()
+    game.run_history.close()
+    return game.input_latency, work * 1000 / frames
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    os.chdir(tempfile.mkdtemp())   # stats file and run history
+    # Real input arrives whenever it likes; by default the poster thread would
+    # mostly get the GIL while the game sleeps, which hides the difference
+    sys.setswitchinterval(0.0002)
+    print(f"{seconds:.0f} s per mode at {FPS} FPS, motion events every 2-30 ms\n")
+    for label, late_latch in (("normal", False), ("late latch", True)):
+        latency, frame_ms = play(seconds, late_latch)
+        print(latency.report(f"{label:10s}") + f"  (update + draw {frame_ms:.1f} ms/frame)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
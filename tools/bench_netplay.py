@@ -0,0 +1,108 @@
+"""Run a co-op session over loopback with simulated latency and packet loss.
+
+The host runs a headless seeded game (with a boss fight forced halfway) and
+a scripted partner; the client decodes and interpolates the host's state as
+it would for drawing. Time is simulated, one tick per 1/60 s, so the run is
+reproducible and doesn't need real time. Reports packet size, encode and
+decode cost, and how far the client's interpolated enemy positions are from
+the host's at the same tick.
+Usage: python tools/bench_netplay.py [latency_ms] [jitter_ms] [loss_percent] [ticks]
+"""
+import math
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import netplay  # noqa: E402
+from space_shooter import FPS, Game  # noqa: E402
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.05
+    jitter = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.01
+    loss = float(sys.argv[3]) / 100 if len(sys.argv) > 3 else 5.0 / 100
+    ticks = int(sys.argv[4]) if len(sys.argv) > 4 else 3600
+
+    clock = SimClock()
+    os.chdir(tempfile.mkdtemp())
+    host_game = Game(headless=True)
+    host_game.show_menu = False
+    host_game.reset_game(seed=1)
+    client_game = Game(headless=True)
+    client_game.show_menu = False
+
+    host_link = netplay.Link(("127.0.0.1", 0), latency / 2, jitter / 2, loss, seed=1, clock=clock)
+    client_link = netplay.Link(("127.0.0.1", 0), latency / 2, jitter / 2, loss, seed=2, clock=clock)
+    host = netplay.CoopHost(host_game, link=host_link)
+    client = netplay.CoopClient(client_game, host_link.address, link=client_link)
+
+    history = {}
+    errors = []
+    sizes = []
+    for tick in range(ticks):
+        clock.now = tick / FPS
+        if tick == ticks // 2:
+            host_game.kills = host_game.kills_for_boss
+        # Keep everyone alive so the whole run has traffic
+        for player in (host_game.player, host_game.partner):
+            if player is not None:
+                player.health = player.max_health
+
+        # Partner circles the screen and fires at the top
+        keys = {key: False for key, _ in netplay.KEY_BITS}
+        keys[[k for k, _ in netplay.KEY_BITS][(tick // 40) % 4]] = True
+        client.poll()
+        client.send_input(keys, (400, 100), True)
+
+        host.poll()
+        host_game.update()
+        bytes_before = host_link.bytes_sent
+        host.send()
+        if host_link.bytes_sent > bytes_before:
+            sizes.append(host_link.bytes_sent - bytes_before)
+        history[host.tick] = {e.net_id: (e.x, e.y) for e in host_game.enemies if hasattr(e, "net_id")}
+        history.pop(host.tick - 200, None)
+
+        client.present()
+        if client.render_tick is not None and tick > 120:
+            rendered = round(client.render_tick)
+            truth = history.get(rendered)
+            if truth and abs(client.render_tick - rendered) < 0.05:
+                for net_id, (kind, x, y, *_rest) in client.view().items():
+                    if kind == netplay.ENEMY and net_id in truth:
+                        tx, ty = truth[net_id]
+                        errors.append(math.hypot(x - tx, y - ty))
+
+    seconds = ticks / FPS
+    sizes.sort()
+    print(f"latency {latency * 1000:.0f} ms  jitter {jitter * 1000:.0f} ms  loss {loss * 100:.0f}%  "
+          f"{ticks} ticks")
+    print(f"state packets     {host.states_sent} sent, {host_link.dropped} dropped, "
+          f"{host.full_states} full states, {client.undecodable} undecodable")
+    print(f"packet size       median {sizes[len(sizes) // 2]} B, p99 {sizes[int(len(sizes) * 0.99)]} B, "
+          f"max {sizes[-1]} B")
+    print(f"bandwidth         host {host_link.bytes_sent / seconds / 1024:.1f} KiB/s, "
+          f"client {client_link.bytes_sent / seconds / 1024:.1f} KiB/s")
+    print(f"encode            {host.encode_time / max(1, host.states_sent) * 1e6:.0f} us/tick")
+    print(f"decode            {client.decode_time / max(1, client.states_received) * 1e6:.0f} us/packet")
+    if errors:
+        errors.sort()
+        print(f"enemy position error vs host  mean {sum(errors) / len(errors):.2f} px, "
+              f"p99 {errors[int(len(errors) * 0.99)]:.2f} px  ({len(errors)} samples)")
+    host.close()
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
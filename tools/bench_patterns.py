@@ -0,0 +1,52 @@
+"""Compare inline boss volleys with the compiled pattern engine.
+
+The inline path is what Boss.shoot used to do for a spiral: per bullet, work
+out a target point with cos/sin, then construct a Bullet that aims at it
+with atan2/cos/sin. The engine path fires a compiled ring Pattern, which
+rotates a precomputed direction table and builds the bullets from their
+velocities. Times one volley at several sizes.
+Usage: python tools/bench_patterns.py [volleys]
+"""
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from patterns import Pattern  # noqa: E402
+from space_shooter import CYAN, Bullet  # noqa: E402
+
+
+def inline_volley(count, x, y, rotation):
+    bullets = []
+    for i in range(count):
+        angle = (math.pi * 2 / count) * i + (rotation * 0.05)
+        target_x = x + math.cos(angle) * 300
+        target_y = y + math.sin(angle) * 300
+        bullets.append(Bullet(x, y, target_x, target_y, speed=6, color=CYAN, damage=25, is_enemy=True))
+    return bullets
+
+
+def time_volleys(fire, volleys):
+    start = time.perf_counter()
+    for rotation in range(volleys):
+        fire(rotation)
+    return (time.perf_counter() - start) * 1e6 / volleys
+
+
+def main():
+    volleys = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    x, y = 500, 130
+    for count in (20, 100, 500, 2000):
+        pattern = Pattern("spiral", "ring", "special_cooldown", 160, [2], count, 6, CYAN, 25, spin=0.05)
+        runs = max(10, volleys * 20 // count)
+        inline_us = time_volleys(lambda r: inline_volley(count, x, y, r), runs)
+        engine_us = time_volleys(lambda r: pattern.fire(Bullet.with_velocity, x, y, 0, 0, r), runs)
+        print(f"{count:5d} bullets   inline {inline_us:8.1f} us/volley   "
+              f"pattern {engine_us:8.1f} us/volley   {inline_us / engine_us:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
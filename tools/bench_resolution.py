@@ -0,0 +1,54 @@
+"""Time the world layer (background, stars, particles, bullets) at each render scale.
+
+Draws an empty, a busy and a very busy scene with Game.draw_world at full
+resolution and at the reduced scales dynamic resolution can pick, including
+the upscale back to the window, plus the upscale cost on its own.
+Usage: python tools/bench_resolution.py [frames]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from bench_draw import scene  # noqa: E402
+from quality import RENDER_SCALES, RenderScale  # noqa: E402
+from space_shooter import HEIGHT, WIDTH, Game  # noqa: E402
+
+
+def time_ms(fn, frames):
+    fn()
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    os.chdir(tempfile.mkdtemp())
+    game = Game(headless=True)
+    game.show_menu = False
+    scales = RENDER_SCALES + [RenderScale("75%", 0.75)]
+
+    for level in scales[1:]:
+        small = pygame.Surface((int(WIDTH * level.scale), int(HEIGHT * level.scale))).convert(game.screen)
+        ms = time_ms(lambda: pygame.transform.scale(small, (WIDTH, HEIGHT), game.screen), frames * 5)
+        print(f"upscale from {level.name:>4s}      {ms:6.2f} ms")
+
+    for particles, bullets in ((0, 0), (500, 100), (2000, 400)):
+        game.particles, game.bullets = scene(particles, bullets, random.Random(0))
+        row = []
+        for level in scales:
+            game.set_render_scale(level)
+            row.append(f"{level.name:>4s} {time_ms(game.draw_world, frames):6.2f} ms")
+        print(f"{particles:5d} particles {bullets:4d} bullets   " + "   ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Cost and memory of the shooter's rewind buffer over a boss fight.
+
+Plays a seeded, scripted game (auto-fire, the player kept alive, a boss
+forced after BOSS_FRAME frames) headless, with the game's own RewindBuffer
+of REWIND_SECONDS. Per wave and boss phase it reports the snapshot size
+and the time per frame to take it (snapshot.snapshot) and to store it
+(RewindBuffer.push: XOR delta and zlib), then the frames and bytes the
+buffer holds (RewindBuffer.memory()) at the end of the phase. The largest
+the buffer got is printed last.
+Usage: python tools/bench_rewind.py [frames]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from snapshot import RewindBuffer, snapshot  # noqa: E402
+from space_shooter import FPS, REWIND_SECONDS, Game  # noqa: E402
+
+SEED = 7
+BOSS_FRAME = 600
+
+
+class TimedRewindBuffer(RewindBuffer):
+    """RewindBuffer that adds up the time spent in push"""
+    def __init__(self, max_frames):
+        super().__init__(max_frames)
+        self.push_s = 0.0
+
+    def push(self, data):
+        start = time.perf_counter()
+        super().push(data)
+        self.push_s += time.perf_counter() - start
+
+
+def phase(game):
+    return f"boss phase {game.boss.phase}" if game.boss else f"wave {game.wave}"
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    os.chdir(tempfile.mkdtemp())
+    game = Game(headless=True)
+    game.reset_game(SEED)
+    game.show_menu = False
+    game.rewind = buffer = TimedRewindBuffer(REWIND_SECONDS * FPS)
+
+    rows = {}
+    largest = 0
+    for frame in range(frames):
+        game.auto_fire = True
+        game.player.health = game.player.max_health
+        if frame == BOSS_FRAME:
+            game.kills = game.kills_for_boss
+        push_before = buffer.push_s
+        game.update()
+        # update took its snapshot already; take the same one again to time it
+        start = time.perf_counter()
+        size = len(snapshot(game))
+        snapshot_s = time.perf_counter() - start
+        row = rows.setdefault(phase(game), {"frames": 0, "snapshot_s": 0.0, "push_s": 0.0, "bytes": 0})
+        row["frames"] += 1
+        row["snapshot_s"] += snapshot_s
+        row["push_s"] += buffer.push_s - push_before
+        row["bytes"] += size
+        row["memory"] = buffer.memory()
+        largest = max(largest, buffer.bytes)
+
+    print(f"{frames} frames, rewind buffer of {REWIND_SECONDS} s ({REWIND_SECONDS * FPS} frames)")
+    print(f"  {'phase':14s} {'frames':>6s} {'snapshot KiB':>12s} {'snapshot ms':>11s} {'push ms':>8s}   "
+          f"{'buffer frames':>13s} {'buffer KiB':>10s}")
+    for name, row in rows.items():
+        n = row["frames"]
+        memory = row["memory"]
+        print(f"  {name:14s} {n:6d} {row['bytes'] / n / 1024:12.1f} {row['snapshot_s'] * 1000 / n:11.3f} "
+              f"{row['push_s'] * 1000 / n:8.3f}   {memory['frames']:13d} {memory['bytes'] / 1024:10.0f}")
+    print(f"largest the buffer got: {largest / 1024:.0f} KiB")
+    game.stats_store.close()
+    game.run_history.close()
+
+
+if __name__ == "__main__":
+    main()
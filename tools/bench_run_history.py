@@ -0,0 +1,55 @@
+"""Measure run-history insert throughput and leaderboard query latency.
+
+Fills a temporary database with synthetic runs and times the top-N,
+per-wave and per-day queries.
+Usage: python tools/bench_run_history.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from run_history import RunHistory, RunRecord  # noqa: E402
+
+DAY = 24 * 3600
+
+
+def synthetic_runs(count, rng):
+    now = time.time()
+    for i in range(count):
+        wave = rng.randint(1, 12)
+        yield RunRecord("space_shooter", rng.randint(0, 2000 * wave), wave, rng.randint(0, 40 * wave),
+                        wave - 1, rng.uniform(30, 900), i, now - rng.uniform(0, 60 * DAY))
+
+
+def time_query(label, fn, repeats=200):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        rows = fn()
+    ms = (time.perf_counter() - start) * 1000 / repeats
+    print(f"{label:28s} {ms:8.3f} ms   ({len(rows)} rows)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = RunHistory(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        history.record_many(synthetic_runs(count, rng))
+        elapsed = time.perf_counter() - start
+        print(f"inserted {count:,} runs in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s)")
+
+        day = time.strftime("%Y-%m-%d")
+        time_query("top 10", lambda: history.top("space_shooter", 10))
+        time_query("top 10 for wave 7", lambda: history.top_for_wave("space_shooter", 7, 10))
+        time_query("top 10 for today", lambda: history.top_for_day("space_shooter", day, 10))
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
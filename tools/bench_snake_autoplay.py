@@ -0,0 +1,56 @@
+"""Measure how fast the snake autoplayer runs the game logic headless.
+
+Plays games back to back on each board size for a fixed time budget and
+reports games and ticks per second.
+Usage: python tools/bench_snake_autoplay.py [seconds per board]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import snake  # noqa: E402
+from snake_autoplay import AutoPlayer, play  # noqa: E402
+
+BOARDS = ((40, 30), (80, 60), (160, 120))
+CHUNK_TICKS = 500
+
+
+def bench(width, height, seconds):
+    random.seed(0)
+    game = snake.SnakeGame(width, height, headless=True)
+    player = AutoPlayer(game)
+    games = ticks = plans = reused = 0
+    scores = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        ticks += play(game, player, CHUNK_TICKS)
+        if game.game_over:
+            games += 1
+            scores.append(game.score)
+            plans += player.plans
+            reused += player.reused
+            game.reset_game()
+            player = AutoPlayer(game)
+    elapsed = time.perf_counter() - start
+    plans += player.plans
+    reused += player.reused
+    best = max(scores + [game.score])
+    print(f"{width:3d}x{height:<3d}  {games / elapsed:7.3f} games/s  {ticks / elapsed:9,.0f} ticks/s  "
+          f"games {games:3d}  best score {best:6d}  path reuse {reused / max(1, plans + reused):.0%}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    os.chdir(tempfile.mkdtemp())   # high score file and run history
+    for width, height in BOARDS:
+        bench(width, height, seconds)
+
+
+if __name__ == "__main__":
+    main()
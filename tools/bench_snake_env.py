@@ -0,0 +1,41 @@
+"""Measure VectorSnakeEnv throughput in board-steps per second.
+
+Usage: python tools/bench_snake_env.py [steps]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from snake_env import VectorSnakeEnv  # noqa: E402
+
+
+def bench(num_envs, steps):
+    env = VectorSnakeEnv(num_envs, seed=0)
+    env.reset()
+    rng = np.random.default_rng(1)
+    actions = rng.integers(4, size=(steps, num_envs))
+    env.step(actions[0])  # warm-up
+    episodes = 0
+    start = time.perf_counter()
+    for a in actions:
+        _, _, dones, _ = env.step(a)
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    rate = num_envs * steps / elapsed
+    print(f"{num_envs:5d} boards  {rate:12,.0f} board-steps/s   {episodes / elapsed:10,.0f} episodes/s")
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for num_envs in (1, 64, 256, 1024, 4096):
+        bench(num_envs, steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure per-frame render cost of the snake board.
+
+Runs headless (SDL dummy video driver) unless a display driver is already
+selected. Usage: python tools/bench_snake_render.py [frames]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import snake  # noqa: E402
+
+
+def time_per_frame(fn, frames):
+    fn()  # warm-up, also builds any caches
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def bench_background(game, frames):
+    def uncached():
+        game.screen.fill(snake.BLACK)
+        game.render_background(game.screen)
+
+    before = time_per_frame(uncached, frames)
+    after = time_per_frame(game.draw_background, frames)
+    print(f"background  per-frame draw: {before:.3f} ms   cached blit: {after:.3f} ms   "
+          f"saved: {before - after:.3f} ms ({before / after:.1f}x)")
+
+
+def loop_path(left, top, right, bottom):
+    """Clockwise cells around a rectangle, so a snake can follow it forever"""
+    path = [(x, top) for x in range(left, right)]
+    path += [(right, y) for y in range(top, bottom)]
+    path += [(x, bottom) for x in range(right, left, -1)]
+    path += [(left, y) for y in range(bottom, top, -1)]
+    return path
+
+
+def bench_incremental(game, frames, length):
+    path = loop_path(4, 6, 35, 26)
+    length = min(length, len(path) - 1)
+
+    def setup():
+        game.reset_game()
+        game.food = None  # keep the snake length fixed
+        game.snake = path[length - 1::-1]
+        game.snake_cells = set(game.snake)
+
+    def step():
+        head = path.index(game.snake[0])
+        nxt = path[(head + 1) % len(path)]
+        game.direction = (nxt[0] - game.snake[0][0], nxt[1] - game.snake[0][1])
+        game.update()
+
+    def full_frame():
+        step()
+        game.full_redraw = True
+        game.draw()
+
+    def incremental_frame():
+        step()
+        game.draw()
+
+    setup()
+    before = time_per_frame(full_frame, frames)
+    setup()
+    after = time_per_frame(incremental_frame, frames)
+    print(f"snake len {length:3d}  full redraw: {before:.3f} ms   incremental: {after:.3f} ms   "
+          f"({before / after:.1f}x)")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    os.chdir(tempfile.mkdtemp())   # high score file and run history
+    game = snake.SnakeGame(headless=True)
+    bench_background(game, frames)
+    for length in (3, 30, 100):
+        bench_incremental(game, frames, length)
+
+
+if __name__ == "__main__":
+    main()
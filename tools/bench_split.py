@@ -0,0 +1,105 @@
+"""Compare one-process frames with the two-process shared-memory split.
+
+Plays the same seeded, scripted game (auto-fire, the player kept alive, a
+boss forced halfway) for the given number of frames, unthrottled and
+headless:
+
+  single  Game.update then Game.draw in one process;
+  split   shared_frames: the simulation process updates and publishes
+          while this process draws, in lockstep (the simulation runs at
+          most one frame ahead), so the wall time per frame is the
+          combined frame time of the pipeline.
+
+Also reports the time each side spends per frame. The split can only win
+when the two processes get a core each.
+Usage: python tools/bench_split.py [frames]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import shared_frames  # noqa: E402
+from space_shooter import Game  # noqa: E402
+
+SEED = 7
+BOSS_FRAME = 600
+
+
+def script(game):
+    """Scripted play, run before each update in both modes"""
+    game.show_menu = False
+    game.auto_fire = True
+    game.player.health = game.player.max_health
+    if game.frames == BOSS_FRAME:
+        game.kills = game.kills_for_boss
+
+
+def single(frames):
+    game = Game(headless=True)
+    game.reset_game(SEED)
+    update_s = draw_s = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        script(game)
+        game.update()
+        t1 = time.perf_counter()
+        game.draw()
+        update_s += t1 - t0
+        draw_s += time.perf_counter() - t1
+    total = time.perf_counter() - start
+    game.stats_store.close()
+    game.run_history.close()
+    return total, update_s, draw_s
+
+
+def split(frames):
+    sim, conn, process = shared_frames.start_simulation(seed=SEED, sound=False, fps=None,
+                                                        lockstep=True, script=script)
+    game = Game(headless=True)
+    presenter = shared_frames.Presenter(game, sim, conn)
+    tick_ms = 0.0
+    render_s = 0.0
+    start = None
+    for _ in range(frames + 1):
+        presenter.send_input()
+        while True:
+            t0 = time.perf_counter()
+            if presenter.receive():
+                break
+            time.sleep(0.0001)
+        if start is None:
+            start = t0  # timing starts once the first frame is in
+            continue
+        tick_ms += presenter.tick_ms
+        presenter.draw()
+        render_s += time.perf_counter() - t0
+    total = time.perf_counter() - start
+    presenter.close(process)
+    game.stats_store.close()
+    game.run_history.close()
+    return total, tick_ms / 1000, render_s
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    os.chdir(tempfile.mkdtemp())
+    print(f"{frames} frames, {os.cpu_count()} CPU(s)")
+
+    total, update_s, draw_s = single(frames)
+    print(f"single process   {total * 1000 / frames:6.2f} ms/frame   "
+          f"(update {update_s * 1000 / frames:.2f} + draw {draw_s * 1000 / frames:.2f})")
+
+    total, tick_s, render_s = split(frames)
+    print(f"two processes    {total * 1000 / frames:6.2f} ms/frame   "
+          f"(simulation {tick_s * 1000 / frames:.2f} incl. snapshot, "
+          f"render {render_s * 1000 / frames:.2f} incl. mapping the frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compare the per-object starfield with the vectorized StarField.
+
+Times one update plus one draw per frame, headless, for the 150 Star
+objects the game used to draw and for StarField at several star counts.
+Usage: python tools/bench_starfield.py [frames]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from space_shooter import DARK_BLUE, HEIGHT, WIDTH, StarList  # noqa: E402
+from starfield import StarField  # noqa: E402
+
+
+def time_field(field, screen, frames):
+    field.update()
+    field.draw(screen)
+    start = time.perf_counter()
+    for _ in range(frames):
+        field.update()
+        field.draw(screen)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen.fill(DARK_BLUE)
+    print(f"{'Star objects':24s} {150:6d} stars  {time_field(StarList(150), screen, frames):6.3f} ms/frame")
+    for count in (150, 2000, 5000, 20000):
+        ms = time_field(StarField(WIDTH, HEIGHT, count, seed=0), screen, frames)
+        print(f"{'StarField, 3 layers':24s} {count:6d} stars  {ms:6.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
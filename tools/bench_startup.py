@@ -0,0 +1,90 @@
+"""Measure startup time of both games.
+
+Each case runs in a fresh interpreter (in a scratch directory, so no save
+files are touched) and reports:
+- import: importing the game module
+- init: constructing the game object
+- first frame: drawing and presenting the first frame
+- total: process start to first frame, as seen from outside
+
+Cases are import-only, headless launch (SDL dummy driver) and window
+launch; the window case is skipped when no display is available.
+Usage: python tools/bench_startup.py [repeats]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import {module}
+imported = time.perf_counter()
+if {launch}:
+    game = {module}.{cls}(headless={headless})
+    created = time.perf_counter()
+    {first_frame}
+    import pygame
+    pygame.display.flip()
+    drawn = time.perf_counter()
+else:
+    created = drawn = imported
+print(imported - start, created - imported, drawn - created)
+"""
+
+GAMES = [
+    ("snake", "snake", "SnakeGame", "game.draw()"),
+    ("space shooter", "space_shooter", "Game", "game.draw()"),
+]
+
+CASES = [
+    ("import only", False, False),
+    ("headless launch", True, True),
+    ("window launch", True, False),
+]
+
+
+def run_case(module, cls, first_frame, launch, headless, cwd):
+    code = CHILD.format(root=os.path.abspath(ROOT), module=module, cls=cls, launch=launch,
+                        headless=headless, first_frame=first_frame)
+    env = dict(os.environ)
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    parts = [float(x) for x in result.stdout.split()[-3:]]
+    return parts + [total]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'':32s} {'import':>9s} {'init':>9s} {'first frame':>12s} {'total':>9s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, module, cls, first_frame in GAMES:
+            for label, launch, headless in CASES:
+                runs = []
+                for _ in range(repeats):
+                    timing = run_case(module, cls, first_frame, launch, headless, tmp)
+                    if timing is None:
+                        break
+                    runs.append(timing)
+                if not runs:
+                    print(f"{name + ' ' + label:32s} unavailable (no display?)")
+                    continue
+                # Median of each column
+                cols = [sorted(col)[len(col) // 2] for col in zip(*runs)]
+                ms = [c * 1000 for c in cols]
+                print(f"{name + ' ' + label:32s} {ms[0]:7.1f}ms {ms[1]:7.1f}ms {ms[2]:10.1f}ms {ms[3]:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
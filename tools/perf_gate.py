@@ -0,0 +1,359 @@
+"""Performance regression gate for both games.
+
+Runs a fixed set of seeded, scripted, headless scenarios and compares them
+with a stored baseline, per scenario and per phase (shooter: wave or boss
+phase; snake: snake length). Three things are measured:
+
+  ms/frame     update + draw per frame, untraced. Each scenario is played
+               `repeats` times and the median frame time of each phase is
+               kept per repeat. A phase regresses when the median of those
+               is more than MS_TOLERANCE slower than the baseline's and
+               every repeat is slower than every baseline repeat. That is a
+               rank test (one-sided Mann-Whitney, p < 0.0001 for five
+               repeats against the baseline's fifteen), so a host that
+               changes speed partway through a run makes it inconclusive
+               rather than failed.
+  peak rise    KiB per frame by which tracemalloc's peak rises above the
+               traced memory at the start of the frame, averaged over the
+               phase: the frame's temporary memory, not a count of its
+               allocations. Measured in one extra traced pass. Seeded runs
+               allocate the same way every time, so only a flat tolerance
+               applies.
+  peak         tracemalloc peak of the whole traced pass, game construction
+               included.
+
+Each scenario first plays one untimed warm-up pass, so the glow stamps,
+fonts and other caches it uses are filled the same way whichever scenarios
+ran before it. Even then a whole session can come out 20-30% faster or
+slower than the last on a shared virtual machine, every repeat alike. So
+--update records UPDATE_SESSIONS sessions, interleaved (every scenario
+once, then all of them again) and pools their repeats into the baseline,
+and MS_TOLERANCE is above that spread.
+
+Frame times only compare on similar hardware, so baselines are kept per
+machine class (OS, architecture and CPU count, e.g. linux-x86_64-1cpu):
+tools/perf_baselines/<class>.json unless --baseline is given. The one
+committed there is from the reference machine, a 1-CPU x86-64 Linux VM
+with NumPy. A baseline recorded on a machine that differs (including in
+whether NumPy is installed) gets a warning.
+--update records the scenarios that were run into it. Phases shorter than
+MIN_FRAMES frames are reported but not gated. Without NumPy the horde
+scenario is skipped with a note. The report ends with PASS, or with FAIL
+and each regressed scenario, phase and metric; the exit status is 1 on a
+regression and 2 when there is no baseline for a scenario.
+Usage: python tools/perf_gate.py [--update] [--repeats N] [--baseline PATH] [scenario ...]
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS, ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+import snake  # noqa: E402
+from run_history import RunRecord  # noqa: E402
+from snake_autoplay import AutoPlayer  # noqa: E402
+import space_shooter  # noqa: E402
+from space_shooter import Game  # noqa: E402
+
+REPEATS = 5
+MIN_FRAMES = 30
+UPDATE_SESSIONS = 3
+MS_TOLERANCE = 0.35        # share slower before a phase can count as regressed
+RISE_TOLERANCE = 0.10
+RISE_MIN_KIB = 0.5         # per frame
+PEAK_TOLERANCE = 0.05
+PEAK_MIN_KIB = 256
+SEED = 11
+
+
+class ShooterScenario:
+    """Seeded shooter run, auto-firing with the player kept alive"""
+    def __init__(self, name, frames, boss_frame=None, wave=1, difficulty=1.0, menu=False, horde_size=0):
+        self.name = name
+        self.frames = frames
+        self.boss_frame = boss_frame
+        self.wave = wave
+        self.difficulty = difficulty
+        self.menu = menu
+        self.horde_size = horde_size
+
+    def setup(self):
+        game = Game(headless=True, horde_size=self.horde_size)
+        game.reset_game(SEED)
+        game.show_menu = self.menu
+        game.wave = self.wave
+        game.difficulty_multiplier = self.difficulty
+        if self.menu:
+            # Something for the leaderboard to show
+            game.run_history.record_many(RunRecord("space_shooter", 1000 * i, i % 7 + 1, 10 * i, i % 3,
+                                                   60.0 + i, i, 1_700_000_000 + i) for i in range(200))
+        self.game = game
+
+    def step(self, frame):
+        game = self.game
+        game.auto_fire = True
+        game.player.health = game.player.max_health
+        if frame == self.boss_frame:
+            game.kills = game.kills_for_boss
+        game.update()
+        game.draw()
+
+    def phase(self):
+        game = self.game
+        if game.show_menu:
+            return "menu"
+        return f"boss phase {game.boss.phase}" if game.boss else f"wave {game.wave}"
+
+    def close(self):
+        self.game.stats_store.close()
+        self.game.run_history.close()
+
+
+class SnakeScenario:
+    """Seeded snake games played by the autoplayer, back to back"""
+    def __init__(self, name, frames, width=snake.GRID_WIDTH, height=snake.GRID_HEIGHT, draw=True):
+        self.name = name
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.draw = draw
+
+    def setup(self):
+        self.game = snake.SnakeGame(self.width, self.height, headless=True)
+        self.games = 0
+        self.new_game()
+
+    def new_game(self):
+        self.game.reset_game(SEED + self.games)
+        self.games += 1
+        self.player = AutoPlayer(self.game)
+
+    def step(self, frame):
+        if self.game.game_over:
+            self.new_game()
+        self.player.step()
+        self.game.update()
+        if self.draw:
+            self.game.draw()
+
+    def phase(self):
+        length = len(self.game.snake)
+        return "length <50" if length < 50 else "length 50-199" if length < 200 else "length 200+"
+
+    def close(self):
+        self.game.high_score_store.close()
+        self.game.run_history.close()
+
+
+SCENARIOS = [
+    ShooterScenario("shooter/waves", 1200),
+    ShooterScenario("shooter/swarm", 1200, wave=5, difficulty=4.0),
+    ShooterScenario("shooter/boss", 2400, boss_frame=1),
+    ShooterScenario("shooter/menu", 300, menu=True),
+    ShooterScenario("shooter/horde", 1200, horde_size=2000),
+    SnakeScenario("snake/autoplay", 4000),
+    SnakeScenario("snake/large board", 4000, 160, 120, draw=False),
+]
+
+
+def timed_pass(scenario):
+    """{phase: [frame ms]} of one untraced play"""
+    scenario.setup()
+    times = {}
+    clock = time.perf_counter
+    for frame in range(scenario.frames):
+        start = clock()
+        scenario.step(frame)
+        ms = (clock() - start) * 1000
+        times.setdefault(scenario.phase(), []).append(ms)
+    scenario.close()
+    return times
+
+
+def traced_pass(scenario):
+    """({phase: mean peak rise per frame in KiB}, peak KiB) of one traced play"""
+    gc.collect()
+    tracemalloc.start()
+    scenario.setup()
+    peak = tracemalloc.get_traced_memory()[1]
+    rises = {}
+    for frame in range(scenario.frames):
+        # reset_peak drops the earlier high-water mark, so the run's peak is kept here
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        scenario.step(frame)
+        frame_peak = tracemalloc.get_traced_memory()[1]
+        rises.setdefault(scenario.phase(), []).append(frame_peak - before)
+        peak = max(peak, frame_peak)
+    tracemalloc.stop()
+    scenario.close()
+    return {phase: statistics.mean(r) / 1024 for phase, r in rises.items()}, peak / 1024
+
+
+def measure(scenario, repeats):
+    timed_pass(scenario)   # warm-up
+    rises, peak = traced_pass(scenario)
+    runs = [timed_pass(scenario) for _ in range(repeats)]
+    phases = {}
+    for phase, rise in rises.items():
+        phases[phase] = {
+            "frames": len(runs[0].get(phase, ())),
+            "ms": [statistics.median(run[phase]) for run in runs if phase in run],
+            "rise_kib": rise,
+        }
+    return {"phases": phases, "peak_kib": peak}
+
+
+def compare(name, base, current):
+    """Print a scenario's rows; returns its regressions as strings"""
+    regressions = []
+    print(f"\n{name}")
+    print(f"  {'phase':16s} {'frames':>6s} {'ms/frame':>20s} {'change':>8s} {'repeats now':>15s} "
+          f"{'peak rise KiB/frame':>20s}")
+    for phase, now in current["phases"].items():
+        old = base["phases"].get(phase)
+        ms = statistics.median(now["ms"])
+        if old is None:
+            print(f"  {phase:16s} {now['frames']:6d} {'-':>8s} -> {ms:8.3f} {'new':>8s} "
+                  f"{min(now['ms']):7.3f}-{max(now['ms']):<7.3f} {'-':>8s} -> {now['rise_kib']:8.1f}")
+            continue
+        old_ms = statistics.median(old["ms"])
+        gated = now["frames"] >= MIN_FRAMES and old["frames"] >= MIN_FRAMES
+        flags = []
+        if gated and ms > old_ms * (1 + MS_TOLERANCE):
+            if min(now["ms"]) > max(old["ms"]):
+                regressions.append(f"{name}, {phase}: ms/frame {old_ms:.3f} -> {ms:.3f} "
+                                   f"({ms / old_ms - 1:+.1%}; repeats {min(now['ms']):.3f}-{max(now['ms']):.3f}, "
+                                   f"baseline {min(old['ms']):.3f}-{max(old['ms']):.3f})")
+                flags.append("SLOWER")
+            else:
+                flags.append("slower but too noisy to tell")
+        rise, old_rise = now["rise_kib"], old["rise_kib"]
+        if gated and rise > old_rise * (1 + RISE_TOLERANCE) and rise - old_rise > RISE_MIN_KIB:
+            regressions.append(f"{name}, {phase}: peak rise/frame {old_rise:.1f} -> {rise:.1f} KiB "
+                               f"({rise / max(old_rise, 1e-9) - 1:+.1%})")
+            flags.append("MEMORY")
+        if not gated:
+            flags.append("(too short to gate)")
+        print(f"  {phase:16s} {now['frames']:6d} {old_ms:8.3f} -> {ms:8.3f} {ms / old_ms - 1:+8.1%} "
+              f"{min(now['ms']):7.3f}-{max(now['ms']):<7.3f} {old_rise:8.1f} -> {rise:8.1f}  {' '.join(flags)}")
+    for phase in base["phases"].keys() - current["phases"].keys():
+        print(f"  {phase:16s} missing from this run")
+    peak, old_peak = current["peak_kib"], base["peak_kib"]
+    flag = ""
+    if peak > old_peak * (1 + PEAK_TOLERANCE) and peak - old_peak > PEAK_MIN_KIB:
+        regressions.append(f"{name}: peak memory {old_peak:.0f} -> {peak:.0f} KiB "
+                           f"({peak / old_peak - 1:+.1%})")
+        flag = "  HIGHER"
+    print(f"  peak traced memory {old_peak:.0f} -> {peak:.0f} KiB{flag}")
+    return regressions
+
+
+def machine_class():
+    return f"{platform.system().lower()}-{platform.machine().lower()}-{os.cpu_count()}cpu"
+
+
+def machine():
+    # Without NumPy the shooter draws a different starfield
+    return {"class": machine_class(), "processor": platform.processor(),
+            "python": platform.python_version(), "pygame": pygame.version.ver,
+            "numpy": space_shooter.StarField is not None}
+
+
+def main():
+    args = sys.argv[1:]
+    update = "--update" in args
+    if update:
+        args.remove("--update")
+    repeats = REPEATS
+    path = os.path.join(TOOLS, "perf_baselines", f"{machine_class()}.json")
+    for flag in ("--repeats", "--baseline"):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            if flag == "--repeats":
+                repeats = int(value)
+            else:
+                path = value
+    scenarios = [s for s in SCENARIOS if not args or s.name in args]
+    if not scenarios:
+        print(f"No such scenario; choose from: {', '.join(s.name for s in SCENARIOS)}")
+        return 2
+    if space_shooter.horde is None:
+        skipped = [s.name for s in scenarios if getattr(s, "horde_size", 0)]
+        if skipped:
+            print(f"Skipping {', '.join(skipped)}: horde mode needs NumPy (pip install numpy)")
+            scenarios = [s for s in scenarios if s.name not in skipped]
+            if not scenarios:
+                return 2
+    path = os.path.abspath(path)
+
+    baseline = {"machine": machine(), "scenarios": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+        if baseline["machine"] != machine():
+            print(f"Warning: baseline recorded on {baseline['machine']}, this is {machine()}")
+
+    os.chdir(tempfile.mkdtemp())   # stats files and run history
+    results = {}
+    sessions = UPDATE_SESSIONS if update else 1
+    for session in range(1, sessions + 1):
+        for scenario in scenarios:
+            start = time.perf_counter()
+            result = measure(scenario, repeats)
+            pooled = results.setdefault(scenario.name, result)
+            if pooled is not result:
+                # Seeded, so the phases and traced figures are the same every session
+                for phase, row in result["phases"].items():
+                    if phase in pooled["phases"]:
+                        pooled["phases"][phase]["ms"] += row["ms"]
+            label = f" (session {session} of {sessions})" if sessions > 1 else ""
+            print(f"{scenario.name}{label}: warm-up, traced pass and {repeats} repeats in "
+                  f"{time.perf_counter() - start:.0f} s", flush=True)
+
+    if update:
+        baseline["machine"] = machine()
+        baseline["scenarios"].update(results)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"Baseline for {', '.join(results)} written to {path}")
+        return 0
+
+    regressions = []
+    missing = []
+    for name, current in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            missing.append(name)
+        else:
+            regressions += compare(name, base, current)
+    if missing:
+        print(f"\nNo baseline for {', '.join(missing)} in {path}; record one with --update")
+    if regressions:
+        print("\nFAIL")
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+    if missing:
+        return 2
+    print("\nPASS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
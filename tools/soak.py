@@ -0,0 +1,274 @@
+"""Long-run memory soak of the shooter, with tracemalloc leak detection.
+
+Plays headless for the given number of frames with a bot that goes round
+the whole life cycle a kiosk sees: menu, play, pause, rewind, game over,
+then either a restart or back to the menu. Every transition goes through
+Game.handle_events with posted key and mouse events, so restarts take the
+same reset_game path as a player. The bot steers and aims through
+Game.local_input. Every frame is updated, drawn and fed to the quality
+governor, just like Game.run does.
+
+tracemalloc with tracebacks makes a frame over ten times slower, far too
+slow for millions of frames, so the soak runs in two phases:
+
+  watch  untraced. Right after a restart, when the game is back to a fresh
+         state, and at least `interval` frames after the last sample, it
+         runs gc.collect and records the allocated Python memory blocks
+         (sys.getallocatedblocks) and the process RSS. The first
+         WARMUP_SAMPLES samples are skipped while caches fill up (glow
+         stamps, fonts, the leaderboard query, SQLite).
+  trace  only after sustained growth. tracemalloc starts with
+         TRACEBACK_FRAMES frames per traceback and the bot plays up to
+         TRACE_RUNS more runs, stopping at the first restart after
+         TRACE_SECONDS. Snapshots are taken right after the first and last
+         restart, and the allocation sites that grew between them are
+         printed with their tracebacks. The quality governor is left
+         alone meanwhile, as traced frames are slow.
+
+Growth is sustained when the least-squares trend of the watch samples is
+above LIMIT_BLOCKS per million frames, and the lowest sample of the last
+third is above the highest of the first third, so one busy sample doesn't
+count. SQLite only prunes a connection's dead cursor references every
+200th cursor, so the block count rises and falls in a sawtooth of about a
+hundred runs; the default frames and interval span several of them. A
+short soak can catch the rising side of one tooth, so sustained growth
+only fails the soak when the last third sits at least MIN_GROWTH_BLOCKS
+above the first; less than that is reported as inconclusive. The exit
+status is 1 on sustained growth and 2 when the soak can't tell. The stats
+file and run history go to a temporary directory.
+Usage: python tools/soak.py [frames] [interval] [seed]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from space_shooter import FPS, WIDTH, Game  # noqa: E402
+
+WARMUP_SAMPLES = 3
+LIMIT_BLOCKS = 1000         # allowed trend per million frames
+MIN_GROWTH_BLOCKS = 2000    # well above one SQLite cursor sawtooth
+TRACEBACK_FRAMES = 8
+TRACE_RUNS = 8
+TRACE_SECONDS = 300
+TOP_SITES = 10
+MAX_RUN_FRAMES = 30 * FPS   # a bot that survives this long is killed off
+BOSS_CHANCE = 0.5           # share of runs that get a boss forced in
+
+
+class Bot:
+    """Plays one frame at a time and walks the game through its states"""
+    def __init__(self, game, seed):
+        self.game = game
+        self.rng = random.Random(seed)   # separate from the game's random sequence
+        self.wait = 0                    # frames left before the next menu / game over action
+        self.heading = (0, 0)
+        self.heading_frames = 0
+        self.boss_frame = None
+        self.restarts = 0
+
+    def press(self, key):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+    def frame(self):
+        """Decide this frame's input; returns True when it starts a new run"""
+        game, rng = self.game, self.rng
+        if game.show_menu or game.game_over:
+            if self.wait == 0:
+                self.wait = rng.randint(30, 180)
+            self.wait -= 1
+            if self.wait == 0:
+                if game.game_over and rng.random() < 0.3:
+                    self.press(pygame.K_ESCAPE)   # to the menu first
+                else:
+                    self.press(pygame.K_SPACE)
+                    self.start_run()
+                    return True
+            return False
+
+        if game.paused:
+            if rng.random() < 0.05:
+                self.press(pygame.K_ESCAPE)
+            return False
+        roll = rng.random()
+        if roll < 0.001:
+            self.press(pygame.K_ESCAPE)
+        elif roll < 0.002:
+            self.press(pygame.K_BACKSPACE)
+        elif roll < 0.003:
+            self.press(pygame.K_f)
+        if not game.auto_fire and rng.random() < 0.2:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=self.aim(), button=1))
+
+        if self.heading_frames == 0:
+            self.heading = (rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1)))
+            self.heading_frames = rng.randint(15, 90)
+        self.heading_frames -= 1
+        dx, dy = self.heading
+        game.local_input = ({pygame.K_w: dy < 0, pygame.K_s: dy > 0, pygame.K_a: dx < 0,
+                             pygame.K_d: dx > 0}, self.aim())
+
+        if game.frames == self.boss_frame and not game.boss:
+            game.kills = game.kills_for_boss
+        if game.frames >= MAX_RUN_FRAMES:
+            for player in game.players:
+                player.health = 0
+        return False
+
+    def aim(self):
+        game = self.game
+        targets = game.enemies + ([game.boss] if game.boss else [])
+        if not targets:
+            return (WIDTH // 2, 0)
+        x, y = game.player.x, game.player.y
+        target = min(targets, key=lambda t: (t.x - x) ** 2 + (t.y - y) ** 2)
+        return (int(target.x), int(target.y))
+
+    def start_run(self):
+        self.restarts += 1
+        rng = self.rng
+        self.boss_frame = rng.randint(FPS * 5, MAX_RUN_FRAMES // 2) if rng.random() < BOSS_CHANCE else None
+        self.heading_frames = 0
+
+
+def rss_kib():
+    """Resident set size in KiB, or 0 where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return 0
+
+
+def trend(samples):
+    """Least-squares slope of value per frame over (frame, value) samples"""
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var = sum((x - mean_x) ** 2 for x, _ in samples)
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / var if var else 0.0
+
+
+def play(game, bot, govern=True):
+    """One frame, as Game.run plays it; returns (False once the game is told to quit,
+    True when the bot started a new run)"""
+    restarted = bot.frame()
+    start = time.perf_counter()
+    if not game.handle_events():
+        return False, restarted
+    game.update()
+    game.draw()
+    if govern:
+        game.quality.frame((time.perf_counter() - start) * 1000)
+    return True, restarted
+
+
+def trace_sites(game, bot):
+    """Play TRACE_RUNS runs under tracemalloc and print the sites that grew"""
+    tracemalloc.start(TRACEBACK_FRAMES)
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+    first = snapshot = None
+    runs = 0
+    deadline = None
+    while runs <= TRACE_RUNS:
+        # Traced frames are slow; keep the quality level the watch phase ended on
+        running, restarted = play(game, bot, govern=False)
+        if not running:
+            break
+        if restarted:
+            runs += 1
+            if runs == 1 or runs > TRACE_RUNS or time.perf_counter() > deadline:
+                gc.collect()
+                snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+                if first is None:
+                    first = snapshot
+                    deadline = time.perf_counter() + TRACE_SECONDS
+                else:
+                    break
+    tracemalloc.stop()
+    if first is None or snapshot is first:
+        print("\nStopped before two traced restarts; no allocation sites to compare")
+        return
+    grown = [stat for stat in snapshot.compare_to(first, "traceback") if stat.size_diff > 0]
+    print(f"\nTop allocation sites grown over {runs - 1} traced runs:")
+    for stat in grown[:TOP_SITES]:
+        print(f"\n+{stat.size_diff / 1024:.1f} KiB in {stat.count_diff:+d} blocks "
+              f"(now {stat.size / 1024:.1f} KiB in {stat.count} blocks)")
+        for line in stat.traceback.format(most_recent_first=True):
+            print("   " + line)
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    interval = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    os.chdir(tempfile.mkdtemp())
+    random.seed(seed)
+
+    game = Game(headless=True)
+    bot = Bot(game, seed)
+    samples = []             # (frame, allocated blocks) after warm-up
+    taken = 0
+    last_sample = 0
+    start = time.perf_counter()
+    print(f"{'frame':>10s} {'runs':>6s} {'blocks':>9s} {'RSS KiB':>9s} {'quality':>8s}")
+    played = 0
+    stopped = False
+    for frame in range(1, frames + 1):
+        running, restarted = play(game, bot)
+        if not running:
+            print("Stopped early (quit event or SIGTERM)")
+            stopped = True
+            break
+        played = frame
+        if restarted and frame - last_sample >= interval:
+            last_sample = frame
+            gc.collect()
+            blocks = sys.getallocatedblocks()
+            taken += 1
+            if taken > WARMUP_SAMPLES:
+                samples.append((frame, blocks))
+            print(f"{frame:10d} {bot.restarts:6d} {blocks:9d} {rss_kib():9d} {game.quality.level.name:>8s}"
+                  f"{'  warm-up' if taken <= WARMUP_SAMPLES else ''}", flush=True)
+
+    seconds = time.perf_counter() - start
+    print(f"\n{played} frames, {bot.restarts} runs in {seconds:.0f} s ({played / seconds:.0f} frames/s)")
+    status = 2
+    if len(samples) < 6:
+        print(f"Only {len(samples)} samples after warm-up; run more frames or use a shorter interval")
+    else:
+        per_million = trend(samples) * 1_000_000
+        third = len(samples) // 3
+        margin = min(y for _, y in samples[-third:]) - max(y for _, y in samples[:third])
+        sustained = margin > 0
+        print(f"Allocated blocks {samples[-1][1] - samples[0][1]:+d} since warm-up, trend "
+              f"{per_million:+.0f} per million frames (limit {LIMIT_BLOCKS}), "
+              f"{f'sustained by {margin} blocks' if sustained else 'not sustained'}")
+        if per_million > LIMIT_BLOCKS and sustained and margin >= MIN_GROWTH_BLOCKS:
+            print("FAIL: memory keeps growing")
+            if not stopped:
+                trace_sites(game, bot)
+            status = 1
+        elif per_million > LIMIT_BLOCKS and sustained:
+            print(f"Inconclusive: growth under {MIN_GROWTH_BLOCKS} blocks can be one SQLite cursor "
+                  f"sawtooth; run more frames")
+        else:
+            print("OK")
+            status = 0
+    game.stats_store.close()
+    game.run_history.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Summarize a telemetry log per wave and boss phase.
+
+Reads a log written with `python space_shooter.py --telemetry [PATH]` and,
+for the frames actually played, prints frame, update and draw time
+percentiles, entity counts, collision tests and draw calls per wave and
+boss phase (phase 0 is the wave before its boss), plus garbage collections
+and their pauses. Paused, menu and game-over frames are counted separately.
+Usage: python tools/summarize_telemetry.py LOG [LOG ...]
+"""
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from telemetry import PLAYING, STATE_NAMES, read_records  # noqa: E402
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def column(records, name):
+    return sorted(getattr(r, name) for r in records)
+
+
+def summarize(path):
+    groups = defaultdict(list)
+    others = defaultdict(int)
+    total = 0
+    for record in read_records(path):
+        total += 1
+        if record.state == PLAYING:
+            groups[record.wave, record.boss_phase].append(record)
+        else:
+            others[STATE_NAMES[record.state]] += 1
+
+    print(f"{path}: {total} frames")
+    if others:
+        print("  not playing: " + ", ".join(f"{name} {count}" for name, count in sorted(others.items())))
+    print(f"  {'wave':>4s} {'boss':>4s} {'frames':>6s}   {'frame ms p50/p95/p99':>20s}   "
+          f"{'update p95':>10s} {'draw p95':>8s}   {'bullets':>7s} {'enemies':>7s} {'particles':>9s}   "
+          f"{'tests':>6s} {'draws':>6s}   {'gc':>4s} {'gc ms':>6s} {'max':>5s}")
+    for (wave, phase), records in sorted(groups.items()):
+        frame_ms = column(records, "frame_ms")
+        gc_ms = column(records, "gc_ms")
+        print(f"  {wave:4d} {phase if phase else '-':>4} {len(records):6d}   "
+              f"{percentile(frame_ms, 50):6.2f} {percentile(frame_ms, 95):6.2f} {percentile(frame_ms, 99):6.2f}   "
+              f"{percentile(column(records, 'update_ms'), 95):10.2f} "
+              f"{percentile(column(records, 'draw_ms'), 95):8.2f}   "
+              f"{percentile(column(records, 'bullets'), 95):7d} {percentile(column(records, 'enemies'), 95):7d} "
+              f"{percentile(column(records, 'particles'), 95):9d}   "
+              f"{percentile(column(records, 'collision_tests'), 95):6d} "
+              f"{percentile(column(records, 'draw_calls'), 95):6d}   "
+              f"{sum(r.gc_collections for r in records):4d} {sum(gc_ms):6.1f} {gc_ms[-1]:5.2f}")
+    print("  (p95 for counts; gc = collections, total and longest pause in ms)")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    status = 0
+    for path in sys.argv[1:]:
+        try:
+            summarize(path)
+        except ValueError as e:
+            print(e)
+            status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Mixer channel budgeting for sound effects.
+
+Each effect belongs to a category, and each category owns a fixed set of
+reserved mixer channels, so a burst of one kind of sound (rapid fire, a
+chain of explosions) can never take the channels another kind needs.
+
+A play request is handled in this order:
+- coalesced: the same effect started less than its min_interval ago, so a
+  second identical blip would only add noise and mixer work
+- played on a free channel of its category
+- played by stealing the oldest voice in its category with the same or
+  lower priority, or the oldest voice anywhere with a strictly lower priority
+- dropped
+"""
+import time
+
+import pygame
+
+
+class Effect:
+    def __init__(self, category, priority, min_interval):
+        self.category = category
+        self.priority = priority          # higher wins when stealing
+        self.min_interval = min_interval  # seconds between starts of this effect
+
+
+# Channels reserved for each category
+CATEGORIES = {
+    "weapons": 2,
+    "impacts": 3,
+    "player": 2,
+}
+
+EFFECTS = {
+    "shoot": Effect("weapons", 1, 0.05),
+    "explosion": Effect("impacts", 2, 0.03),
+    "powerup": Effect("player", 3, 0.1),
+    "damage": Effect("player", 4, 0.1),
+}
+
+
+class VoiceManager:
+    def __init__(self, categories=CATEGORIES, effects=EFFECTS, first_channel=0):
+        self.effects = effects
+        self.channels = {}
+        index = first_channel
+        for category, count in categories.items():
+            self.channels[category] = list(range(index, index + count))
+            index += count
+        self.end_channel = index
+
+        # Needs the mixer to be initialized. Reserved channels are never
+        # picked by Sound.play(), so only this manager plays on them.
+        if pygame.mixer.get_num_channels() < index:
+            pygame.mixer.set_num_channels(index)
+        pygame.mixer.set_reserved(index)
+        self.mixer_channels = [pygame.mixer.Channel(i) for i in range(index)]
+
+        # Per channel: (priority, start time) of the voice last started on it
+        self.voices = [None] * index
+        self.last_start = {}
+
+        # Counters
+        self.played = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.stolen = 0
+
+    def play(self, name, sound, now=None):
+        """Play sound as effect name; returns the channel used, or None"""
+        if now is None:
+            now = time.monotonic()
+        effect = self.effects[name]
+
+        last = self.last_start.get(name)
+        if last is not None and now - last < effect.min_interval:
+            self.coalesced += 1
+            return None
+
+        index = self.free_channel(effect.category)
+        if index is None:
+            index = self.victim(effect)
+            if index is None:
+                self.dropped += 1
+                return None
+            self.stolen += 1
+
+        channel = self.mixer_channels[index]
+        channel.play(sound)
+        self.voices[index] = (effect.priority, now)
+        self.last_start[name] = now
+        self.played += 1
+        return channel
+
+    def free_channel(self, category):
+        for index in self.channels[category]:
+            if not self.mixer_channels[index].get_busy():
+                return index
+        return None
+
+    def victim(self, effect):
+        """Channel whose voice effect may take over, or None"""
+        own = self.oldest(self.channels[effect.category], effect.priority + 1)
+        if own is not None:
+            return own
+        others = [i for category, indexes in self.channels.items()
+                  if category != effect.category for i in indexes]
+        return self.oldest(others, effect.priority)
+
+    def oldest(self, indexes, below):
+        """Oldest busy voice among indexes with priority < below"""
+        best = None
+        for index in indexes:
+            voice = self.voices[index]
+            if voice is None or voice[0] >= below or not self.mixer_channels[index].get_busy():
+                continue
+            if best is None or voice[1] < self.voices[best][1]:
+                best = index
+        return best
+
+    def counters(self):
+        return {"played": self.played, "coalesced": self.coalesced,
+                "dropped": self.dropped, "stolen": self.stolen}